@@ -93,41 +93,46 @@ class GeminiTimeReader:
 
 
 
-import requests
 import json
 import os
+import sys
 from dotenv import load_dotenv
 
 # .env 로드 (API KEY)
 load_dotenv()
 
+# 서비스 경로 설정 (매치 저장소 / Riot 클라이언트 사용)
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from services.riot_service import get_match_timeline, run_sync
+from services.timeline_frame import load_timeline_frame
+
 class RiotTimelineSlicer:
-    def __init__(self, api_key, region_route="asia"):
+    def __init__(self, region_route="asia"):
         """
         region_route: 'asia' (KR, JP), 'americas', 'europe' 등
         Match V5는 지역(Continent) 단위 라우팅을 사용합니다.
+        (API 키는 services/settings.py 의 RIOT_API_KEY 를 사용)
         """
-        self.api_key = api_key
-        self.base_url = f"https://{region_route}.api.riotgames.com"
-        self.headers = {
-            "X-Riot-Token": self.api_key
-        }
+        self.region_route = region_route
 
     def fetch_full_timeline(self, match_id):
-        """API에서 전체 타임라인 JSON을 받아옵니다."""
-        url = f"{self.base_url}/lol/match/v5/matches/{match_id}/timeline"
-        
-        try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"❌ API 요청 실패: {e}")
-            return None
+        """
+        전체 타임라인 JSON을 받아옵니다.
+        한 번 받은 타임라인은 매치 저장소(services/match_store.py)에서 읽으므로 네트워크를 다시 타지 않습니다.
+        """
+        timeline = run_sync(get_match_timeline(match_id, default_routing=self.region_route))
+        if timeline is None:
+            print(f"❌ API 요청 실패: {match_id}")
+        return timeline
 
-    def slice_data(self, timeline_json, start_sec, end_sec):
+    def slice_data(self, timeline_json, start_sec, end_sec, match_id=None):
         """
         OCR로 얻은 start_sec ~ end_sec 사이의 데이터만 추출합니다.
+        match_id: fetch_full_timeline으로 받은 타임라인이면 매치 ID (같은 매치의 변환 결과 재사용)
         """
         if not timeline_json: return None
 
@@ -140,8 +145,9 @@ class RiotTimelineSlicer:
         start_idx = int(start_sec // 60)
         end_idx = int(end_sec // 60)
         
-        frames = timeline_json['info']['frames']
-        max_idx = len(frames) - 1
+        # 타임라인을 열(column) 단위 배열로 변환 (같은 매치는 변환 결과 재사용)
+        tf = load_timeline_frame(timeline_json, match_id)
+        max_idx = tf.n_frames - 1
         
         # 결과 담을 컨테이너
         sliced_result = {
@@ -150,25 +156,21 @@ class RiotTimelineSlicer:
             "participant_frames": [] # 구간 내 챔피언 상태 (위치, 골드, XP 등 - 1분 주기)
         }
 
-        # 3. 필요한 프레임만 순회
+        # 3. Events 필터링 (정밀함: 밀리초 단위, 이벤트 테이블에서 한 번에 선택)
+        for event in tf.select_events(start_ms=start_ms, end_ms=end_ms):
+            # 보기 좋게 '초(sec)' 필드 추가 (원본 타임라인은 수정하지 않도록 복사)
+            sliced_result['events'].append(dict(event, timestamp_sec=event['timestamp'] / 1000))
+
+        # 4. ParticipantFrames 가져오기 (1분 간격 스냅샷)
         # end_idx + 1을 해주는 이유는 Python slice가 마지막을 포함 안하기 때문, 
         # 그리고 끝나는 시간의 '분' 데이터도 필요할 수 있음.
+        # 이 데이터는 해당 분(Minute)의 '0초' 시점 데이터입니다.
         search_range = range(start_idx, min(end_idx + 2, max_idx + 1))
 
+        # 참가자 정보는 원본 participantFrames 그대로 (championStats / damageStats / position 등 전체 구조 유지)
+        frames = timeline_json['info']['frames']
         for i in search_range:
             frame = frames[i]
-            
-            # (1) Events 필터링 (정밀함: 밀리초 단위)
-            for event in frame['events']:
-                ts = event['timestamp']
-                if start_ms <= ts <= end_ms:
-                    # 보기 좋게 '초(sec)' 필드 추가 (선택사항)
-                    event['timestamp_sec'] = ts / 1000 
-                    sliced_result['events'].append(event)
-            
-            # (2) ParticipantFrames 가져오기 (1분 간격 스냅샷)
-            # 이 데이터는 해당 분(Minute)의 '0초' 시점 데이터입니다.
-            # 영상 구간에 포함되거나 걸쳐있는 프레임 정보를 저장합니다.
             frame_data = {
                 "timestamp": frame['timestamp'], # 예: 900000 (15분)
                 "timestamp_sec": frame['timestamp'] / 1000,
@@ -206,7 +208,6 @@ if __name__ == "__main__":
     # --- 사용 예시 ---
 if __name__ == "__main__":
     # 1. 설정
-    API_KEY = os.getenv("RIOT_API_KEY") # .env에 RIOT_API_KEY 설정 필요
     MATCH_ID = "KR_7971051219" # 테스트할 매치 ID
 
     
@@ -218,7 +219,7 @@ if __name__ == "__main__":
 
     
 
-    slicer = RiotTimelineSlicer(api_key=API_KEY, region_route="asia")
+    slicer = RiotTimelineSlicer(region_route="asia")
     
     print(f"🚀 데이터 가져오는 중... MatchID: {MATCH_ID}")
     full_timeline = slicer.fetch_full_timeline(MATCH_ID)
@@ -226,7 +227,7 @@ if __name__ == "__main__":
     if full_timeline:
         print(f"✂️ 데이터 자르는 중... ({OCR_START_SEC}초 ~ {OCR_END_SEC}초)")
         
-        result = slicer.slice_data(full_timeline, OCR_START_SEC, OCR_END_SEC)
+        result = slicer.slice_data(full_timeline, OCR_START_SEC, OCR_END_SEC, match_id=MATCH_ID)
         
         if result:
             print(f"\n▶ 3단계: 파일 저장")
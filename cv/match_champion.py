@@ -1,9 +1,21 @@
-import requests
+import json
+import os
+import sys
 
-def print_teams_by_side(api_key, match_id):
-    # 한국/아시아 서버 기준 URL
-    url = f"https://asia.api.riotgames.com/lol/match/v5/matches/{match_id}"
-    resp = requests.get(url, headers={"X-Riot-Token": api_key}).json()
+# 서비스 경로 설정 (매치 저장소 / Riot 클라이언트 사용)
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from services.riot_service import get_match_info, run_sync
+
+def print_teams_by_side(match_id):
+    # 매치 저장소에 있으면 로컬에서, 없으면 Riot API에서 가져옴 (API 키는 services/settings.py 의 RIOT_API_KEY 사용)
+    resp = run_sync(get_match_info(match_id))
+    if resp is None:
+        print(f"❌ API 요청 실패: {match_id}")
+        return None
     
     participants = resp['info']['participants']
     
@@ -22,10 +34,9 @@ def print_teams_by_side(api_key, match_id):
     print(f"🟥 레드팀: {', '.join(red_team)}")
     return [blue_team, red_team]
 
-API_KEY = os.getenv("RIOT_API_KEY") # .env에 RIOT_API_KEY 설정 필요
-MATCH_ID = "KR_7971051219" # 테스트할 매치 ID
+MATCH_ID = "KR_7971051219" # 테스트할 매치 ID (.env에 RIOT_API_KEY 설정 필요)
 
-champions = print_teams_by_side(API_KEY, MATCH_ID)
+champions = print_teams_by_side(MATCH_ID)
 
 # 1. 챔피언 DB (내용은 동일)
 CHAMPION_DB = [
@@ -206,18 +217,15 @@ def normalize_name(name):
 # 검색 최적화용 맵 생성 (전체 DB가 있다고 가정)
 ROLE_MAP = {normalize_name(c['name']): c['role'] for c in CHAMPION_DB}
 
-def get_match_participants(api_key, match_id):
+def get_match_participants(match_id):
     """
     API에서 매치 정보를 가져와 참가자들의 상세 정보를 리스트로 반환합니다.
     (단순 이름뿐만 아니라 puuid, teamId, riotId를 포함)
+    API 키는 services/settings.py 의 RIOT_API_KEY 를 사용합니다.
     """
-    url = f"https://asia.api.riotgames.com/lol/match/v5/matches/{match_id}"
-    try:
-        resp = requests.get(url, headers={"X-Riot-Token": api_key})
-        resp.raise_for_status() # 에러 체크
-        data = resp.json()
-    except Exception as e:
-        print(f"❌ API 요청 실패: {e}")
+    data = run_sync(get_match_info(match_id))
+    if data is None:
+        print(f"❌ API 요청 실패: {match_id}")
         return None
 
     participants_data = []
@@ -289,7 +297,6 @@ def process_match_data(participants_data, target_puuid=None):
     return result
 
 # --- 실행 설정 ---
-API_KEY = os.getenv("RIOT_API_KEY") 
 MATCH_ID = "KR_7971051219"  # 예시 매치 ID (본인의 매치 ID로 변경 필요)
 
 # ★ 분석하고 싶은 플레이어의 PUUID 입력
@@ -297,7 +304,7 @@ MATCH_ID = "KR_7971051219"  # 예시 매치 ID (본인의 매치 ID로 변경 
 TARGET_PUUID = "3Tb67761olI0CDbAm9sghuiLQ5Un6t8E5d7Mt3s1EEjivA0WiDJJDRowGPzrC91RwL2E5gb47Yhfuw" 
 
 # 1. 데이터 가져오기 (API 호출)
-raw_participants = get_match_participants(API_KEY, MATCH_ID)
+raw_participants = get_match_participants(MATCH_ID)
 
 # 2. 데이터 가공 및 타겟 식별
 if raw_participants:
@@ -1,10 +1,19 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routers import search
 from routers import match
 from routers import coach
+from services.riot_client import riot_client
+from services.rate_limiter import rate_limiter
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # 종료 시 Riot API 커넥션 풀 정리
+    await riot_client.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",
@@ -27,6 +36,11 @@ app.include_router(coach.router)
 def read_root():
     return {"message": "LoL Coach AI Server is Running!"}
 
+@app.get("/health/riot")
+def riot_status():
+    """Riot API 요청 대기열 상태 (레이트 리밋으로 대기 중인 요청 수)"""
+    return rate_limiter.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,192 @@
+import json
+from typing import Dict, List, Optional
+
+# 프레임 상세도
+# - full: 이벤트 전체 + 모든 플레이어 상태(골드/레벨/위치)
+# - focus: 이벤트 전체 + 팀 골드 + 대상 플레이어/맞라이너 상태
+# - light: 이벤트(피해 내역 제외) + 팀 골드
+# (중요 장면 프레임, 이벤트가 있는 프레임, 조용한 프레임, 조용한 프레임 샘플링 간격)
+COMPACTION_LEVELS = (
+    ("full", "full", "full", 1),
+    ("full", "focus", "focus", 1),
+    ("full", "focus", "light", 2),
+    ("full", "light", "light", 3),
+    ("focus", "light", "light", 5),
+    ("focus", "light", None, 0),
+    ("light", "light", None, 0),
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토큰 수 추정치 (Gemini 토크나이저를 로컬에서 쓸 수 없으므로 근사)
+    ASCII는 약 4글자당 1토큰, 한글 등 멀티바이트 문자는 글자당 약 0.7토큰으로 계산합니다.
+    """
+    n_bytes = len(text.encode("utf-8"))
+    # 한글은 UTF-8에서 3바이트이므로 (바이트 수 - 글자 수) / 2 ≈ 멀티바이트 글자 수
+    multibyte = (n_bytes - len(text)) // 2
+    return int((len(text) - multibyte) / 4 + multibyte * 0.7) + 1
+
+
+def _dumps(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def light_events(events: List[Dict]) -> List[Dict]:
+    """피해 내역(damage_received)을 뺀 이벤트 목록"""
+    return [{k: v for k, v in e.items() if k != 'damage_received'} for e in events]
+
+
+def find_lane_opponent(players: List[Dict], target: Dict) -> Optional[Dict]:
+    """같은 포지션의 상대 팀 플레이어 (포지션 정보가 없으면 None)"""
+    if not target.get('teamPosition'):
+        return None
+    return next(
+        (p for p in players if p['teamId'] != target['teamId'] and p.get('teamPosition') == target['teamPosition']),
+        None,
+    )
+
+
+class MatchContextCompactor:
+    """
+    processed_context(match_summary + timeline_flow)를 토큰 예산 안에 들어가는 JSON 문자열로 줄입니다.
+
+    - match_summary는 항상 전체 포함
+    - 중요 장면(MatchEventDetector) 전후 프레임은 최대한 자세히 유지
+    - 이벤트가 없는 조용한 구간은 샘플링하거나 생략
+    - 플레이어 상태는 대상 플레이어와 맞라이너를 우선 유지
+    - 어떤 경우에도 잘린 문자열이 아닌 올바른 JSON을 반환
+    """
+
+    def __init__(self, processed_context: Dict, target_puuid: Optional[str], key_minutes: List[int]):
+        self.summary = processed_context['match_summary']
+        self.timeline_flow = processed_context['timeline_flow']
+        players = self.summary['players']
+
+        target = next((p for p in players if p.get('puuid') == target_puuid), players[0] if players else None)
+        opponent = find_lane_opponent(players, target) if target else None
+        self.focus_names = [p['championName'] for p in (target, opponent) if p]
+        self.team_of = {p['championName']: p['teamId'] for p in players}
+
+        # 중요 장면 직전~직후 + 마지막 프레임(경기 종료 상황)은 중요 프레임으로 취급
+        self.key_minutes = {m + d for m in key_minutes for d in (-1, 0, 1)}
+        if self.timeline_flow:
+            self.key_minutes.add(self.timeline_flow[-1]['minute'])
+
+    def _team_gold(self, frame: Dict) -> Dict:
+        team_gold = {}
+        for name, status in frame['status_snapshot'].items():
+            team_id = self.team_of.get(name)
+            if team_id is not None:
+                team_gold[team_id] = team_gold.get(team_id, 0) + status['gold']
+        return team_gold
+
+    def _render_frame(self, frame: Dict, detail: str) -> Dict:
+        if detail == "full":
+            return frame
+
+        rendered = {"minute": frame['minute'], "team_gold": self._team_gold(frame)}
+        if detail == "focus":
+            rendered["events"] = frame['events']
+            rendered["status_snapshot"] = {
+                name: {"gold": status['gold'], "level": status['level']}
+                for name, status in frame['status_snapshot'].items() if name in self.focus_names
+            }
+        else:
+            rendered["events"] = light_events(frame['events'])
+        return rendered
+
+    def _frame_kind(self, frame: Dict) -> str:
+        if frame['minute'] in self.key_minutes:
+            return "key"
+        return "eventful" if frame['events'] else "quiet"
+
+    def _render(self, level) -> List[Dict]:
+        key_detail, eventful_detail, quiet_detail, quiet_step = level
+        frames, quiet_index = [], 0
+        for frame in self.timeline_flow:
+            kind = self._frame_kind(frame)
+            if kind == "key":
+                frames.append(self._render_frame(frame, key_detail))
+            elif kind == "eventful":
+                frames.append(self._render_frame(frame, eventful_detail))
+            else:
+                if quiet_detail and quiet_index % quiet_step == 0:
+                    frames.append(self._render_frame(frame, quiet_detail))
+                quiet_index += 1
+        return frames
+
+    def _priority(self, frame: Dict) -> tuple:
+        """예산을 넘을 때 먼저 버릴 프레임일수록 큰 값 (조용한 프레임 > 중요 장면에서 먼 프레임 > 중요 프레임)"""
+        kind = self._frame_kind(frame)
+        distance = min((abs(frame['minute'] - m) for m in self.key_minutes), default=0)
+        return ({"key": 0, "eventful": 1, "quiet": 2}[kind], distance)
+
+    def _context(self, frames: List[Dict], level_index: int) -> Dict:
+        context = {"match_summary": self.summary, "timeline_flow": frames}
+        omitted = len(self.timeline_flow) - len(frames)
+        if level_index > 0 or omitted:
+            context["timeline_note"] = (
+                f"토큰 제한으로 중요 장면 외 구간을 요약함 (전체 {len(self.timeline_flow)}분 중 {omitted}분 생략)"
+            )
+        return context
+
+    def compact(self, budget_tokens: int) -> str:
+        for level_index, level in enumerate(COMPACTION_LEVELS):
+            text = _dumps(self._context(self._render(level), level_index))
+            if estimate_tokens(text) <= budget_tokens:
+                return text
+
+        # 가장 간단한 단계로도 넘치면 우선순위가 낮은 프레임부터 제거
+        last = len(COMPACTION_LEVELS) - 1
+        frames = self._render(COMPACTION_LEVELS[last])
+        by_minute = {f['minute']: f for f in self.timeline_flow}
+        drop_order = sorted(frames, key=lambda f: self._priority(by_minute[f['minute']]), reverse=True)
+        for frame in drop_order:
+            frames.remove(frame)
+            text = _dumps(self._context(frames, last))
+            if estimate_tokens(text) <= budget_tokens:
+                return text
+        return _dumps(self._context(frames, last))
+
+
+def compact_match_context(processed_context: Dict, target_puuid: Optional[str], key_minutes: List[int],
+                          budget_tokens: int) -> str:
+    return MatchContextCompactor(processed_context, target_puuid, key_minutes).compact(budget_tokens)
+
+
+def compact_frames_context(base: Dict, field: str, variants: List[List[Dict]], key_minutes: List[int],
+                           budget_tokens: int) -> str:
+    """
+    sections 모드의 항목별 경기 로그를 토큰 예산 안에 들어가는 JSON 문자열로 줄입니다.
+    - base: 항상 포함할 데이터 (개요/플레이어 목록), field: 프레임 목록을 넣을 키
+    - variants: 같은 프레임을 자세한 순서대로 표현한 후보 목록 (뒤로 갈수록 간단)
+    - 가장 간단한 후보로도 넘치면 조용한 프레임 > 중요 장면에서 먼 프레임 순으로 제거
+    """
+    total = len(variants[0]) if variants else 0
+
+    def dumps(frames: List[Dict], level_index: int) -> str:
+        context = {**base, field: frames}
+        omitted = total - len(frames)
+        if level_index > 0 or omitted:
+            context["timeline_note"] = f"토큰 제한으로 경기 로그를 요약함 (전체 {total}분 중 {omitted}분 생략)"
+        return _dumps(context)
+
+    for level_index, frames in enumerate(variants):
+        text = dumps(frames, level_index)
+        if estimate_tokens(text) <= budget_tokens:
+            return text
+
+    last = len(variants) - 1
+    frames = list(variants[last]) if variants else []
+
+    def priority(frame: Dict) -> tuple:
+        distance = min((abs(frame['minute'] - m) for m in key_minutes), default=0)
+        return (not frame['events'], distance)
+
+    for frame in sorted(frames, key=priority, reverse=True):
+        frames.remove(frame)
+        text = dumps(frames, last)
+        if estimate_tokens(text) <= budget_tokens:
+            return text
+    return dumps(frames, last)
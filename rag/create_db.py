@@ -1,15 +1,27 @@
+import argparse
+import hashlib
+import itertools
 import json
+import multiprocessing
 import os
 import shutil
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
+import chromadb
 from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
-from tqdm import tqdm
 
 # [수정] JSON_DIR_OPGG 추가 임포트
-from .settings import JSON_DIR, JSON_DIR_OPGG, DB_PATH, EMBEDDING_MODEL
+from .settings import (
+    JSON_DIR, JSON_DIR_OPGG, DB_PATH, BM25_INDEX_PATH, DB_MANIFEST_PATH, EMBEDDING_BACKEND, EMBEDDING_MODEL,
+    DB_BUILD_WORKERS,
+)
+from .embeddings import get_embeddings
+from .hybrid_search import BM25Builder
+from .opgg_ingest import build_opgg_documents
+from .embedding_stage import COLLECTION_NAME, EmbeddingStage
+from .retrieval_cache import write_db_version
 
 def clean_source_name(filename_stem):
     """
@@ -19,117 +31,273 @@ def clean_source_name(filename_stem):
     name = name.replace("(리그-오브-레전드)", "")
     return name.strip()
 
-def create_vector_db():
-    # 1. 처리할 데이터 폴더 목록 정의
-    # 나무위키 데이터 경로와 OP.GG 데이터 경로를 리스트로 관리
-    source_dirs = [
-        {"path": JSON_DIR, "category": "namuwiki"},
-        {"path": JSON_DIR_OPGG, "category": "opgg"}
-    ]
-    
-    all_files = []
-    
+def chunk_id(doc: Document) -> str:
+    """청크 ID: 원본 파일명 + 청크 본문 해시 (같은 내용이면 다시 만들어도 같은 ID)"""
+    key = f"{doc.metadata.get('filename', '')}\x00{doc.page_content}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+def load_manifest():
+    """이전 구축 때 저장한 청크 목록 (없으면 None)"""
+    if not DB_MANIFEST_PATH.exists():
+        return None
+    with open(DB_MANIFEST_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(chunks):
+    """chunks: {청크 ID: 원본 파일명}"""
+    manifest = {"embedding_model": EMBEDDING_MODEL, "chunks": chunks}
+    with open(DB_MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+# 청크 분할 기준 (OP.GG 레코드 문서도 이 크기 이하로 미리 묶음)
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# 처리할 데이터 폴더 목록
+# 나무위키 데이터 경로와 OP.GG 데이터 경로를 리스트로 관리
+SOURCE_DIRS = [
+    {"path": JSON_DIR, "category": "namuwiki"},
+    {"path": JSON_DIR_OPGG, "category": "opgg"}
+]
+
+def discover_files() -> Iterator[Tuple[Path, str]]:
+    """1단계: 처리할 (파일 경로, 카테고리)를 폴더별로 하나씩 생성"""
     print("📂 데이터 폴더를 확인합니다...")
-    for source in source_dirs:
+    for source in SOURCE_DIRS:
         dir_path = source["path"]
         category = source["category"]
-        
+
         if os.path.exists(dir_path):
-            files = list(dir_path.glob("*.json"))
+            files = sorted(dir_path.glob("*.json"))
             print(f"   - [{category}] {len(files)}개의 파일을 발견했습니다. ({dir_path})")
-            # 파일 경로와 카테고리를 함께 저장
             for f in files:
-                all_files.append({"file_path": f, "category": category})
+                yield f, category
         else:
             print(f"   ⚠️ [{category}] 폴더가 없습니다: {dir_path}")
 
-    if not all_files:
+def load_documents(file_path: Path, category: str) -> List[Document]:
+    """2단계: JSON 파일 하나를 Document 목록으로 변환"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    clean_name = clean_source_name(file_path.stem)
+    documents = []
+
+    # 데이터 구조 처리
+    # Case A: "sections" 키가 있는 경우 (나무위키 구조 등)
+    if "sections" in data:
+        for section in data["sections"]:
+            heading = section.get("heading", "")
+            text = section.get("text", "")
+
+            if not text.strip(): continue
+
+            # 내용 구성: [카테고리:챔피언명] 소제목 + 내용
+            content = f"[{category.upper()} | {clean_name}] {heading}\n{text}"
+            metadata = {
+                "source": clean_name,
+                "category": category, # namuwiki 또는 opgg
+                "heading": heading,
+                "filename": file_path.name
+            }
+            documents.append(Document(page_content=content, metadata=metadata))
+
+    # Case B: OP.GG 데이터 -> 챔피언/포지션별 빌드·룬·상대 전적 레코드 문서 (통계는 메타데이터로)
+    elif category == "opgg" and (records := build_opgg_documents(data, clean_name, file_path.name, CHUNK_SIZE)):
+        documents.extend(records)
+
+    # Case C: 그 밖의 구조 (레코드를 찾지 못한 경우 포함)
+    # 여기서는 텍스트로 변환 가능한 경우 전체를 하나의 문서로 봅니다.
+    else:
+        text_content = json.dumps(data, ensure_ascii=False, indent=2)
+        content = f"[{category.upper()} | {clean_name}] 전체 데이터\n{text_content}"
+        metadata = {
+            "source": clean_name,
+            "category": category,
+            "heading": "Full Data",
+            "filename": file_path.name
+        }
+        documents.append(Document(page_content=content, metadata=metadata))
+
+    return documents
+
+# 워커 프로세스마다 한 번만 생성
+_text_splitter = None
+
+def parse_and_split(file_path: Path, category: str) -> Optional[List[Tuple[str, Document]]]:
+    """
+    2~3단계: 파일 하나를 읽어 청크 (청크 ID, Document) 목록으로 반환 (프로세스 풀에서 실행)
+    파일 단위로 처리하므로 한 번에 메모리에 올라가는 것은 처리 중인 파일들의 청크뿐입니다.
+    읽기/파싱에 실패하면 None (내용이 빈 파일과 구분해서, 증분 구축 때 기존 청크를 지우지 않도록)
+    """
+    global _text_splitter
+    if _text_splitter is None:
+        _text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
+            separators=["\n\n", "\n", ". ", " ", ""]
+        )
+    try:
+        documents = load_documents(file_path, category)
+    except Exception as e:
+        print(f"⚠️ 파일 로드 실패 ({file_path.name}): {e}")
+        return None
+    return [(chunk_id(doc), doc) for doc in _text_splitter.split_documents(documents)]
+
+def iter_file_chunks(files: Iterable[Tuple[Path, str]],
+                     workers: int = DB_BUILD_WORKERS) -> Iterator[Tuple[str, Optional[List[Tuple[str, Document]]]]]:
+    """
+    파싱/분할 단계를 프로세스 풀에서 실행하고, 끝난 파일부터 (파일명, 청크 목록 또는 실패 시 None)을 바로 내보냅니다.
+    - 동시에 처리 중인 파일은 workers * 2개로 제한 (아래 단계가 느리면 파싱도 기다리므로 메모리가 일정)
+    - 청크 순서는 파일 처리 순서에 따라 달라질 수 있음 (청크 ID는 내용 기준이라 결과는 같음)
+    - 워커는 spawn으로 시작 (임베딩 스레드 / Chroma 클라이언트가 있는 상태에서 fork하지 않도록)
+    """
+    if workers <= 1:
+        for file_path, category in files:
+            yield file_path.name, parse_and_split(file_path, category)
+        return
+
+    def finished(done):
+        for future in done:
+            name = pending.pop(future)
+            try:
+                yield name, future.result()
+            except Exception as e:
+                print(f"⚠️ 파일 처리 실패 ({name}): {e}")
+                yield name, None
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        pending = {}
+        for file_path, category in files:
+            while len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from finished(done)
+            pending[executor.submit(parse_and_split, file_path, category)] = file_path.name
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from finished(done)
+
+def plan_removals(previous: Dict[str, str], current: Dict[str, str],
+                  failed_files: Set[str]) -> Tuple[Dict[str, str], List[str]]:
+    """
+    증분 구축의 삭제 대상 계산.
+    - previous / current: {청크 ID: 파일명} (이전 manifest / 이번 실행에서 나온 청크)
+    - failed_files: 이번 실행에서 읽기/파싱에 실패한 파일명
+    반환: (실패한 파일이라 이전 청크를 그대로 유지할 {청크 ID: 파일명}, 삭제할 청크 ID 목록)
+    """
+    carried = {
+        doc_id: name for doc_id, name in previous.items()
+        if name in failed_files and doc_id not in current
+    }
+    removed = sorted(doc_id for doc_id in previous if doc_id not in current and doc_id not in carried)
+    return carried, removed
+
+def create_vector_db(full: bool = False, workers: int = DB_BUILD_WORKERS):
+    """
+    벡터 DB 구축.
+    기본은 증분 모드: 이전 manifest와 비교해 새로 생기거나 바뀐 청크만 임베딩하고, 사라진 청크는 삭제합니다.
+    full=True 이거나 manifest가 없거나 임베딩 모델이 바뀌었으면 전체를 새로 만듭니다.
+
+    파일 탐색 -> 파싱/분할(프로세스 풀) -> 임베딩이 스트리밍으로 이어지므로,
+    임베딩은 첫 청크가 나오자마자 시작되고 전체 문서를 메모리에 모아두지 않습니다.
+    (끝까지 보관하는 것은 청크 ID/파일명과 BM25 역색인뿐)
+    """
+    # 1. 파일 탐색 (처리할 파일이 하나도 없으면 기존 DB를 건드리지 않음)
+    files = discover_files()
+    first = next(files, None)
+    if first is None:
         print("❌ 처리할 JSON 파일이 하나도 없습니다.")
         return
+    stats = {"files": 0, "added": 0}
+
+    def counted(items):
+        for item in items:
+            stats["files"] += 1
+            yield item
 
-    # 2. 기존 DB 삭제 (모델 변경/데이터 갱신 시 필수)
-    if os.path.exists(DB_PATH):
+    files = counted(itertools.chain([first], files))
+
+    # 2. 전체 재구축 여부 결정 (임베딩 모델이 바뀌면 기존 벡터와 섞을 수 없으므로 전체 재구축)
+    manifest = load_manifest()
+    rebuild = (
+        full
+        or manifest is None
+        or manifest.get("embedding_model") != EMBEDDING_MODEL
+        or not os.path.exists(DB_PATH)
+    )
+    if rebuild and os.path.exists(DB_PATH):
         print(f"🗑️ 기존 DB 폴더를 삭제하고 새로 만듭니다: {DB_PATH}")
         shutil.rmtree(DB_PATH)
-    
-    documents = []
-    print(f"🚀 총 {len(all_files)}개의 파일을 처리합니다...")
-
-    # 3. 파일 로드 및 문서 생성
-    for item in tqdm(all_files):
-        file_path = item["file_path"]
-        category = item["category"]
-        
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                clean_name = clean_source_name(file_path.stem)
-                
-                # 데이터 구조 처리
-                # Case A: "sections" 키가 있는 경우 (나무위키 구조 등)
-                if "sections" in data:
-                    for section in data["sections"]:
-                        heading = section.get("heading", "")
-                        text = section.get("text", "")
-                        
-                        if not text.strip(): continue
-                        
-                        # 내용 구성: [카테고리:챔피언명] 소제목 + 내용
-                        content = f"[{category.upper()} | {clean_name}] {heading}\n{text}"
-                        metadata = {
-                            "source": clean_name,
-                            "category": category, # namuwiki 또는 opgg
-                            "heading": heading,
-                            "filename": file_path.name
-                        }
-                        documents.append(Document(page_content=content, metadata=metadata))
-                
-                # Case B: "sections"가 없고 바로 데이터가 있는 경우 (OP.GG 단순 데이터 등)
-                # 만약 OP.GG 데이터 구조가 다르다면 이 부분을 커스텀해야 합니다.
-                # 여기서는 텍스트로 변환 가능한 경우 전체를 하나의 문서로 봅니다.
-                else:
-                    text_content = json.dumps(data, ensure_ascii=False, indent=2)
-                    content = f"[{category.upper()} | {clean_name}] 전체 데이터\n{text_content}"
-                    metadata = {
-                        "source": clean_name,
-                        "category": category,
-                        "heading": "Full Data",
-                        "filename": file_path.name
-                    }
-                    documents.append(Document(page_content=content, metadata=metadata))
-
-        except Exception as e:
-            print(f"⚠️ 파일 로드 실패 ({file_path.name}): {e}")
-
-    if not documents:
+    previous = {} if rebuild else manifest.get("chunks", {})
+
+    # 임베딩은 직접 계산해서 넣으므로 컬렉션에는 임베딩 함수를 지정하지 않음 (서버는 langchain Chroma로 읽음)
+    client = chromadb.PersistentClient(path=str(DB_PATH))
+    collection = client.get_or_create_collection(COLLECTION_NAME, embedding_function=None)
+
+    # 3. 청크 스트림: 모든 청크는 manifest / BM25에 기록하고, 이전 DB에 없는 청크만 임베딩 단계로 넘김
+    chunks = {}  # 청크 ID -> 원본 파일명
+    failed_files = set()
+    bm25 = BM25Builder()
+
+    def new_chunks():
+        for filename, file_chunks in iter_file_chunks(files, workers):
+            if file_chunks is None:
+                failed_files.add(filename)
+                continue
+            for doc_id, doc in file_chunks:
+                # 같은 파일 안에서 내용이 완전히 같은 청크는 하나만 유지 (ID 중복 방지)
+                if doc_id in chunks:
+                    continue
+                chunks[doc_id] = doc.metadata.get("filename", "")
+                bm25.add(doc_id, doc.metadata["source"], doc.page_content)
+                if doc_id not in previous:
+                    stats["added"] += 1
+                    yield doc_id, doc
+
+    mode = "전체 구축" if rebuild else "증분 구축"
+    print(f"🚀 {mode}: 파싱/분할 워커 {workers}개, {EMBEDDING_BACKEND} 임베딩({EMBEDDING_MODEL})")
+    EmbeddingStage(get_embeddings(), EMBEDDING_MODEL, collection).run(new_chunks())
+
+    # 4. 사라진 청크 삭제 (전체 청크 ID는 스트림이 끝나야 알 수 있음)
+    # 읽기에 실패한 파일의 기존 청크는 삭제하지 않고 그대로 유지 (다음 실행에서 다시 시도)
+    carried, removed = plan_removals(previous, chunks, failed_files)
+    if failed_files:
+        print(f"⚠️ {len(failed_files)}개 파일 로드 실패: 기존 청크 {len(carried)}개를 그대로 유지합니다.")
+    if carried:
+        found = collection.get(ids=list(carried), include=["documents", "metadatas"])
+        for doc_id, text, metadata in zip(found["ids"], found["documents"], found["metadatas"]):
+            bm25.add(doc_id, (metadata or {}).get("source", ""), text)
+            chunks[doc_id] = carried[doc_id]
+
+    if not chunks:
         print("❌ 생성된 문서(Documents)가 없습니다.")
         return
 
-    # 4. 텍스트 분할
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        separators=["\n\n", "\n", ". ", " ", ""]
-    )
-    splits = text_splitter.split_documents(documents)
-    print(f"✂️ {len(splits)}개의 청크로 분할했습니다.")
-    
-    # 5. 임베딩 및 DB 저장 (OpenAI)
-    print(f"⏳ OpenAI 임베딩({EMBEDDING_MODEL})으로 DB 구축 중...")
-    
-    embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
-    
-    Chroma.from_documents(
-        documents=splits,
-        embedding=embeddings,
-        persist_directory=str(DB_PATH)
-    )
-    
+    if removed:
+        collection.delete(ids=removed)
+    if not rebuild:
+        kept = len(chunks) - stats["added"]
+        print(f"🔁 증분 구축: 추가/변경 {stats['added']}개, 삭제 {len(removed)}개, 유지 {kept}개")
+        if not stats["added"] and not removed:
+            print("✅ 변경된 청크가 없습니다. DB가 최신 상태입니다.")
+            return
+
+    # 5. BM25 키워드 인덱스 (하이브리드 검색용)
+    print("🔤 BM25 키워드 인덱스 저장 중...")
+    bm25.build().save(BM25_INDEX_PATH)
+    # 다음 증분 구축의 기준 (중간에 실패하면 저장되지 않으므로 다음 실행에서 다시 시도)
+    save_manifest(chunks)
+    # 서버의 검색 결과 캐시가 이전 DB 기준 결과를 쓰지 않도록 버전 갱신
+    write_db_version()
+
     print("-" * 50)
     print(f"🎉 DB 구축 완료! 저장 경로: {DB_PATH}")
-    print(f"   - 총 처리 파일: {len(all_files)}개")
-    print(f"   - 총 청크 수: {len(splits)}개")
+    print(f"   - 총 처리 파일: {stats['files']}개")
+    print(f"   - 총 청크 수: {len(chunks)}개")
     print("-" * 50)
 
 if __name__ == "__main__":
-    create_vector_db()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Vector DB 구축 (기본: 변경된 청크만 증분 반영)")
+    parser.add_argument("--full", action="store_true", help="기존 DB를 삭제하고 전체를 다시 임베딩")
+    parser.add_argument("--workers", type=int, default=DB_BUILD_WORKERS, help="파싱/분할 프로세스 수")
+    args = parser.parse_args()
+    create_vector_db(full=args.full, workers=args.workers)
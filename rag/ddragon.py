@@ -0,0 +1,219 @@
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+from .settings import DDRAGON_DIR, DDRAGON_VERSION_CHECK_HOURS
+
+VERSIONS_URL = "https://ddragon.leagueoflegends.com/api/versions.json"
+CDN_URL = "https://ddragon.leagueoflegends.com/cdn"
+REQUEST_TIMEOUT = 30
+
+# 조회 테이블 파일 형식이 바뀌면 올려서 기존 캐시를 다시 만들도록 함
+TABLE_FORMAT = 2
+# 조회 테이블 생성에 실패한 버전은 이 시간(초) 동안 다시 내려받지 않고 로컬 캐시 사용
+BUILD_RETRY_SECONDS = 600
+
+_lock = threading.Lock()
+_tables: Dict[str, Dict] = {}
+_latest: Dict = {"version": None, "checked_at": 0.0}
+_build_failed: Dict[str, float] = {}
+
+
+def _version_file():
+    return DDRAGON_DIR / "version.json"
+
+
+def _table_file(version: str):
+    return DDRAGON_DIR / version / f"lookup_v{TABLE_FORMAT}.json"
+
+
+def _cached_versions():
+    """로컬에 조회 테이블이 만들어져 있는 버전 목록 (최신순)"""
+    if not DDRAGON_DIR.exists():
+        return []
+    versions = [p.parent.name for p in DDRAGON_DIR.glob(f"*/lookup_v{TABLE_FORMAT}.json")]
+    return sorted(versions, key=lambda v: [int(x) if x.isdigit() else 0 for x in v.split(".")], reverse=True)
+
+
+def get_latest_version() -> Optional[str]:
+    """
+    최신 Data Dragon 버전.
+    versions.json은 DDRAGON_VERSION_CHECK_HOURS 마다 한 번만 확인하고,
+    네트워크를 쓸 수 없으면 로컬에 캐시된 가장 최신 버전을 사용합니다.
+    """
+    ttl = DDRAGON_VERSION_CHECK_HOURS * 3600
+    if _latest["version"] and time.time() - _latest["checked_at"] < ttl:
+        return _latest["version"]
+
+    version_file = _version_file()
+    if version_file.exists():
+        with open(version_file, "r", encoding="utf-8") as f:
+            record = json.load(f)
+        if time.time() - record.get("checked_at", 0) < ttl:
+            _latest.update(record)
+            return record["version"]
+
+    try:
+        version = requests.get(VERSIONS_URL, timeout=REQUEST_TIMEOUT).json()[0]
+    except Exception as e:
+        cached = _cached_versions()
+        print(f"⚠️ Data Dragon 버전 확인 실패 ({e}). 로컬 캐시 사용: {cached[0] if cached else '없음'}")
+        if not cached:
+            return None
+        # 오프라인일 때 매 요청마다 재시도하지 않도록 다음 확인 주기까지 캐시 버전 사용
+        _latest.update({"version": cached[0], "checked_at": time.time()})
+        return cached[0]
+
+    record = {"version": version, "checked_at": time.time()}
+    DDRAGON_DIR.mkdir(parents=True, exist_ok=True)
+    with open(version_file, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+    _latest.update(record)
+    return version
+
+
+def _fetch(version: str, locale: str, name: str) -> Dict:
+    url = f"{CDN_URL}/{version}/data/{locale}/{name}.json"
+    return requests.get(url, timeout=REQUEST_TIMEOUT).json()["data"]
+
+
+def build_tables(version: str) -> Dict:
+    """
+    championFull / item (en_US, ko_KR)을 내려받아 필요한 이름만 담은 조회 테이블로 변환합니다.
+    - champions: 챔피언 ID(matchDto의 championName) -> {"en", "ko", "skills": [[영문 스킬명, 한글 스킬명], ...]}
+      (skills 순서: 패시브, Q, W, E, R)
+    - items: 아이템 ID(문자열) -> {"en", "ko"}
+    """
+    print(f"📥 Data Dragon {version} 조회 테이블 생성 중...")
+    champs_en = _fetch(version, "en_US", "championFull")
+    champs_ko = _fetch(version, "ko_KR", "championFull")
+
+    champions = {}
+    for champ_id, champ_en in champs_en.items():
+        champ_ko = champs_ko[champ_id]
+        skills = [[champ_en["passive"]["name"], champ_ko["passive"]["name"]]]
+        # spells 리스트 순서: Q(0), W(1), E(2), R(3)
+        for spell_en, spell_ko in zip(champ_en["spells"], champ_ko["spells"]):
+            skills.append([spell_en["name"], spell_ko["name"]])
+        champions[champ_id] = {"en": champ_en["name"], "ko": champ_ko["name"], "skills": skills}
+
+    items_en = _fetch(version, "en_US", "item")
+    items_ko = _fetch(version, "ko_KR", "item")
+    items = {
+        item_id: {"en": item["name"], "ko": items_ko.get(item_id, item)["name"]}
+        for item_id, item in items_en.items()
+    }
+
+    return {"version": version, "champions": champions, "items": items}
+
+
+EMPTY_TABLES = {"version": None, "champions": {}, "items": {}}
+
+
+def _read_table_locked(version: str) -> Dict:
+    if version not in _tables:
+        with open(_table_file(version), "r", encoding="utf-8") as f:
+            _tables[version] = json.load(f)
+    return _tables[version]
+
+
+def _fallback_tables_locked() -> Dict:
+    """로컬에 만들어 둔 가장 최신 버전의 조회 테이블 (없으면 빈 테이블)"""
+    cached = _cached_versions()
+    return _read_table_locked(cached[0]) if cached else EMPTY_TABLES
+
+
+def load_tables(version: Optional[str] = None) -> Dict:
+    """
+    조회 테이블을 반환합니다. (최초 호출 시에만 로드)
+    로컬 캐시(DDRAGON_DIR/{version}/)에 있으면 파일에서 읽고, 없으면 내려받아 저장합니다.
+    내려받기에 실패하면 (네트워크 오류, 아직 일부만 배포된 새 버전 등) 로컬에 있는 가장 최신 테이블을 사용하고,
+    BUILD_RETRY_SECONDS 뒤에 다시 시도합니다.
+    """
+    version = version or get_latest_version()
+    if version is None:
+        print("⚠️ Data Dragon 데이터를 사용할 수 없습니다. (오프라인 + 로컬 캐시 없음)")
+        return EMPTY_TABLES
+
+    if version in _tables:
+        return _tables[version]
+
+    with _lock:
+        if version in _tables:
+            return _tables[version]
+
+        table_file = _table_file(version)
+        if table_file.exists():
+            return _read_table_locked(version)
+
+        if time.time() - _build_failed.get(version, 0.0) < BUILD_RETRY_SECONDS:
+            return _fallback_tables_locked()
+        try:
+            tables = build_tables(version)
+        except Exception as e:
+            _build_failed[version] = time.time()
+            fallback = _fallback_tables_locked()
+            print(f"⚠️ Data Dragon {version} 조회 테이블 생성 실패 ({e}). 로컬 캐시 사용: {fallback['version'] or '없음'}")
+            return fallback
+
+        table_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(table_file, "w", encoding="utf-8") as f:
+            json.dump(tables, f, ensure_ascii=False, separators=(",", ":"))
+        _build_failed.pop(version, None)
+        _tables[version] = tables
+        return tables
+
+
+SKILL_SLOTS = ("P", "Q", "W", "E", "R")
+
+
+def build_match_dictionaries(champion_ids, item_ids) -> Dict[str, Dict]:
+    """
+    한 매치에 필요한 번역 사전만 잘라냅니다. (프롬프트에 전체 사전을 넣지 않기 위함)
+    - champion_ids: matchDto의 championName 목록 (예: "MonkeyKing")
+    - item_ids: 참가자 items 목록에 나온 아이템 ID (0은 빈 슬롯)
+
+    반환:
+    - skills: {챔피언 ID: {"P"|"Q"|"W"|"E"|"R": "한글 스킬명 (영문 스킬명)"}}
+    - champions: {챔피언 ID 또는 영문 이름: 한글 이름}
+    - items: {아이템 ID(문자열): 한글 아이템 이름}
+    """
+    tables = load_tables()
+    skills, champions, items = {}, {}, {}
+
+    for champ_id in dict.fromkeys(champion_ids):
+        champ = tables["champions"].get(champ_id)
+        if not champ:
+            continue
+        champions[champ_id] = champ["ko"]
+        champions[champ["en"]] = champ["ko"]
+        skills[champ_id] = {
+            slot: f"{ko} ({en})" for slot, (en, ko) in zip(SKILL_SLOTS, champ["skills"])
+        }
+
+    for item_id in item_ids:
+        if not item_id:
+            continue
+        item = tables["items"].get(str(item_id))
+        if item:
+            items[str(item_id)] = item["ko"]
+
+    return {"skills": skills, "champions": champions, "items": items}
+
+
+def champion_aliases(champion_ids) -> List[str]:
+    """
+    챔피언 ID(matchDto의 championName)별로 문서 source로 쓰일 수 있는 이름 (ID, 영문, 한글) 목록.
+    벡터 DB의 source 메타데이터 필터에 사용합니다.
+    """
+    tables = load_tables()
+    aliases = []
+    for champ_id in dict.fromkeys(champion_ids):
+        aliases.append(champ_id)
+        champ = tables["champions"].get(champ_id)
+        if champ:
+            aliases.extend([champ["en"], champ["ko"]])
+    return list(dict.fromkeys(aliases))
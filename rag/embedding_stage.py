@@ -0,0 +1,149 @@
+import hashlib
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from tqdm import tqdm
+
+from services.disk_cache import DiskCache
+from .settings import (
+    EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_MB, EMBEDDING_BATCH_SIZE, EMBEDDING_CONCURRENCY, EMBEDDING_MAX_RETRIES,
+)
+
+# langchain_chroma 기본 컬렉션 이름 (서버의 Chroma(persist_directory=...)가 그대로 읽음)
+COLLECTION_NAME = "langchain"
+# Chroma upsert 한 번에 넣는 최대 청크 수
+UPSERT_BATCH_SIZE = 1000
+
+
+@lru_cache(maxsize=None)
+def get_embedding_cache() -> DiskCache:
+    """
+    (임베딩 모델, 청크 본문 해시) -> 임베딩 벡터 캐시 (import 시점이 아니라 처음 쓸 때 파일을 엶)
+    DB 폴더 밖에 두어 전체 재구축(--full) 때도 재사용, 용량을 넘으면 오래 안 쓴 벡터부터 제거
+    """
+    return DiskCache(EMBEDDING_CACHE_PATH, "chunk_embeddings", max_bytes=EMBEDDING_CACHE_MAX_MB * 1024 * 1024)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStage:
+    """
+    DB 구축용 임베딩 단계.
+    - 청크를 EMBEDDING_BATCH_SIZE개씩 묶어 최대 EMBEDDING_CONCURRENCY개 배치를 동시에 임베딩
+    - 배치 단위 재시도 (지수 백오프, EMBEDDING_MAX_RETRIES회)
+    - 끝난 배치는 바로 임베딩 캐시와 Chroma 컬렉션에 저장하므로, 중간에 실패해도 다시 실행하면 남은 청크만 임베딩
+    - 같은 모델 + 같은 본문은 파일/재구축과 관계없이 다시 임베딩하지 않음
+    (cache를 주지 않으면 EMBEDDING_CACHE_PATH의 임베딩 캐시 사용)
+    """
+
+    def __init__(self, embeddings, model: str, collection,
+                 batch_size: int = EMBEDDING_BATCH_SIZE,
+                 concurrency: int = EMBEDDING_CONCURRENCY,
+                 max_retries: int = EMBEDDING_MAX_RETRIES,
+                 cache: Optional[DiskCache] = None):
+        self.embeddings = embeddings
+        self.model = model
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.cache = cache if cache is not None else get_embedding_cache()
+        self.stats = {"cached": 0, "embedded": 0, "failed": 0}
+
+    def _cache_key(self, text: str) -> str:
+        return f"{self.model}:{content_hash(text)}"
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = min(60, 2 ** attempt)
+                print(f"⚠️ 임베딩 배치 실패 ({e}), {delay}초 후 재시도 ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+
+    def _upsert(self, rows: List[Tuple[str, Document, List[float]]]):
+        for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+            part = rows[i:i + UPSERT_BATCH_SIZE]
+            self.collection.upsert(
+                ids=[chunk_id for chunk_id, _, _ in part],
+                embeddings=[vector for _, _, vector in part],
+                documents=[doc.page_content for _, doc, _ in part],
+                metadatas=[doc.metadata for _, doc, _ in part],
+            )
+
+    def run(self, chunks: Iterable[Tuple[str, Document]]):
+        """
+        chunks: (청크 ID, Document) — 리스트가 아니어도 되며 들어오는 대로 처리합니다.
+        모든 배치를 시도한 뒤 실패한 배치가 있으면 RuntimeError (성공한 배치는 이미 저장됨)
+        """
+        cached_rows: List[Tuple[str, Document, List[float]]] = []
+        batch: List[Tuple[str, Document]] = []
+        pending: Dict = {}
+        errors = []
+        progress = tqdm(desc="임베딩", unit="chunk")
+
+        def collect(done):
+            for future in done:
+                rows = pending.pop(future)
+                try:
+                    vectors = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    self.stats["failed"] += len(rows)
+                    continue
+                # 배치 하나를 한 트랜잭션으로 저장
+                self.cache.set_many({
+                    self._cache_key(doc.page_content): vector for (_, doc), vector in zip(rows, vectors)
+                })
+                self._upsert([(chunk_id, doc, vector) for (chunk_id, doc), vector in zip(rows, vectors)])
+                self.stats["embedded"] += len(rows)
+                progress.update(len(rows))
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            def submit(rows):
+                # 동시에 진행 중인 배치 수 제한
+                while len(pending) >= self.concurrency:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                future = executor.submit(self._embed_batch, [doc.page_content for _, doc in rows])
+                pending[future] = rows
+
+            for chunk_id, doc in chunks:
+                vector = self.cache.get(self._cache_key(doc.page_content))
+                if vector is not None:
+                    cached_rows.append((chunk_id, doc, vector))
+                    if len(cached_rows) >= UPSERT_BATCH_SIZE:
+                        self._upsert(cached_rows)
+                        self.stats["cached"] += len(cached_rows)
+                        progress.update(len(cached_rows))
+                        cached_rows = []
+                    continue
+
+                batch.append((chunk_id, doc))
+                if len(batch) >= self.batch_size:
+                    submit(batch)
+                    batch = []
+
+            if batch:
+                submit(batch)
+            if cached_rows:
+                self._upsert(cached_rows)
+                self.stats["cached"] += len(cached_rows)
+                progress.update(len(cached_rows))
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        progress.close()
+        print(f"🧮 임베딩 완료: 새로 임베딩 {self.stats['embedded']}개, 캐시 재사용 {self.stats['cached']}개, "
+              f"실패 {self.stats['failed']}개")
+        if errors:
+            raise RuntimeError(f"{len(errors)}개 임베딩 배치 실패 (성공한 배치는 저장됨, 다시 실행하면 이어서 진행): {errors[0]}")
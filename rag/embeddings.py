@@ -0,0 +1,74 @@
+from functools import cached_property
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from .settings import (
+    EMBEDDING_BACKEND, EMBEDDING_MODEL, LOCAL_EMBEDDING_BATCH_SIZE, LOCAL_EMBEDDING_THREADS,
+)
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """sentence-transformers 모델을 CPU에서 실행하는 Embeddings (모델은 첫 호출 때 로드)"""
+
+    def __init__(self, model_name: str, batch_size: int = LOCAL_EMBEDDING_BATCH_SIZE,
+                 threads: int = LOCAL_EMBEDDING_THREADS):
+        self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.threads = threads
+
+    @cached_property
+    def model(self):
+        # sentence-transformers / torch는 이 백엔드를 쓸 때만 필요
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if self.threads > 0:
+            torch.set_num_threads(self.threads)
+        print(f"📥 로컬 임베딩 모델 로드: {self.model_name}")
+        return SentenceTransformer(self.model_name, device="cpu")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(
+            texts, batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class OnnxMiniLMEmbeddings(Embeddings):
+    """
+    chromadb에 포함된 ONNX all-MiniLM-L6-v2 (onnxruntime만으로 실행, 모델 파일은 첫 호출 때 내려받아 캐시)
+    chromadb의 공개 임베딩 함수 호출만 사용하므로 CPU 스레드 수는 onnxruntime 기본값을 따릅니다.
+    """
+
+    def __init__(self, batch_size: int = LOCAL_EMBEDDING_BATCH_SIZE):
+        self.batch_size = max(1, batch_size)
+
+    @cached_property
+    def model(self):
+        from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+
+        return ONNXMiniLM_L6_V2(preferred_providers=["CPUExecutionProvider"])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for i in range(0, len(texts), self.batch_size):
+            vectors.extend(vector.tolist() for vector in self.model(texts[i:i + self.batch_size]))
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def get_embeddings() -> Embeddings:
+    """settings.EMBEDDING_BACKEND에 맞는 임베딩 모델 (create_db와 RAGService가 같은 백엔드를 쓰도록 여기서만 생성)"""
+    if EMBEDDING_BACKEND == "sentence-transformers":
+        return SentenceTransformerEmbeddings(EMBEDDING_MODEL)
+    if EMBEDDING_BACKEND == "onnx":
+        return OnnxMiniLMEmbeddings()
+    return OpenAIEmbeddings(model=EMBEDDING_MODEL)
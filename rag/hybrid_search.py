@@ -0,0 +1,156 @@
+import re
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 영문/숫자 단어, 한글 연속 구간
+_TOKEN_RE = re.compile(r"[0-9a-z]+|[가-힣]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    형태소 분석기 없이 쓰는 간단한 토크나이저.
+    영문/숫자는 단어 단위, 한글은 음절 bigram 단위 (조사가 붙어도 어간 bigram이 겹치도록)
+    """
+    tokens = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        if word.isascii() or len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+class BM25Index:
+    """
+    청크 본문에 대한 BM25 키워드 인덱스 (create_db에서 생성, 서버에서는 읽기 전용)
+    역색인을 CSR 형태의 numpy 배열로 보관합니다.
+    - terms[t]의 문서 목록: postings_doc[indptr[t]:indptr[t + 1]] (빈도는 postings_tf)
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, doc_ids, sources, doc_len, terms, indptr, postings_doc, postings_tf):
+        self.doc_ids = doc_ids
+        self.sources = sources
+        self.doc_len = doc_len
+        self.terms = terms
+        self.indptr = indptr
+        self.postings_doc = postings_doc
+        self.postings_tf = postings_tf
+        self.avg_len = float(doc_len.mean()) if len(doc_len) else 0.0
+
+    @classmethod
+    def build(cls, docs: Iterable[Tuple[str, str, str]]) -> "BM25Index":
+        """docs: (청크 ID, source, 본문)"""
+        builder = BM25Builder()
+        for doc_id, source, text in docs:
+            builder.add(doc_id, source, text)
+        return builder.build()
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # np.savez_compressed는 확장자가 없으면 .npz를 붙이므로 파일 객체로 저장
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f, doc_ids=self.doc_ids, sources=self.sources, doc_len=self.doc_len, terms=self.terms,
+                indptr=self.indptr, postings_doc=self.postings_doc, postings_tf=self.postings_tf,
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["BM25Index"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in data.files})
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def search(self, query: str, k: int, sources: Optional[Sequence[str]] = None) -> List[Tuple[str, float]]:
+        """(청크 ID, 점수) 상위 k개. sources를 주면 해당 source의 청크만 대상"""
+        n_docs = len(self.doc_ids)
+        if n_docs == 0:
+            return []
+        scores = np.zeros(n_docs, dtype=np.float64)
+        norm = self.K1 * (1 - self.B + self.B * self.doc_len / max(self.avg_len, 1e-9))
+
+        for term in set(tokenize(query)):
+            t = np.searchsorted(self.terms, term)
+            if t >= len(self.terms) or self.terms[t] != term:
+                continue
+            docs = self.postings_doc[self.indptr[t]:self.indptr[t + 1]]
+            tf = self.postings_tf[self.indptr[t]:self.indptr[t + 1]]
+            idf = np.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tf * (self.K1 + 1) / (tf + norm[docs])
+
+        if sources is not None:
+            scores[~np.isin(self.sources, list(sources))] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        top = candidates[np.argsort(-scores[candidates], kind="stable")[:k]]
+        return [(str(self.doc_ids[i]), float(scores[i])) for i in top]
+
+
+class BM25Builder:
+    """
+    청크를 하나씩 받아 BM25Index를 만드는 빌더 (create_db 파이프라인에서 청크가 나오는 대로 추가)
+    본문은 보관하지 않고, 역색인은 단어별 array('i')로 모아 청크 수가 늘어도 메모리를 적게 씁니다.
+    """
+
+    def __init__(self):
+        self.doc_ids: List[str] = []
+        self.sources: List[str] = []
+        self.doc_len = array("i")
+        self.postings: Dict[str, Tuple[array, array]] = {}
+
+    def add(self, doc_id: str, source: str, text: str):
+        doc_index = len(self.doc_ids)
+        counts = Counter(tokenize(text))
+        self.doc_ids.append(doc_id)
+        self.sources.append(source)
+        self.doc_len.append(sum(counts.values()))
+        for term, tf in counts.items():
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = (array("i"), array("i"))
+            entry[0].append(doc_index)
+            entry[1].append(tf)
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def build(self) -> BM25Index:
+        terms = sorted(self.postings)
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        for i, term in enumerate(terms):
+            indptr[i + 1] = indptr[i] + len(self.postings[term][0])
+        postings_doc = np.empty(indptr[-1], dtype=np.int32)
+        postings_tf = np.empty(indptr[-1], dtype=np.int32)
+        for i, term in enumerate(terms):
+            docs, tfs = self.postings[term]
+            postings_doc[indptr[i]:indptr[i + 1]] = np.frombuffer(docs, dtype=np.int32)
+            postings_tf[indptr[i]:indptr[i + 1]] = np.frombuffer(tfs, dtype=np.int32)
+        return BM25Index(
+            doc_ids=np.asarray(self.doc_ids, dtype=str),
+            sources=np.asarray(self.sources, dtype=str),
+            doc_len=np.asarray(self.doc_len, dtype=np.int32),
+            terms=np.asarray(terms, dtype=str),
+            indptr=indptr,
+            postings_doc=postings_doc,
+            postings_tf=postings_tf,
+        )
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[str]:
+    """여러 검색 결과 순위(ID 목록)를 RRF 점수(1 / (k + 순위))로 합친 ID 목록"""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda doc_id: -scores[doc_id])
@@ -0,0 +1,97 @@
+import json
+from typing import Any, List, Tuple
+
+
+class JsonSectionParser:
+    """
+    LLM이 스트리밍으로 내보내는 JSON 객체를 조각 단위로 받아,
+    최상위 항목("player_keyword", "match_flow" ...)이 완성되는 즉시 (키, 값)으로 돌려주는 파서.
+
+    - 첫 '{' 이전의 텍스트(```json 코드블럭 표시 등)는 무시합니다.
+    - 값 안의 줄바꿈 등 제어문자는 허용합니다. (json.loads(strict=False))
+    - 값이 JSON으로 해석되지 않으면 원본 문자열을 그대로 돌려줍니다.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.finished = False
+        self._pos = 0
+        self._started = False
+        self._state = "key"  # key -> colon -> value -> key ...
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+        self._depth = 0  # 값 내부의 {} / [] 중첩 깊이
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """조각을 추가하고, 이번에 완성된 최상위 항목 목록을 반환"""
+        self.buffer += chunk
+        sections = []
+        buf = self.buffer
+
+        while self._pos < len(buf) and not self.finished:
+            ch = buf[self._pos]
+
+            if not self._started:
+                self._started = ch == "{"
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._state == "key":
+                        self._key = json.loads(buf[self._key_start:self._pos + 1], strict=False)
+                        self._state = "colon"
+                    elif self._depth == 0:
+                        # 문자열 값 완성
+                        sections.append(self._complete(self._pos + 1))
+            elif self._state == "key":
+                if ch == '"':
+                    self._in_string = True
+                    self._key_start = self._pos
+                elif ch == "}":
+                    self.finished = True
+            elif self._state == "colon":
+                if ch == ":":
+                    self._state = "value"
+                    self._value_start = None
+            elif self._value_start is None:
+                if not ch.isspace():
+                    self._value_start = self._pos
+                    if ch == '"':
+                        self._in_string = True
+                    elif ch in "{[":
+                        self._depth = 1
+            elif self._depth > 0:
+                if ch == '"':
+                    self._in_string = True
+                elif ch in "{[":
+                    self._depth += 1
+                elif ch in "}]":
+                    self._depth -= 1
+                    if self._depth == 0:
+                        sections.append(self._complete(self._pos + 1))
+            elif ch in ",}":
+                # 숫자 / true / null 같은 값은 구분자가 나와야 끝을 알 수 있음
+                sections.append(self._complete(self._pos))
+                self.finished = ch == "}"
+
+            self._pos += 1
+
+        return sections
+
+    def _complete(self, end: int) -> Tuple[str, Any]:
+        raw = self.buffer[self._value_start:end].strip()
+        try:
+            value = json.loads(raw, strict=False)
+        except json.JSONDecodeError:
+            value = raw
+        key = self._key
+        self._state = "key"
+        self._key = None
+        self._value_start = None
+        return key, value
@@ -0,0 +1,203 @@
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+# OP.GG 크롤링 결과는 파일마다 구조가 조금씩 다르므로 키 이름으로 추정합니다.
+CHAMPION_KEYS = ("champion", "champion_name", "championName", "name", "챔피언")
+POSITION_KEYS = ("position", "role", "lane", "포지션", "라인")
+# 하위 레코드를 담는 키 (값이 dict이면 키가 챔피언/포지션 이름)
+CHAMPION_CONTAINERS = ("champions",)
+POSITION_CONTAINERS = ("positions", "roles", "lanes")
+# 내용을 한 단계 감싸기만 하는 키 (예: {"data": {...}})
+WRAPPER_KEYS = ("data", "result")
+
+# (레코드 종류, 표시 이름, 키 단어) — 앞에서부터 먼저 일치하는 종류로 분류
+RECORD_TYPES = (
+    ("runes", "룬", ("rune", "perk", "shard", "룬")),
+    ("matchups", "상대 전적", ("counter", "matchup", "versus", "vs", "against", "weak", "strong", "상대", "카운터")),
+    ("build", "빌드", ("item", "build", "boot", "skill", "spell", "start", "core", "아이템", "스킬", "빌드", "스펠")),
+)
+OTHER_TYPE = ("other", "기타")
+STATS_TYPE = ("stats", "통계")
+
+# Document 기본 메타데이터와 겹치는 통계 키는 메타데이터로 옮기지 않음
+RESERVED_METADATA = {"source", "category", "heading", "filename", "champion", "position", "record_type"}
+
+
+def _is_scalar(value) -> bool:
+    return isinstance(value, (str, int, float, bool)) and value != ""
+
+
+def _format_scalar(value) -> str:
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value)
+
+
+def _inline(value) -> str:
+    """중괄호/들여쓰기 없이 한 줄로 표현 (예: "name 마법공학 · pick_rate 12.3")"""
+    if _is_scalar(value):
+        return _format_scalar(value)
+    if isinstance(value, dict):
+        return " · ".join(f"{k} {_inline(v)}" for k, v in value.items() if v not in (None, "", [], {}))
+    if isinstance(value, list):
+        sep = ", " if all(_is_scalar(v) for v in value) else " / "
+        return sep.join(_inline(v) for v in value if v not in (None, "", [], {}))
+    return ""
+
+
+def _key_words(key: str) -> List[str]:
+    """"skillOrder" / "skill_order" -> ["skill", "order"]"""
+    key = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", key)
+    return [w for w in re.split(r"[^0-9A-Za-z가-힣]+", key.lower()) if w]
+
+
+def classify_field(key: str) -> Tuple[str, str]:
+    words = _key_words(key)
+    for record_type, label, keywords in RECORD_TYPES:
+        for keyword in keywords:
+            if keyword.isascii():
+                if any(w.startswith(keyword) for w in words):
+                    return record_type, label
+            elif keyword in key:
+                return record_type, label
+    return OTHER_TYPE
+
+
+def _first_string(data: Dict, keys) -> Optional[str]:
+    for key in keys:
+        value = data.get(key)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return None
+
+
+def iter_records(data: Any, champion: Optional[str] = None, position: str = "") -> Iterator[Tuple[Optional[str], str, Dict]]:
+    """
+    파일 전체에서 (챔피언, 포지션, 레코드 필드) 단위 레코드를 찾아냅니다.
+    - 리스트는 원소별로, champions/positions 같은 컨테이너 키는 하위 항목별로 내려갑니다.
+    - 컨테이너 밖에 남은 필드는 상위(챔피언 또는 챔피언+포지션) 레코드로 취급합니다.
+    """
+    if isinstance(data, list):
+        for item in data:
+            yield from iter_records(item, champion, position)
+        return
+    if not isinstance(data, dict):
+        return
+
+    champion = _first_string(data, CHAMPION_KEYS) or champion
+    position = _first_string(data, POSITION_KEYS) or position
+    fields = {}
+    for key, value in data.items():
+        if key in CHAMPION_KEYS or key in POSITION_KEYS:
+            continue
+        if key in CHAMPION_CONTAINERS + POSITION_CONTAINERS and isinstance(value, (dict, list)):
+            if isinstance(value, dict) and all(isinstance(v, (dict, list)) for v in value.values()):
+                for name, child in value.items():
+                    if key in POSITION_CONTAINERS:
+                        yield from iter_records(child, champion, name)
+                    else:
+                        yield from iter_records(child, name, position)
+            else:
+                yield from iter_records(value, champion, position)
+            continue
+        if key in WRAPPER_KEYS and isinstance(value, (dict, list)):
+            yield from iter_records(value, champion, position)
+            continue
+        fields[key] = value
+
+    if any(v not in (None, "", [], {}) for v in fields.values()):
+        yield champion, position, fields
+
+
+def _parse_number(value):
+    """"52.3%" 같은 통계 문자열은 숫자로 (메타데이터 필터에서 비교할 수 있도록)"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value.replace(",", "").rstrip("%").strip())
+        except ValueError:
+            return value
+    return value
+
+
+def _stat_metadata(stats: Dict) -> Dict:
+    metadata = {}
+    for key, value in stats.items():
+        name = "_".join(_key_words(key))
+        if name and name.isascii() and name not in RESERVED_METADATA:
+            metadata[name] = _parse_number(value)
+    return metadata
+
+
+def _pack_lines(header: str, lines: List[str], max_chars: int) -> List[str]:
+    """헤더를 반복하면서 줄 단위로 max_chars 이하 묶음을 만듦 (레코드 한 줄이 중간에 잘리지 않도록)"""
+    chunks, current = [], [header]
+    size = len(header)
+    for line in lines:
+        if len(current) > 1 and size + 1 + len(line) > max_chars:
+            chunks.append("\n".join(current))
+            current, size = [header], len(header)
+        current.append(line)
+        size += 1 + len(line)
+    if len(current) > 1:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def build_opgg_documents(data: Any, clean_name: str, filename: str, max_chars: int = 1000) -> List[Document]:
+    """
+    OP.GG JSON 한 파일을 챔피언 × 포지션 × 종류(빌드/룬/상대 전적/통계) 단위의 압축된 Document로 변환합니다.
+    - 본문은 "키: 값" 줄 목록 (JSON 들여쓰기/괄호 없음), 리스트의 레코드 하나가 한 줄
+    - 승률/픽률 등 스칼라 통계는 모든 문서 헤더에 넣고 메타데이터(숫자)로도 저장
+    - max_chars(= 청크 크기)를 넘는 레코드는 헤더를 반복해 줄 단위로 나눔
+    """
+    documents = []
+    for champion, position, fields in iter_records(data):
+        champion = champion or clean_name
+        # 스칼라 필드와 {"stats": {"win_rate": ...}} 처럼 스칼라만 담은 기타 dict는 통계로 취급
+        stats, stat_keys = {}, set()
+        for key, value in fields.items():
+            if _is_scalar(value):
+                stats[key] = value
+            elif (isinstance(value, dict) and value and all(_is_scalar(v) for v in value.values())
+                  and classify_field(key) == OTHER_TYPE):
+                stats.update(value)
+            else:
+                continue
+            stat_keys.add(key)
+
+        groups: Dict[Tuple[str, str], List[str]] = {}
+        for key, value in fields.items():
+            if key in stat_keys or value in (None, "", [], {}):
+                continue
+            group = groups.setdefault(classify_field(key), [])
+            if isinstance(value, list) and not all(_is_scalar(v) for v in value):
+                group.extend(f"{key}: {_inline(item)}" for item in value)
+            elif isinstance(value, dict) and not all(_is_scalar(v) for v in value.values()):
+                group.extend(f"{key}.{k}: {_inline(v)}" for k, v in value.items() if v not in (None, "", [], {}))
+            else:
+                group.append(f"{key}: {_inline(value)}")
+        if not groups:
+            groups[STATS_TYPE] = []
+
+        stats_line = " · ".join(f"{k} {_format_scalar(v)}" for k, v in stats.items())
+        base_metadata = {
+            "source": champion,
+            "category": "opgg",
+            "filename": filename,
+            "champion": champion,
+            "position": position,
+            **_stat_metadata(stats),
+        }
+        for (record_type, label), lines in groups.items():
+            heading = " ".join(part for part in (position, label) if part)
+            header = f"[OPGG | {champion}] {heading}"
+            if stats_line:
+                header += f"\n{stats_line}"
+            for content in _pack_lines(header, lines, max_chars) if lines else [header]:
+                metadata = {**base_metadata, "heading": heading, "record_type": record_type}
+                documents.append(Document(page_content=content, metadata=metadata))
+    return documents
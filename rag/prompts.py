@@ -0,0 +1,207 @@
+"""
+코칭 리포트 프롬프트 조각.
+- single 모드: 전체 항목을 한 번의 LLM 호출로 생성 (build_report_template)
+- sections 모드: 항목 묶음별로 필요한 데이터만 넣은 프롬프트를 동시에 실행 (build_section_template)
+"""
+
+REPORT_ROLE = """\
+
+        # Role
+        당신은 League of Legends (LoL) 전문 AI 분석가입니다. 
+        사용자가 업로드한 경기 데이터를 바탕으로 심층 분석 리포트를 **JSON 형식**으로 작성합니다.
+         
+
+"""
+
+REPORT_RULES = """\
+        내용 출력 시 유의점 :                                              
+         - 모든 챔피언과 아이템은 한국어로 출력할 것. 영어로 절대 나타내지 않을 것
+         - team 100은 블루팀, team 200은 레드팀으로 출력할 것 ('team100', 'team200' 단어는 출력에 나오지 않음)
+         - 스킬에 대해 언급할 때에는 {skill_dict}을 참고해, 틀리지 않도록 매치하여 그 스킬의 키(Q,W,E,R)와 한국어 번역으로 언급할 것 ( ex : '키'('스킬명"), 챔피언 이름은 붙이지 말기(caitlynq -> Q(필트오버 피스메이커)))
+         - 챔피언에 대해 언급할 때에는 {champion_dict}을 참고해 꼭 한국어로 이름을 표기하고, 영어 이름은 출력 어디에도 절대 표기하지 말 것.
+         - basickattack이 들어가면 "기본 공격" 으로만 번역할것 (ex : caitlynbasicattack ->  기본 공격)
+         - 핑 또한 한국어로 번역하여 언급할 것 (예 : 위험핑, 미아핑)
+         - API에서 숫자로 존재하는 raw data 내용들을 출력에 절대 포함하지 말 것.
+         - Horde는 전령으로 번역할것, BARON_NASHOR는 바론으로 번역할 것
+                          
+
+
+"""
+
+# single 모드 전용: 전체 경기 데이터를 한 번에 전달
+REPORT_SOURCES = """\
+        모든 내용
+
+        # Analysis Target
+        - **분석 대상 플레이어**: {target_champion} ({target_position})
+        - **상대 라이너/조합**: {enemy_champions}
+        - **감지된 중요 장면**: {detected_moments}
+
+        # Data Sources
+        1. **Game Logs (API Data)**: {match_context}
+        2. **Wiki Knowledge**: {knowledge_context}
+
+        # Report Structure (JSON Output Only)
+        아래 목차에 맞춰 분석 내용을 JSON 키(Key)에 매핑하여 작성하십시오. 
+        **Markdown 태그(```json 등) 없이 순수 JSON 문자열만 출력해야 합니다.**
+                                                       
+"""
+
+# 모든 플레이어의 역할 / 승패 기여 분류 기준
+PLAYER_CLASSIFICATION_GUIDE = """\
+        # 모든 플레이어의 역할 및 승리/패배 기여로 분류
+            분석 가이드라인:
+
+            1. 챔피언 & 포지션 식별: 입력된 챔피언들이 해당 포지션에서 어떤 역할(예: 탱커, 하이퍼 캐리, 유틸폿, 암살자 등)인지 파악하십시오.
+            2. 핵심 지표 가중치 평가: 아래 기준으로 역할 유형을 플레이어들별로 나누고 우선순위 지표를 다르게 해석하십시오.
+
+            A. 캐리 라인 (Top 칼챔, Mid 메이지/암살자, Bot 원딜):
+            평가 기준: KDA(특히 데스 관리), 챔피언에게 가한 피해량(DPM), 분당 골드/CS.
+            평가: 딜량이 팀 내 1~2위가 아니거나 데스가 많으면 "성장 못한 캐리"로 혹평할 것.
+                                                       
+            B. 탱커 & 이니시에이터 (Top 탱커, Jungle 탱커, Sup 탱커):**
+            최우선: 받은 피해량 + 경감된 피해량(탱킹 능력), 군중 제어(CC) 점수, 어시스트.
+            평가: 데스가 다소 많더라도 어시스트와 탱킹 지표가 높으면 "든든한 방패"로 호평할 것.
+                                                       
+            C. 유틸리티 & 서포터 (Sup 유틸):**
+            최우선: 시야 점수, 킬 관여율(KP%), 힐/보호막 양, 제어 와드 구매 수.
+            평가: 시야 점수가 낮거나 데스가 많으면 "시야 없는 맛집"으로 혹평할 것.
+                                                       
+            D. 정글러 (Jungle 성장/갱킹):**
+            최우선: 오브젝트(용/바론) 획득 기여, 킬 관여율, 초반 15분 지표.
+            평가: 딜량보다는 게임 전체에 미친 영향력(라인 개입)을 중심으로 볼 것.
+                                                       
+                                                
+            3. 분석 결과와 승패여부를 이용해서, 플레이어들의 승리/패배 기여 유형을 4가지로 나누시오
+                                                       
+            A. 플레이어가 잘 했고 게임을 이긴 경우 (게임을 캐리했다)
+            B. 플레이어가 잘 했지만 게임을 졌다 (팀운이 좋지 않았다)
+            C. 플레이어가 못 했지만 게임을 이겼다. (팀을 잘 만나서 이겼다, 버스탔다)
+            D. 플레이어가 못 해서 게임을 졌다. (게임 패배에 큰 기여)
+                                                       
+"""
+
+OUTPUT_HEADER = """\
+        출력 내용  :                                            
+
+"""
+
+# 항목별 작성 가이드 (키 순서 = 리포트 출력 순서)
+SECTION_GUIDES = {
+    "player_keyword": """\
+        1. "player_keyword": (⚡ 한 단어로 플레이스타일 요약)
+         - 분석 대상 플레이어의 스타일을 한 단어로 요약해서 제시. (예시: 전장의 지배자, 진영 파괴자, 최후의 보루, 상대 팀의 악몽, 기적의 역전가 등)
+         - 이 내용을 누락하지 말고 꼭 제시할 것.
+
+
+""",
+    "one_line_review": """\
+        2. "one_line_review": (⚡ 한줄평)
+        - 분석 대상 플레이어의 활약상을 한 문장으로 요약. (등급을 부여하지 않을 것)
+
+            4가지로 나누어진 플레이어 유형과 승리/패배 기여 유형에 따라 플레이에 대한 평가를 모두 총합해서, 
+                                               
+            이 플레이어에게 어울리는 한줄평을 작성한다.
+
+            이때, 적당한 유머와 구어체를 사용해서 작성할 것.
+                                                       
+            예시) 원거리 딜러의 플레이어가 잘 했지만 게임을 진 경우 : 
+            "혼자서 통나무를 열심히 들었지만, 팀원들이 통나무를 던지고 말았습니다."
+
+
+""",
+    "match_flow": """\
+        3. "match_flow": (🗺️ 경기 전체 흐름)
+           - **예상 양상**:
+               - 분석 대상 플레이아가 속한 팀을 **우리팀** 으로 두고, 속하지 않은 팀을 **상대팀**으로 둘 것.
+               1. 팀별로 챔피언 조합에 따라 싸움 / 운영을 어떻게 진행해야 하는지 제시할 것.
+               2. 우리팀이 상대팀을 이기기 위해서 플레이어가 맡아야 할 역할을 제시
+                                                       
+           - **게임의 실제 진행 내용**: 
+               1. 초반 라인전 -> 중반 운영 -> 후반 한타 흐름 요약, 골드 차이와 및 승부처에 발생한 사건들을 설명해줄 것.
+                                                       
+
+""",
+    "skirmish_analysis": """\
+        4. "skirmish_analysis": (⚔️ 교전 맥락 정밀 분석)
+            **교전 장면에 대한 개관 및 요약**
+                - 감지된 주요 장면({detected_moments})이 **발생하기 이전 상황**에 대해 알려줄 것(대형 오브젝트 등)을 알려줄 것.
+                - 대상 플레이어가 속한 팀에 주요 장면의 **교전을 이기기 위한 핵심 포인트** 제시
+                - **교전의 진행 과정 및 결과**에 대한 분석 제공
+                - 각 장면별로 **[시간]**, **[배경]**(교전 트리거, 유불리), **[플레이어 코칭]**(포지션, 스킬, 포커싱, damage_received 참고), **[피드백]**(Good/Bad) 내용을 포함하여 서술.
+            
+            **대상 플레이어 중심 코칭 진행**
+                - 본 주요 장면에서 **플레이어가 수행해야 할 역할을 제시**하고, 이를 잘 수행했는지 피드백할것
+                - 이외에도 교전을 대상 **플레이어가 유리하게 진행할 수 있도록 하는 요인**에 대해 언급해주기
+                                                       
+
+""",
+    "play_eval": """\
+        5. "play_eval": (📊 대상 플레이어의 플레이 및 아이템 평가) : 이때 긍정 및 부정적 관점에 치우치지 않을 것.
+           - **역할 수행**: 딜량/탱킹/시야 지표를 바탕으로 대상 플레이어가 수행해야 할 역할을 잘 진행하였는지 평가할 것.
+                                                    
+           - **아이템**: 플레이어의 역할과 상대 조합을 고려해서 아이템을 적절히 구매하였는지 평가. 
+
+""",
+    "team_atmosphere": """\
+        6. "team_atmosphere": (🔊 팀 분위기)
+           - 핑 데이터(`pings`)를 기반으로 한 소통 및 오더 갈림 진단.
+            특히 물음표핑과 위험핑이 적재적소에 사용되었는지, 아니면 아군에게 감정을 표시하기 위한 용도로 사용되었는지 확인해볼 것
+            하나의 단락으로 설정할 것
+
+""",
+}
+
+REPORT_TONE = """\
+        # Output Tone
+        - 전문적인 e스포츠 해설가처럼 분석적이지만, 플레이어의 성장을 돕는 코치처럼 구체적이고 실용적인 조언을 하십시오.
+        - 게임 관련 영어 raw data 내용을 모두 한국어로 변환하고, **영어 원문 내용은 절대 포함하지 마시오**.
+        - 라이엇 API에 존재하는 모든 숫자 형태의 raw data는 실제 data dragon에 있는 내용으로 맞춘 후 제시하고, **절대 raw data가 출력되는 일은 없도록 하시오**.(예시 : 3124 -> 그림자 검)
+        """
+
+# sections 모드 전용: 해당 항목에 필요한 데이터만 전달
+SECTION_SOURCES = """\
+        # Analysis Target
+        - **분석 대상 플레이어**: {target_champion} ({target_position})
+        - **상대 라이너/조합**: {enemy_champions}
+        - **감지된 중요 장면**: {detected_moments}
+
+        # Data Sources
+        1. **Game Logs (API Data)**: {section_context}
+        2. **Wiki Knowledge**: {knowledge_context}
+
+        # Report Structure (JSON Output Only)
+        아래 목차의 항목만 JSON 키(Key)에 매핑하여 작성하십시오. (목차에 없는 키는 출력하지 말 것)
+        **Markdown 태그(```json 등) 없이 순수 JSON 문자열만 출력해야 합니다.**
+
+"""
+
+# sections 모드의 LLM 호출 단위
+# - keys: 이 호출에서 작성할 항목
+# - classification: 플레이어 역할/승패 기여 분류 기준 포함 여부
+# - knowledge: 위키 검색 결과 포함 여부
+SECTION_GROUPS = {
+    "summary": {"keys": ("player_keyword", "one_line_review"), "classification": True, "knowledge": False},
+    "match_flow": {"keys": ("match_flow",), "classification": False, "knowledge": True},
+    "skirmish_analysis": {"keys": ("skirmish_analysis",), "classification": False, "knowledge": True},
+    "play_eval": {"keys": ("play_eval",), "classification": True, "knowledge": True},
+    "team_atmosphere": {"keys": ("team_atmosphere",), "classification": False, "knowledge": False},
+}
+
+
+def build_report_template() -> str:
+    """single 모드: 전체 리포트 프롬프트"""
+    return (
+        REPORT_ROLE + REPORT_RULES + REPORT_SOURCES + PLAYER_CLASSIFICATION_GUIDE
+        + OUTPUT_HEADER + "".join(SECTION_GUIDES.values()) + REPORT_TONE
+    )
+
+
+def build_section_template(group: str) -> str:
+    """sections 모드: 한 항목 묶음 전용 프롬프트"""
+    spec = SECTION_GROUPS[group]
+    return (
+        REPORT_ROLE + REPORT_RULES + SECTION_SOURCES
+        + (PLAYER_CLASSIFICATION_GUIDE if spec["classification"] else "")
+        + OUTPUT_HEADER + "".join(SECTION_GUIDES[key] for key in spec["keys"]) + REPORT_TONE
+    )
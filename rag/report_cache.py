@@ -0,0 +1,20 @@
+import hashlib
+
+from services.disk_cache import DiskCache
+from .settings import REPORT_CACHE_PATH, REPORT_CACHE_MAX_MB, REPORT_CACHE_MAX_AGE_DAYS
+
+# 캐시 키 -> 분석 결과 JSON
+# (용량 초과 시 오래 안 쓴 리포트부터, 저장 후 REPORT_CACHE_MAX_AGE_DAYS가 지나면 만료)
+report_cache = DiskCache(
+    REPORT_CACHE_PATH,
+    "reports",
+    max_bytes=REPORT_CACHE_MAX_MB * 1024 * 1024,
+    default_ttl=REPORT_CACHE_MAX_AGE_DAYS * 86400,
+)
+
+def prompt_hash(*templates: str) -> str:
+    """프롬프트 템플릿 원문 해시 (프롬프트를 고치면 기존 캐시가 자동으로 무효화됨)"""
+    return hashlib.sha256("\x00".join(templates).encode("utf-8")).hexdigest()[:16]
+
+def report_key(match_id: str, puuid: str, template_hash: str, model: str, temperature: float) -> str:
+    return f"{match_id}:{puuid}:{template_hash}:{model}:{temperature}"
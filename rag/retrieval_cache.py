@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import json
+import re
+import time
+import unicodedata
+import uuid
+from functools import lru_cache
+from typing import List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from services.disk_cache import DiskCache
+from .settings import DB_PATH, RETRIEVAL_CACHE_PATH, RETRIEVAL_CACHE_MAX_MB, RETRIEVAL_CACHE_MEMORY_ITEMS
+
+# 벡터 DB를 새로 만들 때마다 갱신되는 버전 파일 (검색 결과 캐시 무효화용)
+DB_VERSION_FILE = DB_PATH / "db_version.json"
+
+# 캐시 파일은 import 시점이 아니라 처음 쓸 때 엶 (create_db 등 검색 캐시를 쓰지 않는 곳에서 파일이 생기지 않도록)
+@lru_cache(maxsize=None)
+def get_query_embedding_cache() -> DiskCache:
+    """임베딩 모델 + 질의 -> 임베딩 벡터"""
+    return DiskCache(
+        RETRIEVAL_CACHE_PATH,
+        "query_embeddings",
+        max_bytes=RETRIEVAL_CACHE_MAX_MB * 1024 * 1024,
+        memory_items=RETRIEVAL_CACHE_MEMORY_ITEMS,
+    )
+
+@lru_cache(maxsize=None)
+def get_retrieval_cache() -> DiskCache:
+    """벡터 DB 버전 + k + 질의 -> 검색된 문서 목록"""
+    return DiskCache(
+        RETRIEVAL_CACHE_PATH,
+        "retrievals",
+        max_bytes=RETRIEVAL_CACHE_MAX_MB * 1024 * 1024,
+        memory_items=RETRIEVAL_CACHE_MEMORY_ITEMS,
+    )
+
+def normalize_query(query: str) -> str:
+    """유니코드 정규화(NFC) + 공백 정리. (캐시 키와 실제 질의 모두 이 값을 사용)"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", query)).strip()
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def write_db_version() -> str:
+    """create_db가 DB를 다 만든 뒤 호출: 새 버전 ID 기록"""
+    version = uuid.uuid4().hex
+    DB_VERSION_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(DB_VERSION_FILE, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "built_at": time.time()}, f)
+    return version
+
+def get_db_version() -> Optional[str]:
+    """버전 파일이 있으면 그 값, 없으면(이전 방식으로 만든 DB) chroma.sqlite3 수정 시각"""
+    if DB_VERSION_FILE.exists():
+        with open(DB_VERSION_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)["version"]
+    sqlite_file = DB_PATH / "chroma.sqlite3"
+    if sqlite_file.exists():
+        return f"mtime-{sqlite_file.stat().st_mtime_ns}"
+    return None
+
+def retrieval_key(db_version: str, k: int, query: str, scope: str = "",
+                  candidates: int = 0, rrf_k: int = 0) -> str:
+    """
+    scope: 검색 방식 / 필터 구분 (예: 하이브리드 검색의 챔피언 필터)
+    candidates / rrf_k: 하이브리드 검색의 후보 수 / RRF 상수 (설정을 바꾸면 기존 캐시를 쓰지 않도록 키에 포함)
+    """
+    return f"{db_version}:{k}:{candidates}:{rrf_k}:{scope}:{_digest(query)}"
+
+def get_cached_documents(key: str) -> Optional[List[Document]]:
+    cached = get_retrieval_cache().get(key)
+    if cached is None:
+        return None
+    return [Document(page_content=d["page_content"], metadata=dict(d["metadata"])) for d in cached]
+
+def set_cached_documents(key: str, docs: List[Document]):
+    get_retrieval_cache().set(key, [{"page_content": d.page_content, "metadata": d.metadata} for d in docs])
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    질의 임베딩(embed_query)만 캐시하는 Embeddings 래퍼.
+    문서 임베딩(embed_documents)은 DB 구축 때만 쓰이므로 그대로 전달합니다.
+    """
+
+    def __init__(self, embeddings: Embeddings, model: str):
+        self.embeddings = embeddings
+        self.model = model
+
+    def _key(self, text: str) -> str:
+        return f"{self.model}:{_digest(text)}"
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        cache = get_query_embedding_cache()
+        vector = cache.get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            cache.set(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        # SQLite 조회/저장은 짧지만 이벤트 루프를 막지 않도록 스레드에서 실행
+        key = self._key(text)
+        cache = await asyncio.to_thread(get_query_embedding_cache)
+        vector = await asyncio.to_thread(cache.get, key)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            await asyncio.to_thread(cache.set, key, vector)
+        return vector
@@ -1,28 +1,45 @@
+import asyncio
 import json
 import os
 import re
 import sys
-from typing import Dict, List, Any
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
 
 # [라이브러리 임포트]
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.documents import Document
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from .settings import DB_PATH, EMBEDDING_MODEL, LLM_MODEL
+from .settings import (
+    DB_PATH, BM25_INDEX_PATH, EMBEDDING_MODEL, RETRIEVER_K, RETRIEVER_CANDIDATES, RETRIEVER_RRF_K, HYBRID_RETRIEVAL, LLM_MODEL, LLM_TEMPERATURE, REPORT_MODE, LLM_MAX_CONCURRENCY, LLM_TIMEOUT_SECONDS,
+    MATCH_CONTEXT_TOKEN_BUDGET, BATCH_MAX_CONCURRENCY,
+)
+from .context_compactor import compact_frames_context, compact_match_context, light_events
+from .embeddings import get_embeddings
+from .ddragon import build_match_dictionaries, champion_aliases
+from .hybrid_search import BM25Index, reciprocal_rank_fusion
+from .json_stream import JsonSectionParser
+from .prompts import SECTION_GROUPS, build_report_template, build_section_template
+from .report_cache import report_cache, report_key, prompt_hash
+from .retrieval_cache import (
+    CachedEmbeddings, normalize_query, get_db_version, retrieval_key, get_cached_documents, set_cached_documents,
+)
+from services.timeline_frame import load_timeline_frame
 
 # =============================================================================
 # 1. Data Processor (Riot API 전처리)
 # =============================================================================
 class RiotMatchDataProcessor:
-    def __init__(self, match_data: Dict, timeline_data: Dict):
+    def __init__(self, match_data: Dict, timeline_data: Dict, match_id: Optional[str] = None):
+        """match_id: 서버가 직접 불러온 매치의 ID (있을 때만 타임라인 변환 결과 재사용)"""
         self.match = match_data.get('info', {})
-        self.timeline = timeline_data.get('info', {})
+        self.timeline = load_timeline_frame(timeline_data, match_id)
         self.participants_map = {p['participantId']: p['championName'] for p in self.match.get('participants', [])}
 
     def get_participant_name(self, p_id):
@@ -73,24 +90,27 @@ class RiotMatchDataProcessor:
         frames_summary = []
         TARGET_EVENTS = {'CHAMPION_KILL', 'ELITE_MONSTER_KILL', 'BUILDING_KILL', 'TURRET_PLATE_DESTROYED'}
 
-        for frame in self.timeline.get('frames', []):
-            timestamp = frame['timestamp']
-            minute = int(timestamp / 60000)
-            
+        tf = self.timeline
+        names = [self.get_participant_name(p_id) for p_id in tf.participant_ids]
+        gold = tf.stat('totalGold').tolist()
+        level = tf.stat('level').tolist()
+        pos_x = tf.stat('x').tolist()
+        pos_y = tf.stat('y').tolist()
+        present = tf.present.tolist()
+        has_position = tf.has_position.tolist()
+
+        for i, minute in enumerate(tf.minutes.tolist()):
             player_status = {}
-            for p_id_str, p_data in frame.get('participantFrames', {}).items():
-                p_id = int(p_id_str)
-                name = self.get_participant_name(p_id)
+            for j, name in enumerate(names):
+                if not present[i][j]: continue
                 player_status[name] = {
-                    "gold": p_data['totalGold'],
-                    "level": p_data['level'],
-                    "pos": (p_data.get('position', {}).get('x'), p_data.get('position', {}).get('y'))
+                    "gold": gold[i][j],
+                    "level": level[i][j],
+                    "pos": (pos_x[i][j], pos_y[i][j]) if has_position[i][j] else (None, None)
                 }
 
             events = []
-            for event in frame.get('events', []):
-                if event['type'] not in TARGET_EVENTS: continue
-                
+            for event in tf.frame_events(i, TARGET_EVENTS):
                 evt_data = {"type": event['type'], "time": f"{minute}분"}
                 if event['type'] == 'CHAMPION_KILL':
                     evt_data.update({
@@ -142,233 +162,218 @@ class MatchEventDetector:
                     analysis_tasks.append(f"[{minute}분대] {monster} 획득 및 교전 확인")
 
         return list(set(analysis_tasks))
-    
-import requests
-
-def get_lol_skill_dictionary():
-    # 1. 최신 버전 정보 가져오기
-    version_url = "https://ddragon.leagueoflegends.com/api/versions.json"
-    version = requests.get(version_url).json()[0]
-    
-    print(f"Current LoL Version: {version}")
-
-    # 2. 전체 챔피언 데이터 가져오기 (영어 & 한국어)
-    # championFull.json은 모든 스킬 상세 정보를 포함합니다.
-    url_en = f"http://ddragon.leagueoflegends.com/cdn/{version}/data/en_US/championFull.json"
-    url_ko = f"http://ddragon.leagueoflegends.com/cdn/{version}/data/ko_KR/championFull.json"
-
-    data_en = requests.get(url_en).json()["data"]
-    data_ko = requests.get(url_ko).json()["data"]
-
-    skill_dict = {}
-
-    # 3. 챔피언별로 순회하며 스킬 매핑
-    for champ_id in data_en:
-        # 챔피언 정보 (영문/한글)
-        champ_en = data_en[champ_id]
-        champ_ko = data_ko[champ_id]
-
-        # 패시브 스킬 매핑
-        passive_en = champ_en["passive"]["name"]
-        passive_ko = champ_ko["passive"]["name"]
-        skill_dict[passive_en] = passive_ko
-
-        # Q, W, E, R 스킬 매핑
-        # spells 리스트 순서: Q(0), W(1), E(2), R(3)
-        for i in range(len(champ_en["spells"])):
-            spell_en = champ_en["spells"][i]["name"]
-            spell_ko = champ_ko["spells"][i]["name"]
-            skill_dict[spell_en] = spell_ko
-
-    return skill_dict
-
-   
-full_skill_dict = get_lol_skill_dictionary()
-
-import requests
-
-def get_champion_name_mapping():
-    # 1. 최신 버전 확인
-    version_url = "https://ddragon.leagueoflegends.com/api/versions.json"
-    version = requests.get(version_url).json()[0]
-    
-    # 2. 영어/한국어 챔피언 데이터 요청 (champion.json은 가벼워서 금방 됩니다)
-    url_en = f"http://ddragon.leagueoflegends.com/cdn/{version}/data/en_US/champion.json"
-    url_ko = f"http://ddragon.leagueoflegends.com/cdn/{version}/data/ko_KR/champion.json"
-    
-    data_en = requests.get(url_en).json()['data']
-    data_ko = requests.get(url_ko).json()['data']
-    
-    mapping = {}
-    
-    # 3. 매핑 (ID를 키로 사용하여 이름 매칭)
-    for champ_id in data_en:
-        en_name = data_en[champ_id]['name']
-        ko_name = data_ko[champ_id]['name']
-        mapping[en_name] = ko_name
-        
-    return mapping
 
-full_champion_dict = get_champion_name_mapping()
+    def detect_key_minutes(self) -> List[int]:
+        """detect_key_moments와 같은 기준으로 중요 장면이 있었던 분(minute) 목록 (오름차순)"""
+        minutes = set()
+        for frame in self.timeline:
+            minute = frame['minute']
+            kill_count = sum(1 for e in frame['events'] if e['type'] == 'CHAMPION_KILL')
+            if kill_count >= 3 or (kill_count >= 1 and minute < 15):
+                minutes.add(minute)
+            if any(e['type'] == 'ELITE_MONSTER_KILL' for e in frame['events']):
+                minutes.add(minute)
+        return sorted(minutes)
+
+
+def build_section_contexts(processed_context: Dict, key_minutes: List[int],
+                           budget_tokens: int = MATCH_CONTEXT_TOKEN_BUDGET) -> Dict[str, str]:
+    """
+    sections 모드용: 항목 묶음(SECTION_GROUPS)별로 필요한 데이터만 잘라낸 경기 로그 JSON 문자열
+    - summary / play_eval: 경기 개요 + 플레이어 지표/아이템
+    - match_flow: 분 단위 이벤트 + 팀 골드 (플레이어별 위치 제외)
+    - skirmish_analysis: 중요 장면 직전~당시 프레임 전체
+    - team_atmosphere: 플레이어별 핑
+    항목마다 따로 LLM을 호출하므로 타임라인이 들어가는 match_flow / skirmish_analysis는
+    각각 budget_tokens 안에 들어가도록 압축합니다 (나머지는 플레이어 10명 분량으로 크기가 고정).
+    """
+    overview = processed_context['match_summary']['overview']
+    players = processed_context['match_summary']['players']
+    timeline_flow = processed_context['timeline_flow']
+
+    player_stats = [{k: v for k, v in p.items() if k not in ('puuid', 'pings')} for p in players]
+    roster = [
+        {"championName": p['championName'], "teamId": p['teamId'], "teamPosition": p['teamPosition'], "kda": p['kda']}
+        for p in players
+    ]
+    team_of = {p['championName']: p['teamId'] for p in players}
+
+    def team_gold(frame: Dict) -> Dict:
+        totals = {}
+        for name, status in frame['status_snapshot'].items():
+            team_id = team_of.get(name)
+            if team_id is not None:
+                totals[team_id] = totals.get(team_id, 0) + status['gold']
+        return totals
+
+    flow = [{"minute": frame['minute'], "team_gold": team_gold(frame), "events": frame['events']} for frame in timeline_flow]
+
+    # 교전 "이전 상황"도 볼 수 있도록 중요 장면 1분 전 프레임까지 포함
+    window = {m for minute in key_minutes for m in (minute - 1, minute)}
+    key_frames = [frame for frame in timeline_flow if frame['minute'] in window]
+
+    contexts = {
+        "summary": {"overview": overview, "players": player_stats},
+        "play_eval": {"overview": overview, "players": player_stats},
+        "team_atmosphere": {
+            "overview": overview,
+            "players": [{**r, "pings": p['pings']} for r, p in zip(roster, players)],
+        },
+    }
+    texts = {group: json.dumps(context, ensure_ascii=False) for group, context in contexts.items()}
+
+    # 예산을 넘으면 피해 내역 -> 플레이어 위치 -> 프레임 순으로 덜어냄
+    texts["match_flow"] = compact_frames_context(
+        {"overview": overview, "players": roster}, "timeline",
+        [flow, [{**f, "events": light_events(f['events'])} for f in flow]],
+        key_minutes, budget_tokens,
+    )
+    texts["skirmish_analysis"] = compact_frames_context(
+        {"players": roster}, "key_frames",
+        [
+            key_frames,
+            [{**f, "status_snapshot": {name: {"gold": st['gold'], "level": st['level']} for name, st in f['status_snapshot'].items()}}
+             for f in key_frames],
+            [{"minute": f['minute'], "team_gold": team_gold(f), "events": light_events(f['events'])} for f in key_frames],
+        ],
+        key_minutes, budget_tokens,
+    )
+    return texts
 
 # =============================================================================
 # 3. RAG Service (메인 서비스)
 # =============================================================================
+# 분석 결과 JSON의 최상위 항목 (모두 있어야 정상 응답으로 보고 캐시에 저장)
+REPORT_SECTIONS = ("player_keyword", "one_line_review", "match_flow", "skirmish_analysis", "play_eval", "team_atmosphere")
+
+
+class AnalysisBusyError(asyncio.TimeoutError):
+    """LLM 실행 슬롯을 기다리다 분석 마감 시간을 넘긴 경우 (서버 과부하, 라우터에서 503)"""
+
+
+def analysis_deadline() -> float:
+    """분석 하나의 마감 시각 (이벤트 루프 시간 기준). 전처리/검색/LLM 대기열/LLM 호출 전체에 적용"""
+    return asyncio.get_running_loop().time() + LLM_TIMEOUT_SECONDS
+
+
+async def until_deadline(aw, deadline: float):
+    """마감 시각까지 남은 시간 안에 끝나지 않으면 asyncio.TimeoutError"""
+    return await asyncio.wait_for(aw, timeout=max(0.0, deadline - asyncio.get_running_loop().time()))
+
+
 class RAGService:
     def __init__(self):
         # 1. 모델 설정
-        self.embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
+        # 임베딩 백엔드는 settings.EMBEDDING_BACKEND (DB 구축과 같은 백엔드)
+        # 질의 임베딩은 캐시해서 같은 질의에 대한 임베딩 호출을 생략
+        self.embeddings = CachedEmbeddings(get_embeddings(), EMBEDDING_MODEL)
         
         # Path 객체일 경우 문자열로 변환 (Chroma 호환성)
         db_path_str = str(DB_PATH)
         
         if os.path.exists(db_path_str):
             self.vectorstore = Chroma(persist_directory=db_path_str, embedding_function=self.embeddings)
-            self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": 3})
+            self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": RETRIEVER_K})
             print(f"✅ Vector DB Loaded: {db_path_str}")
+            # 하이브리드 검색용 BM25 인덱스 (이전 방식으로 만든 DB에는 없으므로 벡터 검색만 사용)
+            self.bm25 = BM25Index.load(BM25_INDEX_PATH)
+            if self.bm25 is not None:
+                print(f"✅ BM25 Index Loaded: {len(self.bm25)} chunks")
         else:
             print(f"⚠️ Vector DB Not Found at {db_path_str}. API Mode Only.")
             self.retriever = None
+            self.bm25 = None
 
-        self.llm = ChatGoogleGenerativeAI(model=LLM_MODEL, temperature=0.5)
-
-        # 2. 프롬프트 (전체 분석용 하나만 유지)
-        self.prompt = ChatPromptTemplate.from_template("""
-        # Role
-        당신은 League of Legends (LoL) 전문 AI 분석가입니다. 
-        사용자가 업로드한 경기 데이터를 바탕으로 심층 분석 리포트를 **JSON 형식**으로 작성합니다.
-         
-
-        내용 출력 시 유의점 :                                              
-         - 모든 챔피언과 아이템은 한국어로 출력할 것. 영어로 절대 나타내지 않을 것
-         - team 100은 블루팀, team 200은 레드팀으로 출력할 것 ('team100', 'team200' 단어는 출력에 나오지 않음)
-         - 스킬에 대해 언급할 때에는 {full_skill_dict}을 참고해, 틀리지 않도록 매치하여 그 스킬의 키(Q,W,E,R)와 한국어 번역으로 언급할 것 ( ex : '키'('스킬명"), 챔피언 이름은 붙이지 말기(caitlynq -> Q(필트오버 피스메이커)))
-         - 챔피언에 대해 언급할 때에는 {full_champion_dict}을 참고해 꼭 한국어로 이름을 표기하고, 영어 이름은 출력 어디에도 절대 표기하지 말 것.
-         - basickattack이 들어가면 "기본 공격" 으로만 번역할것 (ex : caitlynbasicattack ->  기본 공격)
-         - 핑 또한 한국어로 번역하여 언급할 것 (예 : 위험핑, 미아핑)
-         - API에서 숫자로 존재하는 raw data 내용들을 출력에 절대 포함하지 말 것.
-         - Horde는 전령으로 번역할것, BARON_NASHOR는 바론으로 번역할 것
-                          
-
-
-        모든 내용
-
-        # Analysis Target
-        - **분석 대상 플레이어**: {target_champion} ({target_position})
-        - **상대 라이너/조합**: {enemy_champions}
-        - **감지된 중요 장면**: {detected_moments}
-
-        # Data Sources
-        1. **Game Logs (API Data)**: {match_context}
-        2. **Wiki Knowledge**: {knowledge_context}
-
-        # Report Structure (JSON Output Only)
-        아래 목차에 맞춰 분석 내용을 JSON 키(Key)에 매핑하여 작성하십시오. 
-        **Markdown 태그(```json 등) 없이 순수 JSON 문자열만 출력해야 합니다.**
-                                                       
-        # 모든 플레이어의 역할 및 승리/패배 기여로 분류
-            분석 가이드라인:
-
-            1. 챔피언 & 포지션 식별: 입력된 챔피언들이 해당 포지션에서 어떤 역할(예: 탱커, 하이퍼 캐리, 유틸폿, 암살자 등)인지 파악하십시오.
-            2. 핵심 지표 가중치 평가: 아래 기준으로 역할 유형을 플레이어들별로 나누고 우선순위 지표를 다르게 해석하십시오.
-
-            A. 캐리 라인 (Top 칼챔, Mid 메이지/암살자, Bot 원딜):
-            평가 기준: KDA(특히 데스 관리), 챔피언에게 가한 피해량(DPM), 분당 골드/CS.
-            평가: 딜량이 팀 내 1~2위가 아니거나 데스가 많으면 "성장 못한 캐리"로 혹평할 것.
-                                                       
-            B. 탱커 & 이니시에이터 (Top 탱커, Jungle 탱커, Sup 탱커):**
-            최우선: 받은 피해량 + 경감된 피해량(탱킹 능력), 군중 제어(CC) 점수, 어시스트.
-            평가: 데스가 다소 많더라도 어시스트와 탱킹 지표가 높으면 "든든한 방패"로 호평할 것.
-                                                       
-            C. 유틸리티 & 서포터 (Sup 유틸):**
-            최우선: 시야 점수, 킬 관여율(KP%), 힐/보호막 양, 제어 와드 구매 수.
-            평가: 시야 점수가 낮거나 데스가 많으면 "시야 없는 맛집"으로 혹평할 것.
-                                                       
-            D. 정글러 (Jungle 성장/갱킹):**
-            최우선: 오브젝트(용/바론) 획득 기여, 킬 관여율, 초반 15분 지표.
-            평가: 딜량보다는 게임 전체에 미친 영향력(라인 개입)을 중심으로 볼 것.
-                                                       
-                                                
-            3. 분석 결과와 승패여부를 이용해서, 플레이어들의 승리/패배 기여 유형을 4가지로 나누시오
-                                                       
-            A. 플레이어가 잘 했고 게임을 이긴 경우 (게임을 캐리했다)
-            B. 플레이어가 잘 했지만 게임을 졌다 (팀운이 좋지 않았다)
-            C. 플레이어가 못 했지만 게임을 이겼다. (팀을 잘 만나서 이겼다, 버스탔다)
-            D. 플레이어가 못 해서 게임을 졌다. (게임 패배에 큰 기여)
-                                                       
-        출력 내용  :                                            
-
-        1. "player_keyword": (⚡ 한 단어로 플레이스타일 요약)
-         - 분석 대상 플레이어의 스타일을 한 단어로 요약해서 제시. (예시: 전장의 지배자, 진영 파괴자, 최후의 보루, 상대 팀의 악몽, 기적의 역전가 등)
-         - 이 내용을 누락하지 말고 꼭 제시할 것.
-
-
-        2. "one_line_review": (⚡ 한줄평)
-        - 분석 대상 플레이어의 활약상을 한 문장으로 요약. (등급을 부여하지 않을 것)
-
-            4가지로 나누어진 플레이어 유형과 승리/패배 기여 유형에 따라 플레이에 대한 평가를 모두 총합해서, 
-                                               
-            이 플레이어에게 어울리는 한줄평을 작성한다.
-
-            이때, 적당한 유머와 구어체를 사용해서 작성할 것.
-                                                       
-            예시) 원거리 딜러의 플레이어가 잘 했지만 게임을 진 경우 : 
-            "혼자서 통나무를 열심히 들었지만, 팀원들이 통나무를 던지고 말았습니다."
-
-
-        3. "match_flow": (🗺️ 경기 전체 흐름)
-           - **예상 양상**:
-               - 분석 대상 플레이아가 속한 팀을 **우리팀** 으로 두고, 속하지 않은 팀을 **상대팀**으로 둘 것.
-               1. 팀별로 챔피언 조합에 따라 싸움 / 운영을 어떻게 진행해야 하는지 제시할 것.
-               2. 우리팀이 상대팀을 이기기 위해서 플레이어가 맡아야 할 역할을 제시
-                                                       
-           - **게임의 실제 진행 내용**: 
-               1. 초반 라인전 -> 중반 운영 -> 후반 한타 흐름 요약, 골드 차이와 및 승부처에 발생한 사건들을 설명해줄 것.
-                                                       
-
-        4. "skirmish_analysis": (⚔️ 교전 맥락 정밀 분석)
-            **교전 장면에 대한 개관 및 요약**
-                - 감지된 주요 장면({detected_moments})이 **발생하기 이전 상황**에 대해 알려줄 것(대형 오브젝트 등)을 알려줄 것.
-                - 대상 플레이어가 속한 팀에 주요 장면의 **교전을 이기기 위한 핵심 포인트** 제시
-                - **교전의 진행 과정 및 결과**에 대한 분석 제공
-                - 각 장면별로 **[시간]**, **[배경]**(교전 트리거, 유불리), **[플레이어 코칭]**(포지션, 스킬, 포커싱, damage_received 참고), **[피드백]**(Good/Bad) 내용을 포함하여 서술.
-            
-            **대상 플레이어 중심 코칭 진행**
-                - 본 주요 장면에서 **플레이어가 수행해야 할 역할을 제시**하고, 이를 잘 수행했는지 피드백할것
-                - 이외에도 교전을 대상 **플레이어가 유리하게 진행할 수 있도록 하는 요인**에 대해 언급해주기
-                                                       
-
-        5. "play_eval": (📊 대상 플레이어의 플레이 및 아이템 평가) : 이때 긍정 및 부정적 관점에 치우치지 않을 것.
-           - **역할 수행**: 딜량/탱킹/시야 지표를 바탕으로 대상 플레이어가 수행해야 할 역할을 잘 진행하였는지 평가할 것.
-                                                    
-           - **아이템**: 플레이어의 역할과 상대 조합을 고려해서 아이템을 적절히 구매하였는지 평가. 
-
-        6. "team_atmosphere": (🔊 팀 분위기)
-           - 핑 데이터(`pings`)를 기반으로 한 소통 및 오더 갈림 진단.
-            특히 물음표핑과 위험핑이 적재적소에 사용되었는지, 아니면 아군에게 감정을 표시하기 위한 용도로 사용되었는지 확인해볼 것
-            하나의 단락으로 설정할 것
-
-        # Output Tone
-        - 전문적인 e스포츠 해설가처럼 분석적이지만, 플레이어의 성장을 돕는 코치처럼 구체적이고 실용적인 조언을 하십시오.
-        - 게임 관련 영어 raw data 내용을 모두 한국어로 변환하고, **영어 원문 내용은 절대 포함하지 마시오**.
-        - 라이엇 API에 존재하는 모든 숫자 형태의 raw data는 실제 data dragon에 있는 내용으로 맞춘 후 제시하고, **절대 raw data가 출력되는 일은 없도록 하시오**.(예시 : 3124 -> 그림자 검)
-        """)
-
-      
-
-    def generate_report(self, match_data: Dict, timeline_data: Dict, target_puuid: str) -> Dict:
+        self.llm = ChatGoogleGenerativeAI(model=LLM_MODEL, temperature=LLM_TEMPERATURE)
+        # 워커 전체에서 동시에 진행하는 LLM 호출 수 제한
+        self.llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+        # 2. 프롬프트
+        # single 모드: 전체 분석용 하나 / sections 모드: 항목 묶음별 프롬프트
+        self.prompt = ChatPromptTemplate.from_template(build_report_template())
+        self.section_prompts = {
+            group: ChatPromptTemplate.from_template(build_section_template(group)) for group in SECTION_GROUPS
+        }
+        active_prompts = [self.prompt] if REPORT_MODE != "sections" else list(self.section_prompts.values())
+        self.prompt_hash = prompt_hash(REPORT_MODE, *(m.prompt.template for p in active_prompts for m in p.messages))
+
+    def report_cache_key(self, match_id: Optional[str], target_puuid: str):
         """
-        API 데이터를 받아 JSON 분석 결과를 반환하는 메인 함수
+        서버가 직접 불러온 매치일 때만 캐시 키 생성 (프롬프트 / 모델 / temperature가 바뀌면 키도 바뀜)
+        요청 본문으로 받은 매치 데이터의 metadata.matchId는 클라이언트가 임의로 넣을 수 있으므로 쓰지 않음
+        """
+        if not match_id or not target_puuid:
+            return None
+        return report_key(match_id, target_puuid, self.prompt_hash, LLM_MODEL, LLM_TEMPERATURE)
+
+    async def _load_cached_report(self, cache_key, refresh: bool):
+        if cache_key is None or refresh:
+            return None
+        report = await asyncio.to_thread(report_cache.get, cache_key)
+        if report is not None:
+            print(f"♻️ 캐시된 분석 결과 사용: {cache_key}")
+        return report
+
+    @asynccontextmanager
+    async def llm_slot(self, deadline: float):
+        """LLM 동시 실행 슬롯 (마감 시각까지 못 받으면 AnalysisBusyError)"""
+        try:
+            await until_deadline(self.llm_semaphore.acquire(), deadline)
+        except asyncio.TimeoutError:
+            raise AnalysisBusyError("LLM 대기열에서 분석 마감 시간을 넘었습니다.")
+        try:
+            yield
+        finally:
+            self.llm_semaphore.release()
+
+    async def _store_report(self, cache_key, report: Dict):
+        # 파싱에 실패한 응답은 저장하지 않음 (다음 요청에서 다시 생성)
+        if cache_key is not None and all(report.get(section) for section in REPORT_SECTIONS):
+            await asyncio.to_thread(report_cache.set, cache_key, report)
+
+    def prepare_match(self, match_data: Dict, timeline_data: Dict, match_id: Optional[str] = None) -> Dict:
+        """
+        분석 대상과 무관한 매치 단위 전처리 (같은 매치를 여러 플레이어로 분석할 때 한 번만 실행)
+        전처리 / 번역 사전 / 중요 장면 감지 등 CPU 작업과 Data Dragon 로딩이 섞여 있으므로 이벤트 루프 밖에서 실행
         """
         # 1. API 데이터 전처리
-        processor = RiotMatchDataProcessor(match_data, timeline_data)
+        processor = RiotMatchDataProcessor(match_data, timeline_data, match_id)
         processed_context = processor.generate_context()
-        
+        players = processed_context['match_summary']['players']
+
+        # 이 매치에 나온 챔피언/아이템만 번역 사전으로 잘라내고, 아이템 ID는 서버에서 한글 이름으로 변환
+        dictionaries = build_match_dictionaries(
+            [p['championName'] for p in players],
+            [item_id for p in players for item_id in p['items']],
+        )
+        for p in players:
+            p['items'] = [dictionaries['items'].get(str(item_id), item_id) for item_id in p['items'] if item_id]
+
+        # 2. 중요 장면 감지
+        detector = MatchEventDetector(processed_context['timeline_flow'])
+        detected_moments = detector.detect_key_moments()
+        key_minutes = detector.detect_key_minutes()
+
+        prepared = {
+            "processed_context": processed_context,
+            "key_minutes": key_minutes,
+            "detected_moments": ", ".join(detected_moments),
+            "skill_dict": json.dumps(dictionaries['skills'], ensure_ascii=False),
+            "champion_dict": json.dumps(dictionaries['champions'], ensure_ascii=False),
+        }
+        if REPORT_MODE == "sections":
+            prepared["section_contexts"] = build_section_contexts(processed_context, key_minutes)
+        return prepared
+
+    def target_inputs(self, prepared: Dict, target_puuid: str) -> Dict:
+        """prepare_match 결과에서 분석 대상 플레이어 기준 프롬프트 입력값 생성"""
+        processed_context = prepared['processed_context']
+
         # 타겟 플레이어 정보
         players = processed_context['match_summary']['players']
         # PUUID가 없으면 첫 번째 플레이어로 대체 (안전장치)
         target_info = next((p for p in players if p.get('puuid') == target_puuid), players[0])
-        
+
         target_champion = target_info['championName']
         target_position = target_info['teamPosition']
         target_team = target_info['teamId']
@@ -377,43 +382,111 @@ class RAGService:
         enemy_champs = [p['championName'] for p in players if p['teamId'] == enemy_team_id]
         enemy_champs_str = ", ".join(enemy_champs)
 
-        # 2. 중요 장면 감지
-        detector = MatchEventDetector(processed_context['timeline_flow'])
-        detected_moments = detector.detect_key_moments()
-        detected_moments_str = ", ".join(detected_moments)
-        
-        # 3. 지식(Wiki) 검색
-        knowledge_text = "외부 지식 없음"
-        if self.retriever:
-            query = f"{target_champion} {target_position} 운영법 vs {enemy_champs_str}"
-            docs = self.retriever.invoke(query)
-            knowledge_text = "\n".join([f"[문서: {d.metadata.get('source', 'Wiki')}] {d.page_content}" for d in docs])
-
-        # 4. LLM 실행
-        print(f"🤖 AI 분석 시작 (Model: {LLM_MODEL}): {target_champion} ({target_position})")
-        chain = self.prompt | self.llm | StrOutputParser()
-        
-        match_context_str = json.dumps(processed_context, ensure_ascii=False)
-        
-        # 토큰 제한을 고려하여 Context 길이 조절
-        response_text = chain.invoke({
+        inputs = {
             "target_champion": target_champion,
             "target_position": target_position,
             "enemy_champions": enemy_champs_str,
-            "detected_moments": detected_moments_str,
-            "match_context": match_context_str[:30000],
-            "knowledge_context": knowledge_text,
-            "full_skill_dict" : full_skill_dict,
-            "full_champion_dict" : full_champion_dict
-            
-        })
-
-        # 5. JSON 파싱
+            "detected_moments": prepared['detected_moments'],
+            "skill_dict" : prepared['skill_dict'],
+            "champion_dict" : prepared['champion_dict']
+        }
+        if REPORT_MODE == "sections":
+            inputs["section_contexts"] = prepared['section_contexts']
+        else:
+            # 토큰 예산에 맞춰 중요 장면 / 대상 플레이어 위주로 경기 로그 압축 (항상 올바른 JSON)
+            inputs["match_context"] = compact_match_context(
+                processed_context, target_info.get('puuid'), prepared['key_minutes'], MATCH_CONTEXT_TOKEN_BUDGET
+            )
+        return inputs
+
+    def prepare_report_inputs(self, match_data: Dict, timeline_data: Dict, target_puuid: str,
+                              match_id: Optional[str] = None) -> Dict:
+        """LLM 호출 전의 동기 작업 (매치 전처리 + 대상 플레이어 입력값)"""
+        return self.target_inputs(self.prepare_match(match_data, timeline_data, match_id), target_puuid)
+
+    async def hybrid_search(self, query: str, champions: List[str]) -> List[Document]:
+        """
+        매치 챔피언 문서로 범위를 좁힌 하이브리드 검색
+        1. source 메타데이터가 챔피언 이름(ID/영문/한글)인 청크만 대상으로 벡터 검색
+        2. 같은 범위에서 BM25 키워드 검색 (질의 + 챔피언 이름)
+        3. 두 순위를 RRF(상수 RETRIEVER_RRF_K)로 합쳐 상위 RETRIEVER_K개
+        (필터에 걸리는 문서가 하나도 없으면 전체 대상 벡터 검색)
+        """
+        aliases = await asyncio.to_thread(champion_aliases, champions)
+        where = {"source": {"$in": aliases}}
+        vector_docs = await self.vectorstore.asimilarity_search(query, k=RETRIEVER_CANDIDATES, filter=where)
+        lexical = []
+        if self.bm25 is not None:
+            lexical_query = f"{query} {' '.join(aliases)}"
+            lexical = await asyncio.to_thread(self.bm25.search, lexical_query, RETRIEVER_CANDIDATES, aliases)
+
+        if not vector_docs and not lexical:
+            return await self.retriever.ainvoke(query)
+
+        docs_by_id = {doc.id: doc for doc in vector_docs}
+        fused = reciprocal_rank_fusion(
+            [[doc.id for doc in vector_docs], [doc_id for doc_id, _ in lexical]], k=RETRIEVER_RRF_K
+        )
+        fused = fused[:RETRIEVER_K]
+
+        # BM25에서만 나온 청크는 벡터 DB에서 본문/메타데이터 조회
+        missing = [doc_id for doc_id in fused if doc_id not in docs_by_id]
+        if missing:
+            found = await asyncio.to_thread(self.vectorstore.get, ids=missing)
+            for doc_id, text, metadata in zip(found["ids"], found["documents"], found["metadatas"]):
+                docs_by_id[doc_id] = Document(id=doc_id, page_content=text, metadata=metadata or {})
+        return [docs_by_id[doc_id] for doc_id in fused if doc_id in docs_by_id]
+
+    async def retrieve(self, query: str, champions: Optional[List[str]] = None) -> List[Document]:
+        """
+        벡터 DB 검색. 같은 질의(정규화 기준) + 같은 DB 버전이면 캐시된 결과를 그대로 사용합니다.
+        (DB를 다시 만들면 버전이 바뀌어 자동으로 새로 검색)
+        champions를 주고 HYBRID_RETRIEVAL이 켜져 있으면 하이브리드 검색을 사용합니다.
+        """
+        query = normalize_query(query)
+        hybrid = HYBRID_RETRIEVAL and bool(champions)
+        scope = "hybrid:" + ",".join(sorted(champions)) if hybrid else ""
+        db_version = await asyncio.to_thread(get_db_version)
+        key = None
+        if db_version:
+            # 하이브리드 검색 결과는 후보 수 / RRF 상수에 따라 달라짐
+            key = (retrieval_key(db_version, RETRIEVER_K, query, scope, RETRIEVER_CANDIDATES, RETRIEVER_RRF_K) if hybrid
+                   else retrieval_key(db_version, RETRIEVER_K, query))
+        if key:
+            docs = await asyncio.to_thread(get_cached_documents, key)
+            if docs is not None:
+                return docs
+
+        if hybrid:
+            docs = await self.hybrid_search(query, champions)
+        else:
+            docs = await self.retriever.ainvoke(query)
+        if key:
+            await asyncio.to_thread(set_cached_documents, key, docs)
+        return docs
+
+    async def search_knowledge(self, target_champion: str, target_position: str, enemy_champs_str: str) -> str:
+        """지식(Wiki) 검색"""
+        if not self.retriever:
+            return "외부 지식 없음"
+        # 상대 챔피언 순서만 다른 질의도 같은 캐시를 쓰도록 정렬
+        enemies = sorted(enemy_champs_str.split(", "))
+        query = f"{target_champion} {target_position} 운영법 vs {', '.join(enemies)}"
+        docs = await self.retrieve(query, champions=[target_champion, *enemies])
+        return "\n".join([f"[문서: {d.metadata.get('source', 'Wiki')}] {d.page_content}" for d in docs])
+
+    @staticmethod
+    def _loads_response(response_text: str) -> Dict:
+        # Markdown 코드블럭(```json) 제거 로직
+        cleaned_text = re.sub(r"^```json", "", response_text.strip(), flags=re.MULTILINE)
+        cleaned_text = re.sub(r"^```", "", cleaned_text, flags=re.MULTILINE).strip()
+        return json.loads(cleaned_text)
+
+    @staticmethod
+    def parse_report(response_text: str) -> Dict:
+        """LLM 응답 텍스트 -> JSON"""
         try:
-            # Markdown 코드블럭(```json) 제거 로직
-            cleaned_text = re.sub(r"^```json", "", response_text.strip(), flags=re.MULTILINE)
-            cleaned_text = re.sub(r"^```", "", cleaned_text, flags=re.MULTILINE).strip()
-            return json.loads(cleaned_text)
+            return RAGService._loads_response(response_text)
         except json.JSONDecodeError:
             print("⚠️ JSON 파싱 실패, 원본 텍스트 반환")
             return {
@@ -421,5 +494,222 @@ class RAGService:
                 "match_flow": response_text
             }
 
+    async def generate_section_group(self, group: str, inputs: Dict, deadline: float) -> Dict:
+        """sections 모드: 항목 묶음 하나를 생성 (해당 묶음의 키만 담은 dict)"""
+        spec = SECTION_GROUPS[group]
+        chain = self.section_prompts[group] | self.llm | StrOutputParser()
+        values = {
+            **{k: v for k, v in inputs.items() if k not in ("section_contexts", "knowledge_context")},
+            "section_context": inputs["section_contexts"][group],
+            "knowledge_context": inputs["knowledge_context"] if spec["knowledge"] else "해당 없음",
+        }
+        async with self.llm_slot(deadline):
+            response_text = await until_deadline(chain.ainvoke(values), deadline)
+
+        try:
+            parsed = self._loads_response(response_text)
+        except json.JSONDecodeError:
+            print(f"⚠️ [{group}] JSON 파싱 실패, 원본 텍스트 반환")
+            # 첫 항목에 원본 텍스트를 넣고 나머지는 비워둠 (캐시 저장 대상에서 제외됨)
+            return {key: response_text if i == 0 else "" for i, key in enumerate(spec["keys"])}
+        return {key: parsed.get(key, "") for key in spec["keys"]}
+
+    def _section_tasks(self, inputs: Dict, deadline: float) -> List["asyncio.Task"]:
+        return [
+            asyncio.ensure_future(self.generate_section_group(group, inputs, deadline)) for group in SECTION_GROUPS
+        ]
+
+    @staticmethod
+    def _merge_sections(parts: List[Dict]) -> Dict:
+        """항목 묶음 결과를 REPORT_SECTIONS 순서의 리포트 하나로 병합"""
+        merged = {}
+        for part in parts:
+            merged.update(part)
+        return {section: merged.get(section, "") for section in REPORT_SECTIONS}
+
+    async def build_report_inputs(self, match_data: Dict, timeline_data: Dict, target_puuid: str,
+                                  match_id: Optional[str] = None) -> Dict:
+        """전처리 / 중요 장면 감지 / 지식 검색까지 마친 프롬프트 입력값"""
+        # 1~2. 전처리 / 중요 장면 감지
+        inputs = await asyncio.to_thread(self.prepare_report_inputs, match_data, timeline_data, target_puuid, match_id)
+
+        # 3. 지식(Wiki) 검색
+        inputs["knowledge_context"] = await self.search_knowledge(
+            inputs["target_champion"], inputs["target_position"], inputs["enemy_champions"]
+        )
+        return inputs
+
+    async def generate_report(self, match_data: Dict, timeline_data: Dict, target_puuid: str,
+                              refresh: bool = False, match_id: Optional[str] = None) -> Dict:
+        """
+        API 데이터를 받아 JSON 분석 결과를 반환하는 메인 함수
+        - 같은 매치/플레이어/프롬프트/모델의 결과는 리포트 캐시에서 반환 (refresh=True면 새로 생성 후 캐시 갱신)
+          (match_id: 서버의 매치 저장소에서 불러온 매치의 ID. 없으면 리포트 캐시를 쓰지 않음)
+        - LLM 동시 실행 수는 LLM_MAX_CONCURRENCY로 제한 (초과 요청은 대기)
+        - 전처리 / 지식 검색 / LLM 대기열 / LLM 호출 전체가 LLM_TIMEOUT_SECONDS를 넘으면 asyncio.TimeoutError
+          (LLM 대기열에서 넘으면 AnalysisBusyError)
+        """
+        cache_key = self.report_cache_key(match_id, target_puuid)
+        cached = await self._load_cached_report(cache_key, refresh)
+        if cached is not None:
+            return cached
+
+        deadline = analysis_deadline()
+        inputs = await until_deadline(
+            self.build_report_inputs(match_data, timeline_data, target_puuid, match_id), deadline
+        )
+        report = await self._run_report(inputs, deadline)
+        await self._store_report(cache_key, report)
+        return report
+
+    async def _run_report(self, inputs: Dict, deadline: float) -> Dict:
+        """4~5. LLM 실행 + JSON 파싱 (REPORT_MODE에 따라 단일 프롬프트 / 항목별 동시 실행)"""
+        if REPORT_MODE == "sections":
+            print(f"🤖 AI 항목별 분석 시작 (Model: {LLM_MODEL}): {inputs['target_champion']} ({inputs['target_position']})")
+            tasks = self._section_tasks(inputs, deadline)
+            try:
+                return self._merge_sections(await asyncio.gather(*tasks))
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        chain = self.prompt | self.llm | StrOutputParser()
+        async with self.llm_slot(deadline):
+            print(f"🤖 AI 분석 시작 (Model: {LLM_MODEL}): {inputs['target_champion']} ({inputs['target_position']})")
+            response_text = await until_deadline(chain.ainvoke(inputs), deadline)
+        return self.parse_report(response_text)
+
+    async def stream_report(self, match_data: Dict, timeline_data: Dict, target_puuid: str,
+                            refresh: bool = False, match_id: Optional[str] = None) -> AsyncIterator[Dict]:
+        """
+        generate_report의 스트리밍 버전.
+        LLM 응답을 받는 대로 파싱해서 최상위 항목이 완성될 때마다
+        {"event": "section", "data": {"key", "value"}} 를 내보내고,
+        마지막에 전체 결과 {"event": "done", "data": 분석 결과} 를 내보냅니다.
+        (캐시 조회 이후 전체가 LLM_TIMEOUT_SECONDS를 넘으면 asyncio.TimeoutError, LLM 대기열에서 넘으면 AnalysisBusyError)
+        """
+        cache_key = self.report_cache_key(match_id, target_puuid)
+        cached = await self._load_cached_report(cache_key, refresh)
+        if cached is not None:
+            for key, value in cached.items():
+                yield {"event": "section", "data": {"key": key, "value": value}}
+            yield {"event": "done", "data": cached}
+            return
+
+        deadline = analysis_deadline()
+        inputs = await until_deadline(
+            self.build_report_inputs(match_data, timeline_data, target_puuid, match_id), deadline
+        )
+
+        if REPORT_MODE == "sections":
+            # 항목 묶음이 끝나는 순서대로 바로 전송
+            print(f"🤖 AI 항목별 스트리밍 분석 시작 (Model: {LLM_MODEL}): {inputs['target_champion']} ({inputs['target_position']})")
+            tasks = self._section_tasks(inputs, deadline)
+            parts = []
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    part = await next_done
+                    parts.append(part)
+                    for key, value in part.items():
+                        yield {"event": "section", "data": {"key": key, "value": value}}
+            finally:
+                for task in tasks:
+                    task.cancel()
+            report = self._merge_sections(parts)
+            await self._store_report(cache_key, report)
+            yield {"event": "done", "data": report}
+            return
+
+        chain = self.prompt | self.llm | StrOutputParser()
+        parser = JsonSectionParser()
+        async with self.llm_slot(deadline):
+            print(f"🤖 AI 스트리밍 분석 시작 (Model: {LLM_MODEL}): {inputs['target_champion']} ({inputs['target_position']})")
+            stream = chain.astream(inputs).__aiter__()
+            try:
+                while True:
+                    try:
+                        chunk = await until_deadline(stream.__anext__(), deadline)
+                    except StopAsyncIteration:
+                        break
+                    for key, value in parser.feed(chunk):
+                        yield {"event": "section", "data": {"key": key, "value": value}}
+            finally:
+                await stream.aclose()
+
+        report = self.parse_report(parser.buffer)
+        await self._store_report(cache_key, report)
+        yield {"event": "done", "data": report}
+
+    async def generate_reports(self, matches: Dict[str, Tuple[Dict, Dict]], target_puuids: List[str],
+                               refresh: bool = False,
+                               concurrency: int = BATCH_MAX_CONCURRENCY) -> AsyncIterator[Dict]:
+        """
+        여러 매치 x 여러 플레이어 일괄 분석. 끝나는 순서대로 결과를 하나씩 내보냅니다.
+        - matches: 매치 ID -> (match_data, timeline_data) (서버의 매치 저장소에서 불러온 매치, 매치 ID로 리포트 캐시 사용)
+        - 각 매치에 실제로 참가한 PUUID만 분석
+        - 매치 전처리(prepare_match)는 매치당 한 번, 같은 챔피언/포지션/상대 조합의 지식 검색은 한 번만 실행
+        - 동시에 진행하는 리포트 수는 concurrency로 제한 (LLM 호출 자체는 LLM_MAX_CONCURRENCY 공유)
+        - 리포트마다 차례가 된 시점부터 LLM_TIMEOUT_SECONDS 마감 (공유 전처리/검색 작업은 마감돼도 취소하지 않음)
+
+        내보내는 값: {"match_id", "target_puuid", "report"} 또는 {"match_id", "target_puuid", "status", "error"}
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        prepared_tasks: Dict[str, asyncio.Future] = {}
+        knowledge_tasks: Dict[Tuple, asyncio.Future] = {}
+
+        def prepared_for(match_id: str) -> asyncio.Future:
+            if match_id not in prepared_tasks:
+                match_data, timeline_data = matches[match_id]
+                prepared_tasks[match_id] = asyncio.ensure_future(
+                    asyncio.to_thread(self.prepare_match, match_data, timeline_data, match_id)
+                )
+            return prepared_tasks[match_id]
+
+        def knowledge_for(inputs: Dict) -> asyncio.Future:
+            enemies = tuple(sorted(inputs["enemy_champions"].split(", ")))
+            key = (inputs["target_champion"], inputs["target_position"], enemies)
+            if key not in knowledge_tasks:
+                knowledge_tasks[key] = asyncio.ensure_future(self.search_knowledge(
+                    inputs["target_champion"], inputs["target_position"], inputs["enemy_champions"]
+                ))
+            return knowledge_tasks[key]
+
+        async def analyze(match_id: str, puuid: str) -> Dict:
+            result = {"match_id": match_id, "target_puuid": puuid}
+            try:
+                cache_key = self.report_cache_key(match_id, puuid)
+                report = await self._load_cached_report(cache_key, refresh)
+                if report is None:
+                    async with semaphore:
+                        deadline = analysis_deadline()
+                        prepared = await until_deadline(asyncio.shield(prepared_for(match_id)), deadline)
+                        inputs = await until_deadline(asyncio.to_thread(self.target_inputs, prepared, puuid), deadline)
+                        inputs["knowledge_context"] = await until_deadline(asyncio.shield(knowledge_for(inputs)), deadline)
+                        report = await self._run_report(inputs, deadline)
+                    await self._store_report(cache_key, report)
+                result["report"] = report
+            except AnalysisBusyError:
+                result.update({"status": 503, "error": "분석 요청이 많아 처리하지 못했습니다. 잠시 후 다시 시도해주세요."})
+            except asyncio.TimeoutError:
+                result.update({"status": 504, "error": "AI 분석 시간이 초과되었습니다."})
+            except Exception as e:
+                print(f"Batch Analysis Error ({match_id}, {puuid}): {e}")
+                result.update({"status": 500, "error": str(e)})
+            return result
+
+        jobs = []
+        for match_id, (match_data, _) in matches.items():
+            participants = {p.get('puuid') for p in match_data.get('info', {}).get('participants', [])}
+            jobs.extend((match_id, puuid) for puuid in target_puuids if puuid in participants)
+
+        tasks = [asyncio.ensure_future(analyze(match_id, puuid)) for match_id, puuid in jobs]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 클라이언트 연결이 끊기면 남은 분석 중단
+            for task in tasks + list(prepared_tasks.values()) + list(knowledge_tasks.values()):
+                task.cancel()
+
 # 싱글톤 인스턴스 (외부에서 import하여 사용)
 rag_service = RAGService()
\ No newline at end of file
@@ -1,7 +1,11 @@
 import os
+import re
+from importlib.util import find_spec
 from pathlib import Path
 from dotenv import load_dotenv
 
+from services.settings import CACHE_DIR
+
 load_dotenv()
 
 # 프로젝트 루트 경로 (2차인콘)
@@ -15,11 +19,93 @@ JSON_DIR = DATA_DIR / "preprocessed" / "namuwiki" / "outputs" / "per-article"
 
 JSON_DIR_OPGG = DATA_DIR / "preprocessed" / "opgg" / "outputs"
 
+# [모델 설정]
+# 임베딩 백엔드
+# - openai: OpenAI API (text-embedding-3-small)
+# - sentence-transformers: 로컬 CPU 모델 (LOCAL_EMBEDDING_MODEL, sentence-transformers 설치 필요)
+# - onnx: chromadb 내장 ONNX all-MiniLM-L6-v2 (추가 설치 불필요, 영어 위주 모델)
+# - local: sentence-transformers가 설치되어 있으면 sentence-transformers, 아니면 onnx
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+if EMBEDDING_BACKEND == "local":
+    EMBEDDING_BACKEND = "sentence-transformers" if find_spec("sentence_transformers") else "onnx"
+
+# sentence-transformers 백엔드 모델 (한국어 문서가 많으므로 다국어 모델 기본)
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+# 로컬 백엔드 추론 배치 크기 / CPU 스레드 수 (0이면 라이브러리 기본값, 스레드 수는 sentence-transformers만 적용)
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32"))
+LOCAL_EMBEDDING_THREADS = int(os.getenv("LOCAL_EMBEDDING_THREADS", "0"))
+
+if EMBEDDING_BACKEND == "sentence-transformers":
+    EMBEDDING_MODEL = LOCAL_EMBEDDING_MODEL
+elif EMBEDDING_BACKEND == "onnx":
+    EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+else:
+    EMBEDDING_MODEL = "text-embedding-3-small"
+
 # 벡터 DB 저장 경로
-DB_PATH = DATA_DIR / "chroma_db"
+# 백엔드/모델마다 벡터 공간이 다르므로 DB(및 BM25 인덱스, manifest)를 따로 둠 (openai는 기존 경로 유지)
+if EMBEDDING_BACKEND == "openai":
+    DB_PATH = DATA_DIR / "chroma_db"
+else:
+    DB_PATH = DATA_DIR / ("chroma_db_" + re.sub(r"[^0-9A-Za-z._-]+", "_", f"{EMBEDDING_BACKEND}_{EMBEDDING_MODEL}"))
+# 청크 본문 BM25 키워드 인덱스 (create_db에서 벡터 DB와 함께 생성)
+BM25_INDEX_PATH = DB_PATH / "bm25_index.npz"
+# 증분 구축용 청크 목록 (청크 ID = 파일명 + 본문 해시)
+DB_MANIFEST_PATH = DB_PATH / "manifest.json"
 
-# [모델 설정]
-EMBEDDING_MODEL = "text-embedding-3-small"
+# Data Dragon (챔피언/스킬/아이템 이름) 로컬 캐시 경로
+DDRAGON_DIR = DATA_DIR / "ddragon"
+# 최신 버전(versions.json) 확인 주기 (시간)
+DDRAGON_VERSION_CHECK_HOURS = int(os.getenv("DDRAGON_VERSION_CHECK_HOURS", "24"))
+
+# DB 구축 시 JSON 파싱/청크 분할을 실행할 프로세스 수 (1이면 프로세스 풀 없이 현재 프로세스에서 처리)
+DB_BUILD_WORKERS = int(os.getenv("DB_BUILD_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+
+# DB 구축 임베딩 단계: 배치 크기 / 동시에 진행할 배치 수 / 배치당 재시도 횟수
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+# (로컬 백엔드는 배치 하나가 CPU를 모두 쓰므로 기본 1)
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4" if EMBEDDING_BACKEND == "openai" else "1"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+# (모델, 청크 본문 해시) -> 임베딩 캐시 (DB 폴더 밖에 두어 전체 재구축 때도 재사용)
+EMBEDDING_CACHE_PATH = Path(os.getenv("EMBEDDING_CACHE_PATH", DATA_DIR / "embedding_cache.sqlite3"))
+# 임베딩 캐시 최대 용량 (MB, 넘으면 오래 안 쓴 벡터부터 제거 — 예전 모델/백엔드의 벡터가 먼저 빠짐)
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", "2048"))
 
 # LLM: Google Gemini (빠름/무료 티어)
-LLM_MODEL = "gemini-2.5-flash"
\ No newline at end of file
+LLM_MODEL = "gemini-2.5-flash"
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.5"))
+
+# 리포트 생성 방식
+# - single: 하나의 프롬프트로 전체 항목 생성
+# - sections: 항목별 프롬프트(필요한 데이터만 포함)를 동시에 실행 후 병합
+REPORT_MODE = os.getenv("REPORT_MODE", "single")
+
+# single 모드에서 경기 로그(match_context)에 쓸 토큰 예산 (추정치 기준)
+MATCH_CONTEXT_TOKEN_BUDGET = int(os.getenv("MATCH_CONTEXT_TOKEN_BUDGET", "8000"))
+
+# LLM 호출 제한: 워커 전체에서 동시에 진행할 분석 수
+# / 분석 하나의 마감 시간 (초, 전처리 + 지식 검색 + LLM 대기열 + LLM 호출 전체)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+
+# 일괄 분석: 한 요청이 동시에 진행하는 리포트 수 (다른 사용자의 분석이 밀리지 않도록 LLM_MAX_CONCURRENCY보다 작게)
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "2"))
+# 일괄 분석: 한 요청에 넣을 수 있는 최대 매치 수 / PUUID 수
+BATCH_MAX_MATCHES = int(os.getenv("BATCH_MAX_MATCHES", "20"))
+BATCH_MAX_PLAYERS = int(os.getenv("BATCH_MAX_PLAYERS", "10"))
+
+# 분석 리포트 캐시 (매치 + PUUID + 프롬프트 해시 + 모델 + temperature 기준)
+REPORT_CACHE_PATH = Path(os.getenv("REPORT_CACHE_PATH", CACHE_DIR / "reports.sqlite3"))
+REPORT_CACHE_MAX_MB = int(os.getenv("REPORT_CACHE_MAX_MB", "256"))
+REPORT_CACHE_MAX_AGE_DAYS = float(os.getenv("REPORT_CACHE_MAX_AGE_DAYS", "30"))
+
+# 질의 임베딩 / 검색 결과 캐시 (같은 챔피언·포지션·상대 조합 질의 재사용)
+RETRIEVER_K = int(os.getenv("RETRIEVER_K", "3"))
+# 하이브리드 검색: 매치 챔피언 source 필터 + 벡터/BM25 각각 후보 RETRIEVER_CANDIDATES개를 RRF로 합침
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "true").lower() in ("1", "true", "yes")
+RETRIEVER_CANDIDATES = int(os.getenv("RETRIEVER_CANDIDATES", "10"))
+# RRF 점수 1 / (RETRIEVER_RRF_K + 순위) 의 상수 (클수록 하위 순위 후보의 비중이 커짐)
+RETRIEVER_RRF_K = int(os.getenv("RETRIEVER_RRF_K", "60"))
+RETRIEVAL_CACHE_PATH = Path(os.getenv("RETRIEVAL_CACHE_PATH", CACHE_DIR / "retrieval.sqlite3"))
+RETRIEVAL_CACHE_MAX_MB = int(os.getenv("RETRIEVAL_CACHE_MAX_MB", "256"))
+RETRIEVAL_CACHE_MEMORY_ITEMS = int(os.getenv("RETRIEVAL_CACHE_MEMORY_ITEMS", "1024"))
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+import asyncio
+import json
 import sys
 import os
 
@@ -11,18 +14,27 @@ if backend_dir not in sys.path:
     sys.path.append(backend_dir)
 
 try:
-    from rag.service import rag_service
+    from rag.service import rag_service, AnalysisBusyError
+    from rag.settings import BATCH_MAX_MATCHES, BATCH_MAX_PLAYERS
 except ImportError:
-    from backend.rag.service import rag_service
+    from backend.rag.service import rag_service, AnalysisBusyError
+    from backend.rag.settings import BATCH_MAX_MATCHES, BATCH_MAX_PLAYERS
+from services.riot_service import get_match_detail
+from routers.responses import payload_response
 
 router = APIRouter(prefix="/coach", tags=["3. Coach"])
 
 # --- 모델 ---
 class FullGameContext(BaseModel):
-    match_data: Dict[str, Any] = Field(..., description="매치 데이터")
-    timeline_data: Dict[str, Any] = Field(..., description="타임라인 데이터")
+    match_id: Optional[str] = Field(None, description="매치 ID (서버에 저장된 매치 데이터를 사용)")
+    match_data: Optional[Dict[str, Any]] = Field(None, description="매치 데이터 (match_id 없이 직접 전달할 때)")
+    timeline_data: Optional[Dict[str, Any]] = Field(None, description="타임라인 데이터 (match_id 없이 직접 전달할 때)")
     target_puuid: Optional[str] = Field(None, description="분석 대상 PUUID")
 
+class BatchAnalysisRequest(BaseModel):
+    match_ids: List[str] = Field(..., description="분석할 매치 ID 목록")
+    target_puuids: List[str] = Field(..., description="분석 대상 PUUID 목록 (각 매치에 참가한 PUUID만 분석)")
+
 class AnalysisResponse(BaseModel):
     player_keyword : str
     one_line_review: str
@@ -31,25 +43,152 @@ class AnalysisResponse(BaseModel):
     play_eval: Any
     team_atmosphere: Any
 
+async def resolve_match_context(context: FullGameContext):
+    """
+    match_id가 있으면 서버의 매치 저장소에서, 없으면 요청 본문의 원본 JSON을 사용
+    반환: (match_data, timeline_data, 서버에서 불러온 매치 ID 또는 None — 리포트 캐시는 이 ID로만 사용)
+    """
+    if context.match_id:
+        detail = await get_match_detail(context.match_id)
+        if not detail:
+            raise HTTPException(status_code=404, detail="매치 정보를 찾을 수 없습니다.")
+        return detail['info'], detail['timeline'], context.match_id
+
+    if context.match_data and context.timeline_data:
+        return context.match_data, context.timeline_data, None
+
+    raise HTTPException(status_code=400, detail="match_id 또는 match_data/timeline_data 가 필요합니다.")
+
 # --- API ---
 @router.post("/analyze", response_model=AnalysisResponse)
-async def analyze_game(context: FullGameContext):
+async def analyze_game(request: Request, context: FullGameContext,
+                       refresh: bool = Query(False, description="true면 캐시된 분석 결과를 무시하고 새로 분석")):
     """
-    [3단계] 복사한 매치 데이터를 붙여넣으면 AI 분석 결과를 반환합니다.
-    (target_puuid가 꼭 있어야 합니다!)
+    [3단계] match_id 와 target_puuid 를 넣으면 AI 분석 결과를 반환합니다.
+    (target_puuid가 꼭 있어야 합니다! 기존처럼 match_data/timeline_data 원본을 넣어도 동작합니다.)
+    match_id로 요청한 매치/플레이어의 분석 결과는 캐시되어, 다시 요청하면 바로 반환됩니다. (원본 JSON 요청은 캐시하지 않음)
     """
     if not context.target_puuid:
         raise HTTPException(status_code=400, detail="target_puuid가 비어있습니다. JSON에 값을 채워주세요.")
 
+    match_data, timeline_data, match_id = await resolve_match_context(context)
+
     try:
-        result = rag_service.generate_report(
-            match_data=context.match_data,
-            timeline_data=context.timeline_data,
-            target_puuid=context.target_puuid
+        result = await rag_service.generate_report(
+            match_data=match_data,
+            timeline_data=timeline_data,
+            target_puuid=context.target_puuid,
+            refresh=refresh,
+            match_id=match_id
         )
-        return result
+        return payload_response(request, AnalysisResponse(**result).model_dump())
+    except AnalysisBusyError:
+        print(f"Analysis Busy: {context.match_id or 'inline match'}")
+        raise HTTPException(status_code=503, detail="분석 요청이 많아 처리하지 못했습니다. 잠시 후 다시 시도해주세요.",
+                            headers={"Retry-After": "10"})
+    except asyncio.TimeoutError:
+        print(f"Analysis Timeout: {context.match_id or 'inline match'}")
+        raise HTTPException(status_code=504, detail="AI 분석 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.")
     except Exception as e:
         print(f"Analysis Error: {e}")
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/analyze/stream")
+async def analyze_game_stream(context: FullGameContext,
+                              refresh: bool = Query(False, description="true면 캐시된 분석 결과를 무시하고 새로 분석")):
+    """
+    [3단계 스트리밍] /coach/analyze 와 같은 입력을 받아 분석 결과를 Server-Sent Events로 전송합니다.
+    - event: section  → {"key": "player_keyword", "value": ...} (항목이 완성되는 즉시, 생성 순서대로)
+    - event: done     → 전체 분석 결과 (/coach/analyze 응답과 같은 형식)
+    - event: error    → {"status": 503 | 504 | 500, "detail": ...}
+    """
+    if not context.target_puuid:
+        raise HTTPException(status_code=400, detail="target_puuid가 비어있습니다. JSON에 값을 채워주세요.")
+
+    match_data, timeline_data, match_id = await resolve_match_context(context)
+
+    async def generate():
+        try:
+            async for message in rag_service.stream_report(
+                match_data=match_data,
+                timeline_data=timeline_data,
+                target_puuid=context.target_puuid,
+                refresh=refresh,
+                match_id=match_id
+            ):
+                if message["event"] == "done":
+                    yield _sse("done", AnalysisResponse(**message["data"]).model_dump())
+                else:
+                    yield _sse(message["event"], message["data"])
+        except AnalysisBusyError:
+            print(f"Analysis Busy: {context.match_id or 'inline match'}")
+            yield _sse("error", {"status": 503, "detail": "분석 요청이 많아 처리하지 못했습니다. 잠시 후 다시 시도해주세요."})
+        except asyncio.TimeoutError:
+            print(f"Analysis Timeout: {context.match_id or 'inline match'}")
+            yield _sse("error", {"status": 504, "detail": "AI 분석 시간이 초과되었습니다. 잠시 후 다시 시도해주세요."})
+        except Exception as e:
+            print(f"Analysis Error: {e}")
+            import traceback
+            traceback.print_exc()
+            yield _sse("error", {"status": 500, "detail": str(e)})
+
+    # 프록시(nginx 등)가 이벤트를 모아서 보내지 않도록 버퍼링 비활성화
+    return StreamingResponse(generate(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.post("/analyze/batch")
+async def analyze_games_batch(batch: BatchAnalysisRequest,
+                              refresh: bool = Query(False, description="true면 캐시된 분석 결과를 무시하고 새로 분석")):
+    """
+    [3단계 일괄] 여러 매치 x 여러 플레이어를 한 번에 분석하고, 끝나는 순서대로 Server-Sent Events로 전송합니다.
+    (예: 한 매치의 팀원 5명 → match_ids 1개 + target_puuids 5개 / 최근 N게임 → match_ids N개 + target_puuids 1개)
+    - event: result → {"match_id", "target_puuid", "report": 분석 결과}
+    - event: error  → {"match_id", "target_puuid", "status", "detail"} (해당 항목만 실패, 나머지는 계속 진행)
+    - event: done   → {"completed": 성공 수, "failed": 실패 수}
+    """
+    match_ids = list(dict.fromkeys(batch.match_ids))
+    target_puuids = list(dict.fromkeys(batch.target_puuids))
+    if not match_ids or not target_puuids:
+        raise HTTPException(status_code=400, detail="match_ids 와 target_puuids 가 필요합니다.")
+    if len(match_ids) > BATCH_MAX_MATCHES or len(target_puuids) > BATCH_MAX_PLAYERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"한 번에 매치 {BATCH_MAX_MATCHES}개, 플레이어 {BATCH_MAX_PLAYERS}명까지 분석할 수 있습니다."
+        )
+
+    async def generate():
+        completed = failed = 0
+
+        details = await asyncio.gather(*(get_match_detail(match_id) for match_id in match_ids))
+        matches = {}
+        for match_id, detail in zip(match_ids, details):
+            if detail:
+                matches[match_id] = (detail['info'], detail['timeline'])
+            else:
+                failed += 1
+                yield _sse("error", {"match_id": match_id, "target_puuid": None, "status": 404,
+                                     "detail": "매치 정보를 찾을 수 없습니다."})
+
+        async for result in rag_service.generate_reports(matches, target_puuids, refresh=refresh):
+            item = {"match_id": result["match_id"], "target_puuid": result["target_puuid"]}
+            if "report" in result:
+                try:
+                    item["report"] = AnalysisResponse(**result["report"]).model_dump()
+                except Exception as e:
+                    result.update({"status": 500, "error": str(e)})
+            if "report" in item:
+                completed += 1
+                yield _sse("result", item)
+            else:
+                failed += 1
+                yield _sse("error", {**item, "status": result["status"], "detail": result["error"]})
+
+        yield _sse("done", {"completed": completed, "failed": failed})
+
+    return StreamingResponse(generate(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException, Query
+import json
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 import sys
 import os
 
@@ -10,7 +12,8 @@ backend_dir = os.path.dirname(current_dir)
 if backend_dir not in sys.path:
     sys.path.append(backend_dir)
 
-from services.riot_service import get_recent_matches, get_match_detail
+from services.riot_service import get_recent_matches, iter_recent_matches, get_match_detail
+from routers.responses import payload_response
 
 router = APIRouter(prefix="/match", tags=["2. Match"])
 
@@ -28,10 +31,19 @@ class MatchPreview(BaseModel):
     kda: Optional[float] = None
 
 class FullGameContext(BaseModel):
+    match_id: Optional[str] = None
     match_data: Dict[str, Any]
     timeline_data: Dict[str, Any]
     target_puuid: Optional[str] = None
 
+class MatchContextHandle(BaseModel):
+    """서버에 저장된 매치를 가리키는 핸들 (/coach/analyze 에 match_id 로 전달)"""
+    match_id: str
+    target_puuid: Optional[str] = None
+    game_mode: Optional[str] = None
+    game_duration: Optional[int] = None
+    game_creation: Optional[int] = None
+
 # --- API ---
 
 @router.get("/list/{puuid}", response_model=List[MatchPreview])
@@ -39,21 +51,46 @@ async def get_match_list(puuid: str, region: str = "KR", count: int = 5):
     """
     [2-1단계] PUUID로 최근 5게임의 매치 ID를 조회합니다.
     """
-    matches = get_recent_matches(puuid, region, count)
+    matches = await get_recent_matches(puuid, region, count)
     return matches
 
-@router.get("/detail/{match_id}", response_model=FullGameContext)
-async def get_match_raw_data(match_id: str, puuid: Optional[str] = Query(None)):
+@router.get("/list/{puuid}/stream")
+async def stream_match_list(puuid: str, region: str = "KR", count: int = 5):
     """
-    [2-2단계] 매치 ID로 게임 데이터를 가져옵니다.
-    ★ 이 결과(JSON) 전체를 복사해서 /coach/analyze 에 넣으세요.
+    [2-1단계 스트리밍] 매치 요약을 받아오는 즉시 한 줄씩(NDJSON) 전송합니다.
+    (도착 순서대로 전송되므로 정렬은 game_creation 기준으로 클라이언트에서 처리)
     """
-    result = get_match_detail(match_id)
+    async def generate():
+        async for preview in iter_recent_matches(puuid, region, count):
+            yield json.dumps(MatchPreview(**preview).model_dump(), ensure_ascii=False) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.get("/detail/{match_id}", response_model=Union[FullGameContext, MatchContextHandle])
+async def get_match_raw_data(request: Request, match_id: str, puuid: Optional[str] = Query(None),
+                             include_raw: bool = Query(False, description="true면 매치/타임라인 원본 JSON 전체를 함께 반환")):
+    """
+    [2-2단계] 매치 ID로 게임 데이터를 서버에 준비하고 핸들을 반환합니다.
+    ★ 반환된 match_id 와 target_puuid 를 /coach/analyze 에 넣으세요. (원본 JSON을 주고받을 필요 없음)
+    """
+    result = await get_match_detail(match_id)
     if not result:
         raise HTTPException(status_code=404, detail="매치 정보를 찾을 수 없습니다.")
-    
-    return {
-        "match_data": result['info'],
-        "timeline_data": result['timeline'],
-        "target_puuid": puuid # 입력했다면 포함, 안했으면 null
-    }
\ No newline at end of file
+
+    # 종료된 매치는 바뀌지 않으므로 ETag + 긴 max-age로 재요청 시 304 응답
+    if include_raw:
+        return payload_response(request, {
+            "match_id": match_id,
+            "match_data": result['info'],
+            "timeline_data": result['timeline'],
+            "target_puuid": puuid # 입력했다면 포함, 안했으면 null
+        }, max_age=86400)
+
+    info = result['info'].get('info', {})
+    return payload_response(request, {
+        "match_id": match_id,
+        "target_puuid": puuid,
+        "game_mode": info.get('gameMode'),
+        "game_duration": info.get('gameDuration'),
+        "game_creation": info.get('gameCreation')
+    }, max_age=86400)
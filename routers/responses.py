@@ -0,0 +1,81 @@
+import gzip
+import hashlib
+from typing import Any
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response
+
+# brotli는 requirements.txt에 포함 (직접 설치한 환경에 없으면 gzip만 사용)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 이보다 작은 응답은 압축하지 않음 (압축 이득보다 CPU 비용이 큼)
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 5
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    encodings = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        if name:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def _negotiate_encoding(request: Request) -> str:
+    accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return ""
+
+
+def _etag_matches(if_none_match: str, digest: str) -> bool:
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"').split("-")[0] == digest:
+            return True
+    return False
+
+
+def payload_response(request: Request, content: Any, max_age: int = 3600) -> Response:
+    """
+    큰 매치/분석 JSON 전용 응답.
+    - orjson으로 바로 직렬화 (jsonable_encoder 순회 생략)
+    - 본문 해시로 강한 ETag 생성, If-None-Match 일치 시 304 반환
+    - Accept-Encoding에 따라 br / gzip 압축 (인코딩별로 ETag 구분)
+    """
+    body = orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    encoding = _negotiate_encoding(request) if len(body) >= MIN_COMPRESS_BYTES else ""
+
+    headers = {
+        "ETag": f'"{digest}-{encoding}"' if encoding else f'"{digest}"',
+        "Cache-Control": f"private, max-age={max_age}",
+        "Vary": "Accept-Encoding",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, digest):
+        return Response(status_code=304, headers=headers)
+
+    if encoding == "br":
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -7,7 +7,7 @@ router = APIRouter()
 @router.post("/api/search", response_model=SummonerSearchResponse)
 async def search_summoner(request: SummonerSearchRequest):
     # 서비스 호출
-    result = get_summoner_info(request.region, request.game_name, request.tag_line)
+    result = await get_summoner_info(request.region, request.game_name, request.tag_line)
     
     if not result:
         raise HTTPException(status_code=404, detail="소환사를 찾을 수 없거나 API 키가 만료되었습니다.")
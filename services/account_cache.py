@@ -0,0 +1,18 @@
+from services.disk_cache import DiskCache
+from services.settings import ACCOUNT_CACHE_PATH, ACCOUNT_CACHE_MEMORY_ITEMS
+
+# 존재하지 않는 계정(404)을 표시하는 값
+NOT_FOUND = {"not_found": True}
+
+# Riot ID -> {"puuid", "gameName", "tagLine"}
+account_cache = DiskCache(ACCOUNT_CACHE_PATH, "accounts", memory_items=ACCOUNT_CACHE_MEMORY_ITEMS)
+
+# 플랫폼 + PUUID -> {"profileIconId"}
+profile_cache = DiskCache(ACCOUNT_CACHE_PATH, "profiles", memory_items=ACCOUNT_CACHE_MEMORY_ITEMS)
+
+def riot_id_key(game_name: str, tag_line: str) -> str:
+    """Riot ID는 대소문자를 구분하지 않으므로 정규화한 값을 키로 사용"""
+    return f"{game_name.strip().casefold()}#{tag_line.replace('#', '').strip().casefold()}"
+
+def profile_key(platform: str, puuid: str) -> str:
+    return f"{platform}:{puuid}"
@@ -0,0 +1,207 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class DiskCache:
+    """
+    SQLite 기반 영구 key-value 캐시.
+    값은 JSON 직렬화 후 zlib으로 압축해 저장하고, 항목별 TTL과
+    전체 용량 제한(max_bytes 초과 시 가장 오래 안 쓴 항목부터 제거)을 지원합니다.
+
+    default_ttl을 주면 ttl 없이 저장한 항목도 저장 후 default_ttl초가 지나면 만료됩니다. (나이 기반 제거)
+
+    memory_items > 0 이면 프로세스 내 LRU를 앞단에 둡니다.
+    (메모리 LRU는 같은 객체를 그대로 돌려주므로, 반환값을 수정하는 호출부에서는 쓰지 마세요.)
+
+    쓰기 비용이 테이블 크기에 비례하지 않도록
+    - 전체 용량은 열 때 한 번 계산한 뒤 저장/삭제 때마다 갱신하는 추정치로 관리하고,
+      추정치가 max_bytes를 넘을 때만 정확히 다시 계산해 EVICT_TARGET 비율까지 제거합니다.
+      (다른 프로세스가 같은 파일에 쓴 양은 이때 반영됨)
+    - 만료 항목은 PURGE_EVERY번 쓸 때마다 한 번 정리합니다. (조회 시에는 항상 만료 여부 확인)
+    - 여러 항목은 set_many로 한 트랜잭션(커밋 한 번)에 저장합니다.
+    """
+
+    PURGE_EVERY = 1000
+    EVICT_TARGET = 0.9
+
+    def __init__(self, path, namespace: str, max_bytes: Optional[int] = None, memory_items: int = 0,
+                 default_ttl: Optional[float] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.table = re.sub(r"\W", "_", namespace)
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.default_ttl = default_ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed_at)")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_expires ON {self.table} (expires_at)")
+        self._total = self._exact_total()
+        self._writes = 0
+
+    # --- 메모리 LRU ---
+    def _memory_get(self, key: str, now: float):
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return entry
+
+    def _memory_set(self, key: str, value: Any, expires_at: Optional[float]):
+        if self.memory_items <= 0:
+            return
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    # --- 공개 API ---
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._memory_get(key, now)
+            if entry is not None:
+                return entry[0]
+
+            row = self._conn.execute(
+                f"SELECT value, size, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return default
+            blob, size, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._total -= size
+                return default
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+
+        value = json.loads(zlib.decompress(blob))
+        with self._lock:
+            self._memory_set(key, value, expires_at)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[float] = None):
+        """여러 항목을 한 트랜잭션으로 저장 (모두 저장되거나 하나도 저장되지 않음)"""
+        if not items:
+            return
+        now = time.time()
+        ttl = ttl or self.default_ttl
+        expires_at = now + ttl if ttl else None
+        blobs = {
+            key: zlib.compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            for key, value in items.items()
+        }
+        with self._lock:
+            delta = 0
+            self._conn.execute("BEGIN")
+            try:
+                for key, blob in blobs.items():
+                    old = self._conn.execute(f"SELECT size FROM {self.table} WHERE key = ?", (key,)).fetchone()
+                    self._conn.execute(
+                        f"INSERT OR REPLACE INTO {self.table} (key, value, size, expires_at, accessed_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, blob, len(blob), expires_at, now),
+                    )
+                    delta += len(blob) - (old[0] if old else 0)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._total += delta
+            for key, value in items.items():
+                self._memory_set(key, value, expires_at)
+
+            self._writes += len(blobs)
+            if self._writes >= self.PURGE_EVERY:
+                self._purge_expired_locked(now)
+            if self.max_bytes and self._total > self.max_bytes:
+                self._evict_locked(now)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._memory.pop(key, None)
+            row = self._conn.execute(f"SELECT size FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._total -= row[0]
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._total = 0
+
+    def __contains__(self, key: str) -> bool:
+        """값을 읽지 않고 존재 여부만 확인 (만료된 항목은 없는 것으로 봄, 접근 시각은 갱신하지 않음)"""
+        now = time.time()
+        with self._lock:
+            if self._memory_get(key, now) is not None:
+                return True
+            row = self._conn.execute(
+                f"SELECT 1 FROM {self.table} WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, now)
+            ).fetchone()
+        return row is not None
+
+    def evict(self):
+        """만료된 항목 삭제 후, 용량 제한을 넘으면 오래 안 쓴 항목부터 제거"""
+        with self._lock:
+            now = time.time()
+            self._purge_expired_locked(now)
+            if self.max_bytes:
+                self._evict_locked(now)
+
+    def _exact_total(self) -> int:
+        return self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+
+    def _purge_expired_locked(self, now: float):
+        self._writes = 0
+        expired = self._conn.execute(
+            f"SELECT COALESCE(SUM(size), 0) FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        ).fetchone()[0]
+        if expired:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            self._total -= expired
+
+    def _evict_locked(self, now: float):
+        self._purge_expired_locked(now)
+        self._total = self._exact_total()
+        if self._total <= self.max_bytes:
+            return
+        # 한 번에 여유를 두고 제거해서 용량 근처에서 매 쓰기마다 다시 제거하지 않도록 함
+        target = self.max_bytes * self.EVICT_TARGET
+        removed = []
+        cursor = self._conn.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed_at")
+        for key, size in cursor:
+            if self._total <= target:
+                break
+            removed.append(key)
+            self._total -= size
+        cursor.close()
+        self._conn.execute("BEGIN")
+        self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", [(k,) for k in removed])
+        self._conn.execute("COMMIT")
+        for key in removed:
+            self._memory.pop(key, None)
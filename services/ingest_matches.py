@@ -0,0 +1,202 @@
+"""
+여러 PUUID의 매치/타임라인을 미리 받아 매치 저장소에 채워두는 일괄 수집 작업.
+
+사용 예:
+    python -m services.ingest_matches --region KR --puuid-file roster.txt --max-per-player 200
+
+- 플레이어별로 매치 ID를 100개 단위로 페이지 조회하고, 플레이어 간 중복 매치는 한 번만 받습니다.
+- 모든 요청은 riot_client(레이트 리미터 포함)를 거칩니다.
+- 진행 상황을 체크포인트 파일에 저장하므로, 중단 후 다시 실행하면 이어서 진행합니다.
+  (체크포인트는 지역/큐 조건별로 하나씩 사용. 다른 조건으로 이어서 실행하면 거부)
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 서비스 경로 설정
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+if backend_dir not in sys.path:
+    sys.path.append(backend_dir)
+
+from tqdm import tqdm
+
+from services.riot_client import riot_client
+from services.riot_service import get_match_detail, get_match_ids, get_match_info
+from services.settings import INGEST_CHECKPOINT_PATH, MATCH_FETCH_CONCURRENCY
+
+# match-v5 ids 엔드포인트의 최대 count
+PAGE_SIZE = 100
+
+
+class IngestCheckpoint:
+    """
+    수집 진행 상황 (JSON 파일)
+    - scope: 수집 조건 {"region", "queue"} (매치 ID 목록이 이 조건으로 모은 것임을 기록)
+    - players: PUUID -> {"next_start": 다음에 조회할 start, "done": 더 이상 과거 매치가 없는지}
+    - pending: 아직 매치 정보를 받지 않은 매치 ID (수집 순서 유지)
+    - fetched: 매치 정보 받기 완료 / timelines: 타임라인까지 받기 완료 (--no-timeline 수집분은 fetched에만 있음)
+    - failed: 실패한 매치 ID
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.scope: Optional[Dict] = None
+        self.players: Dict[str, Dict] = {}
+        self.pending: List[str] = []
+        self.fetched: set = set()
+        self.timelines: set = set()
+        self.failed: set = set()
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            # 이전 형식(scope / timelines 없음)은 타임라인 완료 여부를 알 수 없으므로 다시 확인하도록 비워둠
+            self.scope = data.get("scope")
+            self.players = data.get("players", {})
+            self.pending = data.get("pending", [])
+            self.fetched = set(data.get("fetched", []))
+            self.timelines = set(data.get("timelines", []))
+            self.failed = set(data.get("failed", []))
+
+    def check_scope(self, scope: Dict) -> bool:
+        """같은 수집 조건이면 True (처음 쓰는 체크포인트는 조건을 기록)"""
+        if self.scope is None:
+            self.scope = scope
+            return True
+        return self.scope == scope
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "scope": self.scope,
+                "players": self.players,
+                "pending": self.pending,
+                "fetched": sorted(self.fetched),
+                "timelines": sorted(self.timelines),
+                "failed": sorted(self.failed),
+            }, f, ensure_ascii=False)
+        # 쓰는 도중 중단돼도 이전 체크포인트가 깨지지 않도록 교체
+        os.replace(tmp_path, self.path)
+
+
+async def collect_match_ids(checkpoint: IngestCheckpoint, puuids: List[str], region: str,
+                            max_per_player: int, queue: Optional[int]):
+    """플레이어별 매치 ID를 페이지 단위로 모아 pending에 추가 (중복 제거)"""
+    known = checkpoint.fetched | set(checkpoint.pending)
+
+    for puuid in puuids:
+        state = checkpoint.players.setdefault(puuid, {"next_start": 0, "done": False})
+        while not state["done"] and state["next_start"] < max_per_player:
+            count = min(PAGE_SIZE, max_per_player - state["next_start"])
+            match_ids = await get_match_ids(puuid, region, state["next_start"], count, queue=queue)
+            if match_ids is None:
+                print(f"⚠️ 매치 ID 조회 실패, 다음 실행 때 이어서 진행: {puuid}")
+                break
+
+            new_ids = [m for m in match_ids if m not in known]
+            known.update(new_ids)
+            checkpoint.pending.extend(new_ids)
+            state["next_start"] += len(match_ids)
+            if len(match_ids) < count:
+                state["done"] = True
+            checkpoint.save()
+    checkpoint.save()
+
+
+async def fetch_pending(checkpoint: IngestCheckpoint, concurrency: int, include_timeline: bool,
+                        save_every: int = 20):
+    """
+    pending 매치를 동시에 최대 concurrency개씩 받아 매치 저장소에 저장
+    include_timeline이면 이전에 매치 정보만 받은 매치(fetched - timelines)의 타임라인도 받음
+    """
+    pending = [m for m in checkpoint.pending if m not in checkpoint.fetched]
+    if include_timeline:
+        pending += sorted(checkpoint.fetched - checkpoint.timelines)
+    if not pending:
+        print("✅ 새로 받을 매치가 없습니다.")
+        return
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    fetch = get_match_detail if include_timeline else get_match_info
+
+    async def fetch_one(match_id: str):
+        async with semaphore:
+            return match_id, await fetch(match_id)
+
+    completed = 0
+    for next_done in tqdm(asyncio.as_completed([fetch_one(m) for m in pending]), total=len(pending)):
+        match_id, result = await next_done
+        if result:
+            checkpoint.fetched.add(match_id)
+            if include_timeline:
+                checkpoint.timelines.add(match_id)
+            checkpoint.failed.discard(match_id)
+        else:
+            checkpoint.failed.add(match_id)
+        completed += 1
+        if completed % save_every == 0:
+            checkpoint.pending = [m for m in checkpoint.pending if m not in checkpoint.fetched]
+            checkpoint.save()
+
+    checkpoint.pending = [m for m in checkpoint.pending if m not in checkpoint.fetched]
+    checkpoint.save()
+
+
+def read_puuids(args) -> List[str]:
+    puuids = list(args.puuid or [])
+    if args.puuid_file:
+        with open(args.puuid_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#")[0].strip()
+                if line:
+                    puuids.append(line)
+    # 순서 유지하며 중복 제거
+    return list(dict.fromkeys(puuids))
+
+
+async def run(args):
+    puuids = read_puuids(args)
+    if not puuids:
+        print("❌ 수집할 PUUID가 없습니다. --puuid 또는 --puuid-file 을 지정하세요.")
+        return
+
+    checkpoint = IngestCheckpoint(args.checkpoint)
+    scope = {"region": args.region.upper(), "queue": args.queue}
+    if not checkpoint.check_scope(scope):
+        print(f"❌ 체크포인트의 수집 조건 {checkpoint.scope} 이(가) 이번 실행 {scope} 과(와) 다릅니다.")
+        print("   --checkpoint 로 다른 파일을 지정하거나, 체크포인트 파일을 지우고 다시 실행하세요.")
+        return
+    print(f"🚀 {len(puuids)}명의 매치 ID 수집 중... (체크포인트: {checkpoint.path})")
+    try:
+        await collect_match_ids(checkpoint, puuids, args.region, args.max_per_player, args.queue)
+        print(f"📥 받을 매치: {len(checkpoint.pending)}개 (이미 완료: {len(checkpoint.fetched)}개)")
+        await fetch_pending(checkpoint, args.concurrency, not args.no_timeline)
+    finally:
+        await riot_client.aclose()
+
+    print("-" * 50)
+    print(f"🎉 수집 완료: {len(checkpoint.fetched)}개 저장, 실패 {len(checkpoint.failed)}개")
+    print("-" * 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="매치/타임라인 일괄 수집 (매치 저장소 사전 적재)")
+    parser.add_argument("--region", default="KR", help="지역 코드 (KR, NA, EUW ...)")
+    parser.add_argument("--puuid", action="append", help="수집할 PUUID (여러 번 지정 가능)")
+    parser.add_argument("--puuid-file", help="PUUID 목록 파일 (한 줄에 하나, # 이후는 주석)")
+    parser.add_argument("--max-per-player", type=int, default=100, help="플레이어당 최근 매치 최대 개수")
+    parser.add_argument("--queue", type=int, default=None, help="큐 ID 필터 (예: 420 솔로랭크)")
+    parser.add_argument("--concurrency", type=int, default=MATCH_FETCH_CONCURRENCY, help="동시 다운로드 수")
+    parser.add_argument("--no-timeline", action="store_true", help="타임라인 없이 매치 정보만 수집")
+    parser.add_argument("--checkpoint", default=str(INGEST_CHECKPOINT_PATH), help="체크포인트 파일 경로")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+from services.disk_cache import DiskCache
+from services.settings import MATCH_STORE_PATH, MATCH_STORE_MAX_MB, MATCH_STORE_MEMORY_ITEMS
+
+# 매치 ID 기준 info / timeline 저장소
+# key: "info:{match_id}", "timeline:{match_id}"
+# (메모리 LRU가 같은 객체를 돌려주므로 호출부는 반환된 매치 데이터를 수정하지 않아야 합니다.)
+match_store = DiskCache(
+    MATCH_STORE_PATH, "matches",
+    max_bytes=MATCH_STORE_MAX_MB * 1024 * 1024,
+    memory_items=MATCH_STORE_MEMORY_ITEMS,
+)
+
+def info_key(match_id: str) -> str:
+    return f"info:{match_id}"
+
+def timeline_key(match_id: str) -> str:
+    return f"timeline:{match_id}"
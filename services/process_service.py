@@ -1,10 +1,11 @@
-import json
-from services.riot_service import get_match_detail, get_match_timeline
+from services.riot_service import get_match_detail
+from services.timeline_frame import load_timeline_frame
 
 class RiotMatchDataProcessor:
-    def __init__(self, match_data, timeline_data):
+    def __init__(self, match_data, timeline_data, match_id=None):
+        """match_id: 서버가 직접 불러온 매치의 ID (있을 때만 타임라인 변환 결과 재사용)"""
         self.match = match_data.get('info', {})
-        self.timeline = timeline_data.get('info', {})
+        self.timeline = load_timeline_frame(timeline_data, match_id)
         self.participants_map = {p['participantId']: p['championName'] for p in self.match.get('participants', [])}
 
     def get_participant_name(self, p_id):
@@ -104,31 +105,34 @@ class RiotMatchDataProcessor:
             'WARD_PLACED', 'WARD_KILL'
         }
 
-        for frame in self.timeline.get('frames', []):
-            timestamp = frame['timestamp']
-            minute = int(timestamp / 60000) # 분 단위 변환
+        tf = self.timeline
+        names = [self.get_participant_name(p_id) for p_id in tf.participant_ids]
+        columns = {name: tf.stat(name).tolist() for name in (
+            'totalGold', 'xp', 'level', 'minionsKilled', 'jungleMinionsKilled', 'x', 'y', 'health', 'power'
+        )}
+        present = tf.present.tolist()
+        has_position = tf.has_position.tolist()
+
+        for i, minute in enumerate(tf.minutes.tolist()): # 분 단위 변환
             
             # 1. 해당 시간대의 플레이어 상태 (성장, 위치, 체력)
             player_status = {}
-            for p_id_str, p_data in frame.get('participantFrames', {}).items():
-                p_id = int(p_id_str)
-                player_status[self.get_participant_name(p_id)] = {
-                    "totalGold": p_data['totalGold'],
-                    "xp": p_data['xp'],
-                    "level": p_data['level'],
-                    "minions": p_data['minionsKilled'],
-                    "jungleMinions": p_data['jungleMinionsKilled'],
-                    "position": p_data.get('position', {}), # x, y 좌표
-                    "health": p_data['championStats']['health'],
-                    "power": p_data['championStats']['power'] # 마나/기력
+            for j, name in enumerate(names):
+                if not present[i][j]: continue
+                player_status[name] = {
+                    "totalGold": columns['totalGold'][i][j],
+                    "xp": columns['xp'][i][j],
+                    "level": columns['level'][i][j],
+                    "minions": columns['minionsKilled'][i][j],
+                    "jungleMinions": columns['jungleMinionsKilled'][i][j],
+                    "position": {"x": columns['x'][i][j], "y": columns['y'][i][j]} if has_position[i][j] else {}, # x, y 좌표
+                    "health": columns['health'][i][j],
+                    "power": columns['power'][i][j] # 마나/기력
                 }
 
             # 2. 해당 시간대에 발생한 주요 이벤트 필터링
             events = []
-            for event in frame.get('events', []):
-                if event['type'] not in TARGET_EVENTS:
-                    continue
-                
+            for event in tf.frame_events(i, TARGET_EVENTS):
                 # 이벤트별 핵심 데이터만 정제
                 event_summary = {"type": event['type'], "timestamp": event['timestamp']}
                 
@@ -194,15 +198,13 @@ class RiotMatchDataProcessor:
             "timeline_flow": self.process_timeline_summary()
         }
 
-def get_rag_json(match_id: str):
-    """PUUID와 MatchId를 통해 RAG용 JSON 데이터를 생성"""
-    match_data = get_match_detail(match_id)
-    timeline_data = get_match_timeline(match_id)
-    
-    if not match_data or not timeline_data:
+async def get_rag_json(match_id: str):
+    """MatchId를 통해 RAG용 JSON 데이터를 생성"""
+    detail = await get_match_detail(match_id)
+    if not detail:
         return None
         
-    processor = RiotMatchDataProcessor(match_data, timeline_data)
+    processor = RiotMatchDataProcessor(detail['info'], detail['timeline'], match_id)
     rag_context = processor.generate_rag_context()
     
     return rag_context
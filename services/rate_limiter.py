@@ -0,0 +1,180 @@
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from services.settings import RIOT_DEFAULT_APP_RATE_LIMIT, RIOT_DEFAULT_METHOD_RATE_LIMIT
+
+
+def parse_rate_limit_header(value: Optional[str]) -> List[Tuple[int, float]]:
+    """
+    Riot 레이트 리밋 헤더 파싱: "20:1,100:120" -> [(20, 1.0), (100, 120.0)]
+    (X-*-Rate-Limit-Count 헤더도 같은 형식이며, 이 경우 앞 값은 '사용량'입니다.)
+    """
+    if not value:
+        return []
+    pairs = []
+    for part in value.split(","):
+        try:
+            count, window = part.strip().split(":")
+            pairs.append((int(count), float(window)))
+        except ValueError:
+            continue
+    return pairs
+
+
+class TokenBucket:
+    """window초 동안 capacity개의 요청을 허용하는 토큰 버킷"""
+
+    def __init__(self, capacity: int, window: float):
+        self.capacity = capacity
+        self.window = window
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.window
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+    def sync(self, used: int, now: float):
+        """서버가 알려준 사용량(Count 헤더)이 로컬 추정보다 많으면 그만큼 토큰을 줄입니다."""
+        self._refill(now)
+        self.tokens = min(self.tokens, float(self.capacity - used))
+
+
+class RateLimitScope:
+    """하나의 한도 단위(지역별 앱 한도, 또는 지역+메서드 한도)에 걸린 버킷 묶음"""
+
+    def __init__(self, limits: List[Tuple[int, float]]):
+        self.buckets: Dict[float, TokenBucket] = {}
+        self.blocked_until = 0.0
+        self.configure(limits)
+
+    def configure(self, limits: List[Tuple[int, float]]):
+        """응답 헤더의 한도로 버킷을 맞춥니다. 한도가 같은 버킷은 상태를 유지합니다."""
+        if not limits:
+            return
+        buckets = {}
+        for capacity, window in limits:
+            bucket = self.buckets.get(window)
+            if bucket is None or bucket.capacity != capacity:
+                bucket = TokenBucket(capacity, window)
+            buckets[window] = bucket
+        self.buckets = buckets
+
+    def sync_counts(self, counts: List[Tuple[int, float]], now: float):
+        for used, window in counts:
+            bucket = self.buckets.get(window)
+            if bucket:
+                bucket.sync(used, now)
+
+    def block(self, seconds: float, now: float):
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+    def wait_time(self, now: float) -> float:
+        wait = max(0.0, self.blocked_until - now)
+        for bucket in self.buckets.values():
+            wait = max(wait, bucket.wait_time(now))
+        return wait
+
+    def consume(self):
+        for bucket in self.buckets.values():
+            bucket.consume()
+
+
+class RateLimiter:
+    """
+    Riot API 요청 스케줄러.
+    라우팅 지역별 앱 한도와 지역+메서드별 한도를 토큰 버킷으로 관리하고,
+    토큰이 없으면 요청을 버리지 않고 대기열에서 기다리게 합니다.
+    """
+
+    def __init__(self,
+                 default_app_limits: str = RIOT_DEFAULT_APP_RATE_LIMIT,
+                 default_method_limits: str = RIOT_DEFAULT_METHOD_RATE_LIMIT):
+        self.default_app_limits = parse_rate_limit_header(default_app_limits)
+        self.default_method_limits = parse_rate_limit_header(default_method_limits)
+        self._app_scopes: Dict[str, RateLimitScope] = {}
+        self._method_scopes: Dict[Tuple[str, str], RateLimitScope] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._waiting: Dict[str, int] = defaultdict(int)
+
+    def _app_scope(self, host: str) -> RateLimitScope:
+        if host not in self._app_scopes:
+            self._app_scopes[host] = RateLimitScope(self.default_app_limits)
+        return self._app_scopes[host]
+
+    def _method_scope(self, host: str, method: str) -> RateLimitScope:
+        key = (host, method)
+        if key not in self._method_scopes:
+            self._method_scopes[key] = RateLimitScope(self.default_method_limits)
+        return self._method_scopes[key]
+
+    async def acquire(self, host: str, method: str):
+        """두 한도 모두에 여유가 생길 때까지 대기한 뒤 토큰을 하나씩 사용합니다."""
+        app_scope = self._app_scope(host)
+        method_scope = self._method_scope(host, method)
+        self._waiting[host] += 1
+        try:
+            # 같은 메서드 요청끼리는 들어온 순서(FIFO)대로 처리
+            async with self._locks[(host, method)]:
+                while True:
+                    now = time.monotonic()
+                    wait = max(app_scope.wait_time(now), method_scope.wait_time(now))
+                    if wait <= 0:
+                        app_scope.consume()
+                        method_scope.consume()
+                        return
+                    await asyncio.sleep(wait)
+        finally:
+            self._waiting[host] -= 1
+
+    def update_from_headers(self, host: str, method: str, headers: Mapping[str, str]):
+        """응답의 X-App-Rate-Limit / X-Method-Rate-Limit (및 Count) 헤더로 버킷을 보정합니다."""
+        now = time.monotonic()
+        app_scope = self._app_scope(host)
+        app_scope.configure(parse_rate_limit_header(headers.get("X-App-Rate-Limit")))
+        app_scope.sync_counts(parse_rate_limit_header(headers.get("X-App-Rate-Limit-Count")), now)
+
+        method_scope = self._method_scope(host, method)
+        method_scope.configure(parse_rate_limit_header(headers.get("X-Method-Rate-Limit")))
+        method_scope.sync_counts(parse_rate_limit_header(headers.get("X-Method-Rate-Limit-Count")), now)
+
+    def penalize(self, host: str, method: str, retry_after: float, limit_type: Optional[str]):
+        """
+        429 응답 처리: X-Rate-Limit-Type에 해당하는 한도 전체를 Retry-After 동안 막습니다.
+        (application -> 지역 전체, 그 외 -> 해당 메서드)
+        """
+        now = time.monotonic()
+        if (limit_type or "").lower() == "application":
+            self._app_scope(host).block(retry_after, now)
+        else:
+            self._method_scope(host, method).block(retry_after, now)
+
+    def queue_depth(self, host: Optional[str] = None) -> int:
+        if host is not None:
+            return self._waiting.get(host, 0)
+        return sum(self._waiting.values())
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self.queue_depth(),
+            "queued_by_region": {host: n for host, n in self._waiting.items() if n},
+        }
+
+
+# 싱글톤 인스턴스 (외부에서 import하여 사용)
+rate_limiter = RateLimiter()
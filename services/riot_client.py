@@ -0,0 +1,134 @@
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+import httpx
+
+from services.rate_limiter import rate_limiter
+from services.settings import (
+    RIOT_API_KEY,
+    RIOT_HTTP_TIMEOUT,
+    RIOT_MAX_CONNECTIONS_PER_HOST,
+    RIOT_MAX_KEEPALIVE_PER_HOST,
+    RIOT_KEEPALIVE_EXPIRY,
+    RIOT_MAX_RETRIES,
+    RIOT_RETRY_BACKOFF_BASE,
+    RIOT_RETRY_BACKOFF_MAX,
+)
+
+
+def _backoff(attempt: int) -> float:
+    """지수 백오프 + 지터"""
+    delay = min(RIOT_RETRY_BACKOFF_MAX, RIOT_RETRY_BACKOFF_BASE * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _retry_after(resp: httpx.Response) -> Optional[float]:
+    try:
+        return float(resp.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 호출을 하나로 합칩니다.
+    먼저 온 호출만 실제로 실행되고, 나머지는 그 결과를 함께 기다립니다.
+    (기다리던 호출 하나가 취소돼도 공유 작업은 계속 진행됩니다.)
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Future"] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+class RiotClient:
+    """
+    Riot API 비동기 클라이언트.
+    라우팅 호스트(asia/americas/europe, kr/na1 등)별로 keep-alive 커넥션 풀을 따로 유지합니다.
+    """
+
+    def __init__(self, api_key: Optional[str] = RIOT_API_KEY):
+        self.api_key = api_key
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._inflight = SingleFlight()
+
+    def _client_for(self, host: str) -> httpx.AsyncClient:
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=f"https://{host}.api.riotgames.com",
+                headers={"X-Riot-Token": self.api_key or ""},
+                timeout=RIOT_HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=RIOT_MAX_CONNECTIONS_PER_HOST,
+                    max_keepalive_connections=RIOT_MAX_KEEPALIVE_PER_HOST,
+                    keepalive_expiry=RIOT_KEEPALIVE_EXPIRY,
+                ),
+            )
+            self._clients[host] = client
+        return client
+
+    async def get(self, host: str, path: str, method: str = "default",
+                  params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        """
+        host: 'asia', 'kr' 처럼 api.riotgames.com 앞에 붙는 라우팅 값
+        method: 메서드별 레이트 리밋을 구분하는 이름 (예: 'match-v5.match')
+
+        레이트 리미터의 대기열을 거쳐 요청하고, 429/5xx/네트워크 오류는
+        Retry-After 또는 지수 백오프 후 재시도합니다. 재시도를 모두 소진하면 마지막 응답을 반환합니다.
+        같은 URL에 대한 동시 요청은 업스트림 호출 한 번을 공유합니다.
+        """
+        key = (host, path, tuple(sorted((params or {}).items())))
+        return await self._inflight.do(key, lambda: self._get(host, path, method, params))
+
+    async def _get(self, host: str, path: str, method: str,
+                   params: Optional[Dict[str, Any]]) -> httpx.Response:
+        for attempt in range(RIOT_MAX_RETRIES + 1):
+            is_last = attempt == RIOT_MAX_RETRIES
+            await rate_limiter.acquire(host, method)
+            try:
+                resp = await self._client_for(host).get(path, params=params)
+            except httpx.TransportError:
+                if is_last:
+                    raise
+                await asyncio.sleep(_backoff(attempt))
+                continue
+
+            rate_limiter.update_from_headers(host, method, resp.headers)
+            if resp.status_code != 429 and resp.status_code < 500:
+                return resp
+            if is_last:
+                return resp
+
+            wait = _retry_after(resp) or _backoff(attempt)
+            limit_type = resp.headers.get("X-Rate-Limit-Type")
+            if resp.status_code == 429 and limit_type in ("application", "method"):
+                # 한도 전체를 막아두면 대기 중인 다른 요청들도 함께 기다립니다.
+                rate_limiter.penalize(host, method, wait, limit_type)
+            else:
+                await asyncio.sleep(wait)
+        return resp
+
+    async def aclose(self):
+        """서버 종료 시 모든 커넥션 풀을 정리합니다."""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+# 싱글톤 인스턴스 (외부에서 import하여 사용)
+riot_client = RiotClient()
@@ -1,14 +1,16 @@
-import os
-import requests
+import asyncio
+from typing import Optional
 from urllib.parse import quote
-from dotenv import load_dotenv
 
-load_dotenv()
-API_KEY = os.getenv("RIOT_API_KEY")
-
-HEADERS = {
-    "X-Riot-Token": API_KEY
-}
+from services.account_cache import NOT_FOUND, account_cache, profile_cache, riot_id_key, profile_key
+from services.match_store import match_store, info_key, timeline_key
+from services.riot_client import SingleFlight, riot_client
+from services.settings import (
+    ACCOUNT_CACHE_TTL,
+    MATCH_FETCH_CONCURRENCY,
+    NEGATIVE_CACHE_TTL,
+    PROFILE_CACHE_TTL,
+)
 
 REGION_TO_ROUTING = {
     "KR": "asia", "JP": "asia",
@@ -22,112 +24,231 @@ REGION_TO_PLATFORM = {
     "EUW": "euw1", "EUNE": "eun1", "ME1": "me1",
 }
 
-def get_summoner_info(region_code: str, game_name: str, tag_line: str):
+# 매치 ID 접두사(KR_, NA1_ ...) -> Match V5 라우팅
+MATCH_PREFIX_TO_ROUTING = {
+    "KR": "asia", "JP": "asia", "JP1": "asia",
+    "NA1": "americas", "BR1": "americas", "LA1": "americas", "OC1": "americas",
+    "EUW1": "europe", "EUN1": "europe", "TR1": "europe", "ME1": "europe",
+}
+
+def get_match_routing(match_id: str, default: str = "asia") -> str:
+    prefix = match_id.split("_")[0].upper()
+    return MATCH_PREFIX_TO_ROUTING.get(prefix, default)
+
+def run_sync(coro):
+    """
+    동기 스크립트(cv 등)에서 riot_service 코루틴을 실행합니다.
+    이벤트 루프가 끝나기 전에 커넥션 풀을 닫아 다음 호출이 새 루프에서 동작하도록 합니다.
+    """
+    async def _run():
+        try:
+            return await coro
+        finally:
+            await riot_client.aclose()
+    return asyncio.run(_run())
+
+async def _get_account(routing: str, game_name: str, tag_line: str):
+    """Account V1: Riot ID -> 계정 정보 (캐시 우선, 404는 짧게 음성 캐시)"""
+    key = riot_id_key(game_name, tag_line)
+    # 캐시 조회/저장은 SQLite 작업이므로 이벤트 루프를 막지 않도록 스레드에서 실행
+    cached = await asyncio.to_thread(account_cache.get, key)
+    if cached is not None:
+        return None if cached.get("not_found") else cached
+
+    resp = await riot_client.get(
+        routing,
+        f"/riot/account/v1/accounts/by-riot-id/{quote(game_name)}/{quote(tag_line)}",
+        method="account-v1.by-riot-id",
+    )
+    if resp.status_code == 404:
+        await asyncio.to_thread(account_cache.set, key, NOT_FOUND, ttl=NEGATIVE_CACHE_TTL)
+        return None
+    if resp.status_code != 200: return None
+
+    data = resp.json()
+    account = {"puuid": data['puuid'], "gameName": data['gameName'], "tagLine": data['tagLine']}
+    await asyncio.to_thread(account_cache.set, key, account, ttl=ACCOUNT_CACHE_TTL)
+    return account
+
+async def _get_profile(platform: str, puuid: str):
+    """Summoner V4: PUUID -> 프로필 정보 (캐시 우선, 404는 짧게 음성 캐시)"""
+    key = profile_key(platform, puuid)
+    cached = await asyncio.to_thread(profile_cache.get, key)
+    if cached is not None:
+        return None if cached.get("not_found") else cached
+
+    resp = await riot_client.get(platform, f"/lol/summoner/v4/summoners/by-puuid/{puuid}",
+                                 method="summoner-v4.by-puuid")
+    if resp.status_code == 404:
+        await asyncio.to_thread(profile_cache.set, key, NOT_FOUND, ttl=NEGATIVE_CACHE_TTL)
+        return None
+    if resp.status_code != 200: return None
+
+    profile = {"profileIconId": resp.json()['profileIconId']}
+    await asyncio.to_thread(profile_cache.set, key, profile, ttl=PROFILE_CACHE_TTL)
+    return profile
+
+async def get_summoner_info(region_code: str, game_name: str, tag_line: str):
     if not region_code: return None
     region_code = region_code.upper()
     routing = REGION_TO_ROUTING.get(region_code)
     platform = REGION_TO_PLATFORM.get(region_code)
-    
+
     if not routing or not platform:
         print(f"[Error] 지원하지 않는 지역 코드: {region_code}")
         return None
 
     clean_tag_line = tag_line.replace("#", "")
-    safe_game_name = quote(game_name)
-    safe_tag_line = quote(clean_tag_line)
 
-    url = f"https://{routing}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{safe_game_name}/{safe_tag_line}"
-    
     try:
-        resp = requests.get(url, headers=HEADERS)
-        if resp.status_code != 200: return None
-        account_data = resp.json()
+        account_data = await _get_account(routing, game_name, clean_tag_line)
+        if not account_data: return None
         puuid = account_data['puuid']
-        
+
         # Summoner V4
-        sum_url = f"https://{platform}.api.riotgames.com/lol/summoner/v4/summoners/by-puuid/{puuid}"
-        resp_sum = requests.get(sum_url, headers=HEADERS)
-        if resp_sum.status_code != 200: return None
-        summoner_data = resp_sum.json()
+        summoner_data = await _get_profile(platform, puuid)
+        if not summoner_data: return None
 
         return {
             "puuid": puuid,
             "game_name": account_data['gameName'],
             "tag_line": account_data['tagLine'],
             "profile_icon_id": summoner_data['profileIconId'],
-            "region": region_code 
+            "region": region_code
         }
     except Exception as e:
         print(f"[Error] API 호출 예외: {e}")
         return None
 
-def get_recent_matches(puuid: str, region_code: str, count: int = 5):
-    region_code = region_code.upper()
-    routing = REGION_TO_ROUTING.get(region_code)
-    if not routing: return []
+async def get_match_ids(puuid: str, region_code: str, start: int = 0, count: int = 5,
+                        queue: Optional[int] = None):
+    """
+    PUUID의 매치 ID 목록 (최신순, start부터 count개, 최대 100개)
+    조회에 실패하면 None을 반환합니다. (빈 리스트는 '더 이상 매치가 없음'을 의미)
+    """
+    routing = REGION_TO_ROUTING.get(region_code.upper())
+    if not routing: return None
+
+    params = {"start": start, "count": count}
+    if queue is not None:
+        params["queue"] = queue
 
-    url = f"https://{routing}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids?start=0&count={count}"
     try:
-        resp = requests.get(url, headers=HEADERS)
-        if resp.status_code != 200: return []
-        match_ids = resp.json()
+        resp = await riot_client.get(
+            routing,
+            f"/lol/match/v5/matches/by-puuid/{puuid}/ids",
+            method="match-v5.ids-by-puuid",
+            params=params,
+        )
+        if resp.status_code != 200: return None
+        return resp.json()
     except:
-        return []
-
-    match_details = []
-    for match_id in match_ids:
-        prefix = match_id.split("_")[0].upper()
-        if prefix in ["KR", "JP"]: m_routing = "asia"
-        elif prefix in ["NA1", "BR1", "LA1", "OC1"]: m_routing = "americas"
-        elif prefix in ["EUW1", "EUN1", "TR1", "ME1"]: m_routing = "europe"
-        else: m_routing = routing
+        return None
 
-        m_url = f"https://{m_routing}.api.riotgames.com/lol/match/v5/matches/{match_id}"
-        try:
-            m_resp = requests.get(m_url, headers=HEADERS)
-            if m_resp.status_code != 200: continue
-            data = m_resp.json()
-            info = data['info']
-            part = next((p for p in info['participants'] if p['puuid'] == puuid), None)
-            if part:
-                match_details.append({
-                    "match_id": match_id,
-                    "champion_name": part['championName'],
-                    "kills": part['kills'],
-                    "deaths": part['deaths'],
-                    "assists": part['assists'],
-                    "win": part['win'],
-                    "game_mode": info['gameMode'],
-                    "game_creation": info['gameCreation']
-                })
-        except: continue
-    return match_details
-
-def get_match_detail(match_id: str):
+async def _fetch_match_preview(match_id: str, puuid: str, routing: str, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        data = await get_match_info(match_id, default_routing=routing)
+    if not data: return None
+
+    info = data.get('info', {})
+    part = next((p for p in info.get('participants', []) if p.get('puuid') == puuid), None)
+    if not part: return None
+    return {
+        "match_id": match_id,
+        "champion_name": part['championName'],
+        "kills": part['kills'],
+        "deaths": part['deaths'],
+        "assists": part['assists'],
+        "win": part['win'],
+        "game_mode": info['gameMode'],
+        "game_creation": info['gameCreation']
+    }
+
+def _preview_tasks(match_ids, puuid: str, routing: str, concurrency: int):
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    return [_fetch_match_preview(match_id, puuid, routing, semaphore) for match_id in match_ids]
+
+async def get_recent_matches(puuid: str, region_code: str, count: int = 5,
+                             concurrency: int = MATCH_FETCH_CONCURRENCY):
     """
-    매치 ID로 게임 정보(Info)와 타임라인(Timeline)을 모두 가져옵니다.
+    최근 매치 요약 목록. 매치 상세는 최대 concurrency개씩 동시에 받아오며,
+    결과는 매치 ID 순서(최신순)를 유지합니다.
     """
-    prefix = match_id.split("_")[0].upper()
-    if prefix in ["KR", "JP"]: routing = "asia"
-    elif prefix in ["NA1", "BR1", "LA1", "OC1"]: routing = "americas"
-    elif prefix in ["EUW1", "EUN1", "TR1", "ME1"]: routing = "europe"
-    else: routing = "asia"
+    routing = REGION_TO_ROUTING.get(region_code.upper())
+    if not routing: return []
 
-    base_url = f"https://{routing}.api.riotgames.com/lol/match/v5/matches/{match_id}"
+    match_ids = await get_match_ids(puuid, region_code, 0, count) or []
+    previews = await asyncio.gather(*_preview_tasks(match_ids, puuid, routing, concurrency))
+    return [p for p in previews if p]
 
-    try:
-        info_resp = requests.get(base_url, headers=HEADERS)
-        timeline_resp = requests.get(f"{base_url}/timeline", headers=HEADERS)
+async def iter_recent_matches(puuid: str, region_code: str, count: int = 5,
+                              concurrency: int = MATCH_FETCH_CONCURRENCY):
+    """get_recent_matches의 스트리밍 버전: 매치 요약을 도착하는 순서대로 yield 합니다."""
+    routing = REGION_TO_ROUTING.get(region_code.upper())
+    if not routing: return
 
-        if info_resp.status_code != 200 or timeline_resp.status_code != 200:
-            print(f"[Error] 매치 데이터 조회 실패: {match_id}")
+    match_ids = await get_match_ids(puuid, region_code, 0, count) or []
+    tasks = [asyncio.ensure_future(t) for t in _preview_tasks(match_ids, puuid, routing, concurrency)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            preview = await next_done
+            if preview:
+                yield preview
+    finally:
+        # 클라이언트가 중간에 끊으면 남은 요청 취소
+        for task in tasks:
+            task.cancel()
+
+# 같은 매치를 동시에 여러 명이 열어도 저장소 조회/API 호출/저장은 한 번만 수행
+_match_inflight = SingleFlight()
+
+async def _get_stored_match_resource(match_id: str, key: str, path: str, method: str, default_routing: str):
+    """매치 저장소에 있으면 그대로 반환하고, 없으면 Riot API에서 받아 저장합니다."""
+    return await _match_inflight.do(
+        key, lambda: _load_match_resource(match_id, key, path, method, default_routing)
+    )
+
+async def _load_match_resource(match_id: str, key: str, path: str, method: str, default_routing: str):
+    cached = await asyncio.to_thread(match_store.get, key)
+    if cached is not None:
+        return cached
+
+    routing = get_match_routing(match_id, default=default_routing)
+    try:
+        resp = await riot_client.get(routing, path, method=method)
+        if resp.status_code != 200:
+            print(f"[Error] 매치 데이터 조회 실패: {match_id} ({resp.status_code})")
             return None
-
-        return {
-            "match_id": match_id,
-            "info": info_resp.json(),
-            "timeline": timeline_resp.json()
-        }
+        data = resp.json()
     except Exception as e:
-        print(f"[Error] get_match_detail 예외: {e}")
-        return None
\ No newline at end of file
+        print(f"[Error] 매치 데이터 조회 예외: {match_id} {e}")
+        return None
+
+    await asyncio.to_thread(match_store.set, key, data)
+    return data
+
+async def get_match_info(match_id: str, default_routing: str = "asia"):
+    """매치 정보(Match-V5 MatchDto). 한 번 받은 매치는 로컬 저장소에서 읽습니다."""
+    return await _get_stored_match_resource(
+        match_id, info_key(match_id), f"/lol/match/v5/matches/{match_id}", "match-v5.match", default_routing
+    )
+
+async def get_match_timeline(match_id: str, default_routing: str = "asia"):
+    """매치 타임라인(Match-V5 TimelineDto). 한 번 받은 타임라인은 로컬 저장소에서 읽습니다."""
+    return await _get_stored_match_resource(
+        match_id, timeline_key(match_id), f"/lol/match/v5/matches/{match_id}/timeline", "match-v5.timeline", default_routing
+    )
+
+async def get_match_detail(match_id: str):
+    """
+    매치 ID로 게임 정보(Info)와 타임라인(Timeline)을 모두 가져옵니다.
+    """
+    info, timeline = await asyncio.gather(get_match_info(match_id), get_match_timeline(match_id))
+    if not info or not timeline:
+        return None
+
+    return {
+        "match_id": match_id,
+        "info": info,
+        "timeline": timeline
+    }
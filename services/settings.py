@@ -0,0 +1,54 @@
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 백엔드 루트 경로
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+# 로컬 캐시 저장 경로 (매치 데이터 등)
+CACHE_DIR = Path(os.getenv("CACHE_DIR", BASE_DIR / ".cache"))
+
+# [Riot API 인증]
+RIOT_API_KEY = os.getenv("RIOT_API_KEY")
+
+# [HTTP 커넥션 풀 설정]
+# 라우팅 호스트(asia, kr 등)마다 별도의 keep-alive 풀을 유지합니다.
+RIOT_HTTP_TIMEOUT = float(os.getenv("RIOT_HTTP_TIMEOUT", "10"))
+RIOT_MAX_CONNECTIONS_PER_HOST = int(os.getenv("RIOT_MAX_CONNECTIONS_PER_HOST", "20"))
+RIOT_MAX_KEEPALIVE_PER_HOST = int(os.getenv("RIOT_MAX_KEEPALIVE_PER_HOST", "10"))
+RIOT_KEEPALIVE_EXPIRY = float(os.getenv("RIOT_KEEPALIVE_EXPIRY", "30"))
+
+# [레이트 리밋 설정]
+# 첫 응답 헤더를 받기 전까지 사용할 기본 한도 (개발용 키 기준 "20:1,100:120")
+RIOT_DEFAULT_APP_RATE_LIMIT = os.getenv("RIOT_DEFAULT_APP_RATE_LIMIT", "20:1,100:120")
+RIOT_DEFAULT_METHOD_RATE_LIMIT = os.getenv("RIOT_DEFAULT_METHOD_RATE_LIMIT", "")
+
+# 429 / 5xx / 네트워크 오류 재시도
+RIOT_MAX_RETRIES = int(os.getenv("RIOT_MAX_RETRIES", "3"))
+RIOT_RETRY_BACKOFF_BASE = float(os.getenv("RIOT_RETRY_BACKOFF_BASE", "0.5"))
+RIOT_RETRY_BACKOFF_MAX = float(os.getenv("RIOT_RETRY_BACKOFF_MAX", "10"))
+
+# [매치 목록 조회]
+# /match/list 에서 매치 상세를 동시에 받아오는 최대 개수
+MATCH_FETCH_CONCURRENCY = int(os.getenv("MATCH_FETCH_CONCURRENCY", "5"))
+
+# [매치 저장소]
+# 종료된 매치의 info/timeline은 변하지 않으므로 로컬에 압축 저장하고, 용량 초과 시 오래 안 쓴 매치부터 제거
+MATCH_STORE_PATH = CACHE_DIR / "matches.sqlite3"
+MATCH_STORE_MAX_MB = int(os.getenv("MATCH_STORE_MAX_MB", "2048"))
+# 최근 사용한 매치는 압축 해제된 상태로 메모리에도 보관 (/match/detail -> /coach/analyze 재사용)
+MATCH_STORE_MEMORY_ITEMS = int(os.getenv("MATCH_STORE_MEMORY_ITEMS", "32"))
+
+# [소환사 검색 캐시]
+# Riot ID -> PUUID, PUUID -> 프로필 아이콘 (초 단위 TTL)
+ACCOUNT_CACHE_PATH = CACHE_DIR / "accounts.sqlite3"
+ACCOUNT_CACHE_TTL = int(os.getenv("ACCOUNT_CACHE_TTL", str(60 * 60 * 24)))
+PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", str(60 * 60)))
+# 404(존재하지 않는 Riot ID) 응답도 잠깐 저장해 오타 검색이 반복돼도 API를 다시 호출하지 않음
+NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", str(60 * 5)))
+ACCOUNT_CACHE_MEMORY_ITEMS = int(os.getenv("ACCOUNT_CACHE_MEMORY_ITEMS", "10000"))
+
+# [매치 일괄 수집 (services/ingest_matches.py)]
+INGEST_CHECKPOINT_PATH = CACHE_DIR / "ingest_checkpoint.json"
@@ -0,0 +1,184 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# participantFrames 에서 뽑아내는 수치 (stats 배열의 마지막 축 순서)
+# (이름, participantFrame 안의 경로)
+STAT_FIELDS = (
+    ("totalGold", ("totalGold",)),
+    ("currentGold", ("currentGold",)),
+    ("xp", ("xp",)),
+    ("level", ("level",)),
+    ("minionsKilled", ("minionsKilled",)),
+    ("jungleMinionsKilled", ("jungleMinionsKilled",)),
+    ("x", ("position", "x")),
+    ("y", ("position", "y")),
+    ("health", ("championStats", "health")),
+    ("healthMax", ("championStats", "healthMax")),
+    ("power", ("championStats", "power")),
+    ("powerMax", ("championStats", "powerMax")),
+    ("totalDamageDoneToChampions", ("damageStats", "totalDamageDoneToChampions")),
+    ("totalDamageTaken", ("damageStats", "totalDamageTaken")),
+)
+STAT_NAMES = tuple(name for name, _ in STAT_FIELDS)
+STAT_INDEX = {name: i for i, name in enumerate(STAT_NAMES)}
+
+
+def _lookup(data: Dict, path) -> Optional[int]:
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+class TimelineFrame:
+    """
+    Match-V5 타임라인을 한 번만 순회해 만든 열(column) 단위 표현.
+
+    - timestamps: (프레임 수,) 각 프레임의 게임 시간(ms)
+    - stats: (프레임 수, 참가자 수, len(STAT_NAMES)) int32 — participantId p 는 인덱스 p-1
+    - present: (프레임 수, 참가자 수) 해당 프레임에 참가자 데이터가 있었는지
+    - has_position: (프레임 수, 참가자 수) 위치 좌표가 있었는지
+    - 이벤트 테이블: event_frame / event_timestamp / event_type(코드) 배열과 원본 이벤트 dict 목록
+      (프레임 i의 이벤트는 events[frame_offsets[i]:frame_offsets[i + 1]])
+    """
+
+    def __init__(self, timestamps, stats, present, has_position,
+                 events, event_frame, event_timestamp, event_type, event_type_names, frame_offsets):
+        self.timestamps = timestamps
+        self.stats = stats
+        self.present = present
+        self.has_position = has_position
+        self.events = events
+        self.event_frame = event_frame
+        self.event_timestamp = event_timestamp
+        self.event_type = event_type
+        self.event_type_names = event_type_names
+        self.frame_offsets = frame_offsets
+        self._type_codes = {name: code for code, name in enumerate(event_type_names)}
+
+    @classmethod
+    def from_timeline(cls, timeline: Dict) -> "TimelineFrame":
+        """timeline: Match-V5 TimelineDto 전체 또는 그 안의 'info'"""
+        info = timeline.get('info', timeline)
+        frames = info.get('frames', [])
+
+        n_participants = 10
+        for frame in frames:
+            for p_id_str in frame.get('participantFrames', {}):
+                n_participants = max(n_participants, int(p_id_str))
+
+        n_frames = len(frames)
+        timestamps = np.zeros(n_frames, dtype=np.int64)
+        stats = np.zeros((n_frames, n_participants, len(STAT_FIELDS)), dtype=np.int32)
+        present = np.zeros((n_frames, n_participants), dtype=bool)
+        has_position = np.zeros((n_frames, n_participants), dtype=bool)
+
+        events: List[Dict] = []
+        event_frame: List[int] = []
+        event_timestamp: List[int] = []
+        event_type: List[int] = []
+        type_codes: Dict[str, int] = {}
+        frame_offsets = np.zeros(n_frames + 1, dtype=np.int64)
+
+        for i, frame in enumerate(frames):
+            timestamps[i] = frame.get('timestamp', 0)
+            for p_id_str, p_data in frame.get('participantFrames', {}).items():
+                j = int(p_id_str) - 1
+                present[i, j] = True
+                has_position[i, j] = 'position' in p_data
+                stats[i, j] = [_lookup(p_data, path) or 0 for _, path in STAT_FIELDS]
+
+            for event in frame.get('events', []):
+                e_type = event.get('type', '')
+                events.append(event)
+                event_frame.append(i)
+                event_timestamp.append(event.get('timestamp', 0))
+                event_type.append(type_codes.setdefault(e_type, len(type_codes)))
+            frame_offsets[i + 1] = len(events)
+
+        return cls(
+            timestamps=timestamps,
+            stats=stats,
+            present=present,
+            has_position=has_position,
+            events=events,
+            event_frame=np.asarray(event_frame, dtype=np.int32),
+            event_timestamp=np.asarray(event_timestamp, dtype=np.int64),
+            event_type=np.asarray(event_type, dtype=np.int16),
+            event_type_names=list(type_codes),
+            frame_offsets=frame_offsets,
+        )
+
+    # --- 프레임 / 참가자 수치 ---
+    @property
+    def n_frames(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def participant_ids(self) -> List[int]:
+        return list(range(1, self.stats.shape[1] + 1))
+
+    @property
+    def minutes(self) -> np.ndarray:
+        return self.timestamps // 60000
+
+    def stat(self, name: str) -> np.ndarray:
+        """(프레임 수, 참가자 수) 배열"""
+        return self.stats[:, :, STAT_INDEX[name]]
+
+    # --- 이벤트 ---
+    def event_mask(self, types: Optional[Iterable[str]] = None,
+                   start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> np.ndarray:
+        mask = np.ones(len(self.events), dtype=bool)
+        if types is not None:
+            codes = [self._type_codes[t] for t in types if t in self._type_codes]
+            mask &= np.isin(self.event_type, codes)
+        if start_ms is not None:
+            mask &= self.event_timestamp >= start_ms
+        if end_ms is not None:
+            mask &= self.event_timestamp <= end_ms
+        return mask
+
+    def select_events(self, types: Optional[Iterable[str]] = None,
+                      start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> List[Dict]:
+        return [self.events[i] for i in np.flatnonzero(self.event_mask(types, start_ms, end_ms))]
+
+    def frame_events(self, frame_index: int, types: Optional[set] = None) -> List[Dict]:
+        events = self.events[self.frame_offsets[frame_index]:self.frame_offsets[frame_index + 1]]
+        if types is None:
+            return events
+        return [e for e in events if e.get('type') in types]
+
+
+# 같은 매치를 여러 번 분석할 때 변환을 반복하지 않도록 최근 변환 결과 보관
+# (asyncio.to_thread 작업 스레드에서 동시에 호출되므로 잠금 필요)
+_FRAME_CACHE: "OrderedDict[str, TimelineFrame]" = OrderedDict()
+_FRAME_CACHE_SIZE = 32
+_FRAME_CACHE_LOCK = threading.Lock()
+
+
+def load_timeline_frame(timeline: Dict, match_id: Optional[str] = None) -> TimelineFrame:
+    """
+    타임라인을 TimelineFrame으로 변환합니다.
+    match_id는 서버가 매치 저장소 / Riot API에서 직접 불러온 타임라인일 때만 넘기며, 이때 변환 결과를 재사용합니다.
+    (요청 본문의 metadata.matchId는 클라이언트가 임의로 넣을 수 있으므로 캐시 키로 쓰지 않음)
+    """
+    if match_id:
+        with _FRAME_CACHE_LOCK:
+            frame = _FRAME_CACHE.get(match_id)
+            if frame is not None:
+                _FRAME_CACHE.move_to_end(match_id)
+                return frame
+
+    frame = TimelineFrame.from_timeline(timeline)
+    if match_id:
+        with _FRAME_CACHE_LOCK:
+            _FRAME_CACHE[match_id] = frame
+            _FRAME_CACHE.move_to_end(match_id)
+            while len(_FRAME_CACHE) > _FRAME_CACHE_SIZE:
+                _FRAME_CACHE.popitem(last=False)
+    return frame
@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# 서비스 경로 설정 (pytest를 어느 위치에서 실행해도 rag / services 패키지를 import할 수 있도록)
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+# 캐시 파일이 실제 .cache / data 폴더에 생기지 않도록 테스트 전용 임시 폴더 사용 (settings import 전에 설정)
+_cache_dir = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ.setdefault("CACHE_DIR", _cache_dir)
+os.environ.setdefault("EMBEDDING_CACHE_PATH", os.path.join(_cache_dir, "embedding_cache.sqlite3"))
+os.environ.setdefault("REPORT_CACHE_PATH", os.path.join(_cache_dir, "reports.sqlite3"))
+os.environ.setdefault("RETRIEVAL_CACHE_PATH", os.path.join(_cache_dir, "retrieval.sqlite3"))
@@ -0,0 +1,82 @@
+import json
+
+from rag.context_compactor import compact_frames_context, compact_match_context, estimate_tokens, light_events
+
+NAMES = [f"Champ{i}" for i in range(10)]
+
+
+def make_context(minutes: int = 30):
+    players = [
+        {"championName": name, "teamId": 100 if i < 5 else 200, "teamPosition": "TOP" if i in (0, 5) else "",
+         "puuid": f"p{i}"}
+        for i, name in enumerate(NAMES)
+    ]
+    timeline = []
+    for minute in range(minutes):
+        events = []
+        if minute % 3 == 0:
+            events.append({
+                "type": "CHAMPION_KILL", "time": f"{minute}분", "killer": NAMES[0], "victim": NAMES[5],
+                "damage_received": [{"attacker": NAMES[0], "spell": "LongSpellName"}] * 10,
+            })
+        timeline.append({
+            "minute": minute,
+            "events": events,
+            "status_snapshot": {name: {"gold": minute * 400, "level": minute // 2, "pos": [1000, 2000]} for name in NAMES},
+        })
+    return {"match_summary": {"overview": {"duration": minutes}, "players": players}, "timeline_flow": timeline}
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("abcd" * 100) == 101
+    assert 60 < estimate_tokens("가" * 100) < 80
+
+
+def test_large_budget_keeps_everything():
+    context = make_context()
+    data = json.loads(compact_match_context(context, "p0", [3, 9], budget_tokens=10 ** 6))
+    assert data["timeline_flow"] == context["timeline_flow"]
+    assert "timeline_note" not in data
+
+
+def test_small_budget_returns_valid_json_within_budget():
+    context = make_context()
+    full = estimate_tokens(json.dumps(context))
+    for budget in (full // 2, full // 5, full // 20):
+        text = compact_match_context(context, "p0", [3, 9], budget_tokens=budget)
+        data = json.loads(text)
+        assert data["match_summary"] == context["match_summary"]
+        assert estimate_tokens(text) <= budget
+        assert "timeline_note" in data
+
+
+def test_key_minutes_are_kept_longest():
+    context = make_context()
+    text = compact_match_context(context, "p0", [9], budget_tokens=estimate_tokens(json.dumps(context)) // 10)
+    minutes = [frame["minute"] for frame in json.loads(text)["timeline_flow"]]
+    assert 9 in minutes
+
+
+def test_light_events_drops_damage_details():
+    events = make_context()["timeline_flow"][0]["events"]
+    assert all("damage_received" not in e for e in light_events(events))
+    assert "damage_received" in events[0]
+
+
+def test_compact_frames_context_steps_down_then_drops_frames():
+    frames = make_context()["timeline_flow"]
+    variants = [frames, [{"minute": f["minute"], "events": light_events(f["events"])} for f in frames]]
+    base = {"overview": {"duration": 30}}
+
+    data = json.loads(compact_frames_context(base, "timeline", variants, [9], budget_tokens=10 ** 6))
+    assert data["timeline"] == frames and "timeline_note" not in data
+
+    light_size = estimate_tokens(json.dumps({**base, "timeline": variants[1]}, separators=(",", ":")))
+    data = json.loads(compact_frames_context(base, "timeline", variants, [9], budget_tokens=light_size + 50))
+    assert data["timeline"] == variants[1] and "timeline_note" in data
+
+    text = compact_frames_context(base, "timeline", variants, [9], budget_tokens=light_size // 3)
+    data = json.loads(text)
+    assert estimate_tokens(text) <= light_size // 3
+    assert data["overview"] == base["overview"]
+    assert 9 in [frame["minute"] for frame in data["timeline"]]
@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("langchain_text_splitters")
+
+from langchain_core.documents import Document
+
+from rag.create_db import chunk_id, clean_source_name, parse_and_split, plan_removals
+
+
+def test_plan_removals_deletes_chunks_that_disappeared():
+    previous = {"a1": "a.json", "a2": "a.json", "b1": "b.json"}
+    current = {"a1": "a.json", "a3": "a.json"}
+    carried, removed = plan_removals(previous, current, failed_files=set())
+    assert carried == {}
+    assert removed == ["a2", "b1"]
+
+
+def test_plan_removals_keeps_chunks_of_failed_files():
+    previous = {"a1": "a.json", "a2": "a.json", "b1": "b.json", "b2": "b.json"}
+    current = {"a1": "a.json"}
+    carried, removed = plan_removals(previous, current, failed_files={"b.json"})
+    assert carried == {"b1": "b.json", "b2": "b.json"}
+    assert removed == ["a2"]
+
+
+def test_plan_removals_full_rebuild_has_nothing_to_remove():
+    assert plan_removals({}, {"a1": "a.json"}, failed_files={"b.json"}) == ({}, [])
+
+
+def test_chunk_id_depends_on_file_and_content():
+    doc = Document(page_content="아리 공략", metadata={"filename": "ahri.json"})
+    same = Document(page_content="아리 공략", metadata={"filename": "ahri.json", "heading": "다른 메타데이터"})
+    other_file = Document(page_content="아리 공략", metadata={"filename": "zed.json"})
+    assert chunk_id(doc) == chunk_id(same)
+    assert chunk_id(doc) != chunk_id(other_file)
+    assert len(chunk_id(doc)) == 32
+
+
+def test_clean_source_name():
+    assert clean_source_name("preprocessed_세트(리그-오브-레전드)") == "세트"
+
+
+def test_parse_and_split_returns_none_for_broken_file(tmp_path):
+    broken = tmp_path / "broken.json"
+    broken.write_text("{not json", encoding="utf-8")
+    assert parse_and_split(broken, "namuwiki") is None
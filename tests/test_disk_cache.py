@@ -0,0 +1,87 @@
+import os
+import time
+
+import pytest
+
+from services.disk_cache import DiskCache
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return tmp_path / "cache.sqlite3"
+
+
+def test_set_get_delete(cache_path):
+    cache = DiskCache(cache_path, "test")
+    cache.set("a", {"x": [1, 2], "이름": "아리"})
+    assert cache.get("a") == {"x": [1, 2], "이름": "아리"}
+    assert "a" in cache
+    cache.delete("a")
+    assert cache.get("a", "missing") == "missing"
+    assert "a" not in cache
+
+
+def test_ttl_expiry(cache_path):
+    cache = DiskCache(cache_path, "test", memory_items=10)
+    cache.set("short", 1, ttl=0.05)
+    cache.set("long", 2)
+    assert cache.get("short") == 1
+    time.sleep(0.1)
+    assert "short" not in cache
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+
+
+def test_default_ttl(cache_path):
+    cache = DiskCache(cache_path, "test", default_ttl=0.05)
+    cache.set("a", 1)
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+
+def test_lru_eviction_keeps_recently_used(cache_path):
+    # 압축 후 항목 하나가 약 450바이트 -> 4개는 들어가고 5번째에서 제거
+    cache = DiskCache(cache_path, "test", max_bytes=2000)
+    for i in range(4):
+        cache.set(f"k{i}", os.urandom(400).hex())
+        time.sleep(0.01)
+    assert all(f"k{i}" in cache for i in range(4))
+    cache.get("k0")
+    time.sleep(0.01)
+    cache.set("k4", os.urandom(400).hex())
+    assert "k0" in cache and "k4" in cache
+    assert "k1" not in cache
+    assert cache._total == cache._exact_total() <= 2000
+
+
+def test_running_total_matches_table(cache_path):
+    cache = DiskCache(cache_path, "test")
+    cache.set_many({f"k{i}": "v" * i for i in range(50)})
+    cache.set("k1", "replaced" * 10)
+    cache.delete("k2")
+    cache.set("expired", 1, ttl=0.01)
+    time.sleep(0.02)
+    cache.get("expired")
+    assert cache._total == cache._exact_total()
+    # 다시 열어도 같은 값
+    assert DiskCache(cache_path, "test")._total == cache._total
+    cache.clear()
+    assert cache._total == cache._exact_total() == 0
+
+
+def test_set_many_is_one_transaction(cache_path):
+    cache = DiskCache(cache_path, "test")
+    cache.set_many({"a": 1, "b": [2]}, ttl=60)
+    assert cache.get("a") == 1 and cache.get("b") == [2]
+    cache.set_many({})
+
+    with pytest.raises(TypeError):
+        cache.set_many({"c": 3, "d": object()})
+    assert "c" not in cache
+
+
+def test_namespaces_are_separate(cache_path):
+    first = DiskCache(cache_path, "first")
+    second = DiskCache(cache_path, "second-ns")
+    first.set("a", 1)
+    assert second.get("a") is None
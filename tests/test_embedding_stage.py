@@ -0,0 +1,46 @@
+from langchain_core.documents import Document
+
+from rag.embedding_stage import EmbeddingStage
+from services.disk_cache import DiskCache
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class FakeCollection:
+    def __init__(self):
+        self.rows = {}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        for row in zip(ids, embeddings, documents, metadatas):
+            self.rows[row[0]] = row
+
+
+def chunks(n):
+    return [(f"id{i}", Document(page_content=f"청크 {i}" * (i + 1), metadata={"source": "Ahri"})) for i in range(n)]
+
+
+def test_embeds_in_batches_and_reuses_cache(tmp_path):
+    cache = DiskCache(tmp_path / "embeddings.sqlite3", "chunk_embeddings")
+    embeddings, collection = FakeEmbeddings(), FakeCollection()
+
+    stage = EmbeddingStage(embeddings, "fake-model", collection, batch_size=2, concurrency=2, cache=cache)
+    stage.run(chunks(5))
+    assert sorted(len(call) for call in embeddings.calls) == [1, 2, 2]
+    assert stage.stats == {"cached": 0, "embedded": 5, "failed": 0}
+    assert set(collection.rows) == {f"id{i}" for i in range(5)}
+
+    # 같은 모델 + 같은 본문은 캐시에서 가져옴
+    again = EmbeddingStage(embeddings, "fake-model", FakeCollection(), batch_size=2, cache=cache)
+    again.run(chunks(6))
+    assert again.stats == {"cached": 5, "embedded": 1, "failed": 0}
+
+    other_model = EmbeddingStage(FakeEmbeddings(), "other-model", FakeCollection(), batch_size=2, cache=cache)
+    other_model.run(chunks(2))
+    assert other_model.stats["embedded"] == 2
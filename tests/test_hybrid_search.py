@@ -0,0 +1,55 @@
+from rag.hybrid_search import BM25Builder, BM25Index, reciprocal_rank_fusion, tokenize
+
+DOCS = [
+    ("a1", "Ahri", "Ahri 라인전에서 매혹으로 교전을 엽니다"),
+    ("a2", "Ahri", "Ahri rune electrocute build"),
+    ("z1", "Zed", "Zed 라인전은 암살 각을 노립니다 zed zed"),
+    ("z2", "Zed", "Zed item build: youmuu"),
+]
+
+
+def test_tokenize_uses_words_and_hangul_bigrams():
+    assert tokenize("Ahri 라인전에서 Q2") == ["ahri", "라인", "인전", "전에", "에서", "q2"]
+    assert tokenize("팀") == ["팀"]
+
+
+def test_search_ranks_matching_documents():
+    index = BM25Index.build(DOCS)
+    results = index.search("zed 라인전", k=3)
+    assert [doc_id for doc_id, _ in results][:2] == ["z1", "a1"]
+    assert all(score > 0 for _, score in results)
+    assert index.search("없는단어", k=3) == []
+
+
+def test_search_filters_by_source():
+    index = BM25Index.build(DOCS)
+    assert {doc_id for doc_id, _ in index.search("build 라인전", k=10, sources=["Ahri"])} == {"a1", "a2"}
+
+
+def test_builder_matches_build(tmp_path):
+    builder = BM25Builder()
+    for doc in DOCS:
+        builder.add(*doc)
+    assert len(builder) == len(DOCS)
+    built = builder.build()
+    assert built.search("rune build", k=4) == BM25Index.build(DOCS).search("rune build", k=4)
+
+    path = tmp_path / "bm25.npz"
+    built.save(path)
+    loaded = BM25Index.load(path)
+    assert len(loaded) == len(DOCS)
+    assert loaded.search("rune build", k=4) == built.search("rune build", k=4)
+    assert BM25Index.load(tmp_path / "missing.npz") is None
+
+
+def test_empty_index():
+    index = BM25Builder().build()
+    assert len(index) == 0
+    assert index.search("ahri", k=5) == []
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a", "d"]], k=60)
+    # a: 1/61 + 1/62, c: 1/63 + 1/61, b: 1/62, d: 1/63
+    assert fused == ["a", "c", "b", "d"]
+    assert reciprocal_rank_fusion([]) == []
@@ -0,0 +1,56 @@
+import json
+
+from rag.json_stream import JsonSectionParser
+
+REPORT = {
+    "player_keyword": ["공격적", "로밍"],
+    "one_line_review": "초반 \"주도권\"을 잘 살렸습니다.\n후반 운영은 아쉬움",
+    "match_flow": {"early": "라인전 우세", "late": [1, {"a": "}]"}]},
+    "score": 87,
+    "mvp": True,
+    "note": None,
+}
+
+
+def feed_all(parser: JsonSectionParser, text: str, size: int):
+    sections = []
+    for i in range(0, len(text), size):
+        sections.extend(parser.feed(text[i:i + size]))
+    return sections
+
+
+def test_sections_complete_regardless_of_chunk_size():
+    text = json.dumps(REPORT, ensure_ascii=False, indent=2)
+    for size in (1, 2, 7, len(text)):
+        parser = JsonSectionParser()
+        assert feed_all(parser, text, size) == list(REPORT.items())
+        assert parser.finished
+
+
+def test_section_is_emitted_as_soon_as_it_closes():
+    parser = JsonSectionParser()
+    assert parser.feed('{"player_keyword": ["공격적"], "match_flow": {"early": ') == [("player_keyword", ["공격적"])]
+    assert parser.feed('"우세"}') == [("match_flow", {"early": "우세"})]
+
+
+def test_scalar_value_needs_delimiter():
+    parser = JsonSectionParser()
+    assert parser.feed('{"score": 87') == []
+    assert parser.feed("}") == [("score", 87)]
+    assert parser.finished
+
+
+def test_ignores_code_fence_and_trailing_text():
+    parser = JsonSectionParser()
+    text = '```json\n{"one_line_review": "좋음"}\n```\n추가 설명 {"ignored": 1}'
+    assert feed_all(parser, text, 5) == [("one_line_review", "좋음")]
+
+
+def test_allows_raw_newlines_in_strings():
+    parser = JsonSectionParser()
+    assert parser.feed('{"one_line_review": "첫 줄\n둘째 줄"}') == [("one_line_review", "첫 줄\n둘째 줄")]
+
+
+def test_invalid_value_returns_raw_text():
+    parser = JsonSectionParser()
+    assert parser.feed('{"match_flow": {"early": 라인전}}') == [("match_flow", '{"early": 라인전}')]
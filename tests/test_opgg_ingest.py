@@ -0,0 +1,59 @@
+from rag.opgg_ingest import OTHER_TYPE, _pack_lines, build_opgg_documents, classify_field, iter_records
+
+DATA = {
+    "champion": "Ahri",
+    "positions": {
+        "MID": {
+            "win_rate": "52.3%",
+            "pick_rate": 12.5,
+            "core_items": [{"name": "Luden", "pick_rate": 40.1}, {"name": "Shadowflame", "pick_rate": 22.0}],
+            "runes": {"primary": ["Electrocute", "Taste of Blood"], "shards": ["Adaptive"]},
+            "counters": [{"champion_name": "Yasuo", "win_rate": 47.0}],
+        },
+    },
+}
+
+
+def test_classify_field():
+    assert classify_field("core_items")[0] == "build"
+    assert classify_field("skillOrder")[0] == "build"
+    assert classify_field("runes")[0] == "runes"
+    assert classify_field("counters")[0] == "matchups"
+    assert classify_field("상대 챔피언")[0] == "matchups"
+    assert classify_field("tier") == OTHER_TYPE
+
+
+def test_iter_records_walks_position_containers():
+    records = list(iter_records(DATA))
+    assert [(champion, position) for champion, position, _ in records] == [("Ahri", "MID")]
+    assert set(records[0][2]) == {"win_rate", "pick_rate", "core_items", "runes", "counters"}
+
+
+def test_build_opgg_documents_groups_by_record_type():
+    docs = build_opgg_documents(DATA, "ahri", "ahri.json")
+    by_type = {doc.metadata["record_type"]: doc for doc in docs}
+    assert set(by_type) == {"build", "runes", "matchups"}
+
+    build = by_type["build"]
+    assert build.page_content.startswith("[OPGG | Ahri] MID 빌드\nwin_rate 52.3% · pick_rate 12.5")
+    assert "core_items: name Luden · pick_rate 40.1" in build.page_content
+    assert "{" not in build.page_content
+    assert build.metadata["win_rate"] == 52.3
+    assert build.metadata["champion"] == "Ahri" and build.metadata["position"] == "MID"
+    assert "runes.primary: Electrocute, Taste of Blood" in by_type["runes"].page_content
+
+
+def test_stats_only_record_still_produces_document():
+    docs = build_opgg_documents({"win_rate": 50}, "garen", "garen.json")
+    assert len(docs) == 1
+    assert docs[0].metadata["record_type"] == "stats"
+    assert docs[0].metadata["champion"] == "garen"
+
+
+def test_pack_lines_repeats_header_and_keeps_lines_whole():
+    lines = [f"line {i} " + "x" * 20 for i in range(10)]
+    chunks = _pack_lines("HEADER", lines, max_chars=80)
+    assert len(chunks) > 1
+    assert all(chunk.startswith("HEADER\n") for chunk in chunks)
+    assert [line for chunk in chunks for line in chunk.split("\n")[1:]] == lines
+    assert _pack_lines("HEADER", [], max_chars=80) == []
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from services.rate_limiter import RateLimiter, RateLimitScope, TokenBucket, parse_rate_limit_header
+
+
+def test_parse_rate_limit_header():
+    assert parse_rate_limit_header("20:1,100:120") == [(20, 1.0), (100, 120.0)]
+    assert parse_rate_limit_header(" 5:10 , bad, 3:x") == [(5, 10.0)]
+    assert parse_rate_limit_header("") == []
+    assert parse_rate_limit_header(None) == []
+
+
+def test_token_bucket_refills_over_time():
+    bucket = TokenBucket(2, 1.0)
+    now = bucket.updated
+    for _ in range(2):
+        assert bucket.wait_time(now) == 0
+        bucket.consume()
+    assert bucket.wait_time(now) == 0.5
+    assert bucket.wait_time(now + 0.5) == 0
+
+
+def test_token_bucket_sync_uses_server_count():
+    bucket = TokenBucket(10, 10.0)
+    bucket.sync(10, bucket.updated)
+    assert bucket.wait_time(bucket.updated) > 0
+
+
+def test_scope_keeps_bucket_state_for_same_limit():
+    scope = RateLimitScope([(2, 1.0)])
+    bucket = scope.buckets[1.0]
+    scope.configure([(2, 1.0), (100, 120.0)])
+    assert scope.buckets[1.0] is bucket
+    scope.configure([(3, 1.0)])
+    assert scope.buckets[1.0] is not bucket and set(scope.buckets) == {1.0}
+
+
+def test_scope_block():
+    scope = RateLimitScope([(100, 1.0)])
+    now = time.monotonic()
+    scope.block(5, now)
+    assert scope.wait_time(now) == 5
+
+
+def test_acquire_waits_when_bucket_is_empty():
+    limiter = RateLimiter("2:0.2", "")
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire("kr", "match")
+        return time.monotonic() - start
+
+    # 2개는 바로, 3번째는 토큰 하나가 찰 때까지 (0.1초) 대기
+    assert 0.08 <= asyncio.run(run()) < 1
+    assert limiter.queue_depth() == 0
+
+
+def test_headers_and_penalty_apply_to_the_right_scope():
+    limiter = RateLimiter("100:1", "")
+    limiter.update_from_headers("kr", "match", {
+        "X-App-Rate-Limit": "100:1", "X-Method-Rate-Limit": "10:10", "X-Method-Rate-Limit-Count": "10:10",
+    })
+    now = time.monotonic()
+    assert limiter._method_scope("kr", "match").wait_time(now) > 0
+    assert limiter._method_scope("kr", "summoner").wait_time(now) == 0
+
+    limiter.penalize("kr", "summoner", 30, "method")
+    assert limiter._method_scope("kr", "summoner").wait_time(now) > 20
+    assert limiter._app_scope("kr").wait_time(now) == 0
+    limiter.penalize("kr", "summoner", 30, "application")
+    assert limiter._app_scope("kr").wait_time(now) > 20
+    assert limiter._app_scope("na1").wait_time(now) == 0